@@ -10,8 +10,20 @@ from bs4 import BeautifulSoup
 import re
 from requests.exceptions import RequestException, ProxyError
 from fake_useragent import UserAgent  
+from ratelimiter import default_rate_limiter
+from htmlbackends import RegionStrainer, parse_html
+from extractplan import ELEMENT, ExtractionPlan, Field
+from embeddedjson import extract_json_after, iter_a_states
+from retryqueue import RetryableError
+import blockdetect
+import proxypool
+from blockdetect import BlockDetector
+from proxypool import ProxyPool
+from productrecord import ProductRecord
+from responsecache import store_streamed_response
+from scraperbase import ScraperBase
 
-class AmazonScraper:
+class AmazonScraper(ScraperBase):
     """A scraper for extracting product details from Amazon's website with advanced anti-ban features."""
     
     # List of common user agents to rotate (fallback if fake_useragent fails)
@@ -28,7 +40,14 @@ class AmazonScraper:
         "in": "amazon.in"
     }
     
-    def __init__(self, use_proxies=False, proxy_list=None, region="us", captcha_service=None):
+    # Pages are large HTML documents, parse them in the process pool
+    parse_in_process = True
+    
+    # HTML parser backend ("selectolax", "lxml", "html.parser" or "auto");
+    # None uses the HTML_PARSER_BACKEND environment variable
+    parser_backend = None
+    
+    def __init__(self, use_proxies=False, proxy_list=None, region="us", captcha_service=None, rate_limiter=None, cookies=None):
         """
         Initialize the Amazon scraper with advanced anti-ban features.
         
@@ -37,12 +56,16 @@ class AmazonScraper:
             proxy_list (list): List of proxy URLs (if None, will attempt to load from proxies.txt)
             region (str): Amazon regional domain to use (us, uk, ca, etc.)
             captcha_service (object): Optional CAPTCHA solving service client
+            rate_limiter (RateLimiter): Optional per-host rate limiter (defaults to the shared one)
+            cookies (CookieJar): Saved cookies from an earlier session; skips the homepage visit
         """
+        # Requests are paced by the shared per-host rate limiter
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        
         # Setup proxy rotation
         self.use_proxies = use_proxies
         self.proxies = self._load_proxies(proxy_list)
-        self.current_proxy_index = 0
-        self.failed_proxies = set()
+        self.proxy_pool = ProxyPool(self.proxies) if self.proxies else None
         
         # Setup user agent rotation
         try:
@@ -63,9 +86,9 @@ class AmazonScraper:
         self.session = requests.Session()
         self._rotate_user_agent()
         
-        # Initialize retry counts and backoff settings
-        self.max_retries = 5
-        self.base_backoff = 2  # Base delay for exponential backoff (seconds)
+        if cookies:
+            self.session.cookies.update(cookies)
+            return
         
         # Attempt to visit the homepage to get cookies
         try:
@@ -91,8 +114,9 @@ class AmazonScraper:
             self.use_proxies = False
             return []
     
-    def _rotate_user_agent(self):
+    def _rotate_user_agent(self, session=None):
         """Rotate the User-Agent to appear as different browsers."""
+        session = session or self.session
         if self.use_fake_ua:
             try:
                 ua = self.ua.random
@@ -101,7 +125,7 @@ class AmazonScraper:
         else:
             ua = random.choice(self.USER_AGENTS)
             
-        self.session.headers.update({
+        session.headers.update({
             "User-Agent": ua,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
@@ -115,95 +139,92 @@ class AmazonScraper:
             "Cache-Control": "max-age=0"
         })
     
-    def _get_next_proxy(self):
-        """Get the next proxy from the rotation list."""
-        if not self.use_proxies or not self.proxies:
-            return None
-            
-        # Skip failed proxies
-        for _ in range(len(self.proxies)):
-            proxy = self.proxies[self.current_proxy_index]
-            self.current_proxy_index = (self.current_proxy_index + 1) % len(self.proxies)
-            
-            if proxy not in self.failed_proxies:
-                return {"http": proxy, "https": proxy}
-                
-        # If all proxies have failed, retry with the first one
-        if self.proxies:
-            self.failed_proxies.clear()  # Reset failed list
-            return {"http": self.proxies[0], "https": self.proxies[0]}
-        return None
-    
-    def _make_request(self, url, params=None, retries=0):
+    def _make_request(self, url, params=None, session=None):
         """
-        Make a request with exponential backoff retry logic and proxy rotation.
+        Make a single request with user agent and proxy rotation.
+        
+        Failures are not retried here: the request raises RetryableError and
+        the caller decides when to try again (see retryqueue.RetryQueue), so a
+        bad ASIN never holds a worker in a backoff sleep.
         
         Args:
             url (str): URL to request
             params (dict): Optional query parameters
-            retries (int): Current retry attempt number
+            session (requests.Session): Session to use (defaults to the scraper's own session)
             
         Returns:
-            Response object or None on failure
-        """
-        if retries >= self.max_retries:
-            print(f"Maximum retries reached for URL: {url}")
-            return None
+            Response object, or None if the product does not exist (404/410)
             
-        # Exponential backoff delay
-        if retries > 0:
-            delay = self.base_backoff ** retries + random.uniform(0, 1)
-            print(f"Retry attempt {retries}/{self.max_retries}, waiting {delay:.2f} seconds...")
-            time.sleep(delay)
+        Raises:
+            RetryableError: On a CAPTCHA page, another non-200 status or a network error
+        """
+        session = session or self.session
         
         # Rotate user agent
-        self._rotate_user_agent()
+        self._rotate_user_agent(session)
         
-        # Get proxy if using proxy rotation
-        proxies = self._get_next_proxy() if self.use_proxies else None
+        # Pick a healthy proxy if using proxy rotation; with none healthy this
+        # raises RetryableError at once instead of holding the fetch thread
+        proxy = None
+        if self.use_proxies and self.proxy_pool:
+            proxy = self.proxy_pool.acquire()
+        proxies = {"http": proxy, "https": proxy} if proxy else None
         
+        outcome = proxypool.ERROR
+        started = None
         try:
-            # Add jitter delay to mimic human behavior
-            time.sleep(1 + random.uniform(0, 2))
+            # Wait for our turn on this host/proxy's rate limiter
+            self.rate_limiter.acquire(url, proxy)
+            
+            # A dead proxy fails on connect, so it only gets a short connect timeout
+            started = time.monotonic()
+            response = session.get(url, params=params, proxies=proxies,
+                                   timeout=(PROXY_CONNECT_TIMEOUT, 20) if proxy else 20, stream=True)
             
-            response = self.session.get(url, params=params, proxies=proxies, timeout=20)
+            # Classify the page from its first few KB; block pages are not downloaded further
+            kind = BLOCK_DETECTOR.read(response)
             
             # Check for CAPTCHA
-            if "captcha" in response.text.lower():
-                if self.captcha_service:
-                    return self._handle_captcha(response, url, params)
-                else:
-                    print(f"CAPTCHA detected but no solving service configured.")
-                    # Mark this proxy as failed if using proxies
-                    if proxies and proxies.get('http') not in self.failed_proxies:
-                        self.failed_proxies.add(proxies.get('http'))
-                    
-                    # Retry with a different proxy/user-agent
-                    return self._make_request(url, params, retries + 1)
+            if kind in (blockdetect.CAPTCHA, blockdetect.ROBOT_CHECK):
+                outcome = proxypool.CAPTCHA
+                if self.captcha_service and kind == blockdetect.CAPTCHA:
+                    return self._handle_captcha(response, url, params, session)
+                response.close()
+                raise RetryableError(f"{kind} page served (no CAPTCHA solving service configured)"
+                                     if kind == blockdetect.CAPTCHA else "Robot check page served")
+            
+            # Block pages count against the proxy, other statuses (e.g. 404) do not
+            if kind != blockdetect.BLOCKED:
+                outcome = proxypool.OK
+            
+            # A missing ASIN stays missing, retrying it would only use up the retry budget
+            if response.status_code in NOT_FOUND_STATUSES:
+                response.close()
+                print(f"Product page not found (status {response.status_code}): {url}")
+                return None
             
             # Check for other failures
             if response.status_code != 200:
-                print(f"Request failed with status code: {response.status_code}")
-                return self._make_request(url, params, retries + 1)
+                response.close()
+                retry_after = response.headers.get("Retry-After", "")
+                raise RetryableError(f"Request failed with status code: {response.status_code}",
+                                     retry_after=float(retry_after) if retry_after.isdigit() else None)
+            
+            # Only a fully read product page goes into the response cache
+            if kind == blockdetect.PRODUCT:
+                store_streamed_response(response)
                 
             return response
-            
-        except ProxyError:
-            # Mark this proxy as failed
-            if proxies and proxies.get('http') not in self.failed_proxies:
-                self.failed_proxies.add(proxies.get('http'))
-            print(f"Proxy error. Rotating proxy and retrying...")
-            return self._make_request(url, params, retries + 1)
-            
+        except ProxyError as e:
+            raise RetryableError(f"Proxy error: {e}")
         except RequestException as e:
-            print(f"Request exception: {e}")
-            return self._make_request(url, params, retries + 1)
-            
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            return self._make_request(url, params, retries + 1)
+            raise RetryableError(f"Request exception: {e}")
+        finally:
+            if proxy:
+                latency = time.monotonic() - started if started is not None else None
+                self.proxy_pool.release(proxy, outcome, latency)
     
-    def _handle_captcha(self, response, url, params):
+    def _handle_captcha(self, response, url, params, session=None):
         """
         Handle CAPTCHA challenge using the provided CAPTCHA solving service.
         This is a placeholder for implementation with your specific CAPTCHA service.
@@ -212,10 +233,12 @@ class AmazonScraper:
             response (Response): The response containing CAPTCHA
             url (str): Original request URL
             params (dict): Original request parameters
+            session (requests.Session): Session the CAPTCHA was served on
             
         Returns:
             Response object from the retry after CAPTCHA solution
         """
+        session = session or self.session
         if not self.captcha_service:
             return None
             
@@ -246,22 +269,34 @@ class AmazonScraper:
             }
             
             # Submit solution
-            captcha_response = self.session.post(form_action, data=form_data)
+            captcha_response = session.post(form_action, data=form_data)
             
             # Retry original request
-            return self.session.get(url, params=params)
+            return session.get(url, params=params)
             
         except Exception as e:
             print(f"Error solving CAPTCHA: {e}")
             return None
     
-    def get_product_details(self, product_id, region=None):
+    def is_cacheable_response(self, response):
+        """Keep product pages in the response store, but never CAPTCHA or block pages."""
+        head = response.content[:BLOCK_DETECTOR.head_bytes]
+        return BLOCK_DETECTOR.classify(response.status_code, response.headers, head) == blockdetect.PRODUCT
+
+    def _replay_copy(self):
+        """Replays read stored pages only, never through a proxy."""
+        replayer = super()._replay_copy()
+        replayer.use_proxies = False
+        return replayer
+
+    def get_product_details(self, product_id, region=None, session=None):
         """
         Fetch product details from Amazon for a given product ID.
         
         Args:
             product_id (str): The Amazon product ID (ASIN)
             region (str): Optional region override (us, uk, ca, etc.)
+            session (requests.Session): Optional session to fetch with
             
         Returns:
             dict: Raw HTML and URL for further processing
@@ -275,10 +310,9 @@ class AmazonScraper:
         # Amazon product URL format using the ASIN (product_id)
         url = f"{base_url}/dp/{product_id}"
         
-        # Add random query parameter to avoid caching
-        params = {'_': str(int(time.time()))}
-        
-        response = self._make_request(url, params)
+        # No cache-busting parameter, so the URL stays stable for the response cache.
+        # A RetryableError propagates so the caller can reschedule the product
+        response = self._make_request(url, session=session)
         if not response:
             print(f"Failed to fetch product {product_id}")
             return None
@@ -288,131 +322,97 @@ class AmazonScraper:
             "url": response.url
         }
     
-    def extract_product_info(self, data):
+    @classmethod
+    def extract_product_info(cls, data):
         """
         Extract relevant product information from the Amazon page HTML.
         
+        Uses no instance state, so it can run in a worker process of the parse pool.
+        
         Args:
             data (dict): Raw HTML and URL
             
         Returns:
-            dict: Extracted product information
+            ProductRecord: Extracted product information
         """
         if not data or "html" not in data:
             return None
         
-        soup = BeautifulSoup(data["html"], "html.parser")
+        # Price and image data embedded as JSON are read with a plain scan of the
+        # page; when the images are there, their regions are not parsed at all
+        embedded = cls._extract_embedded(data["html"])
+        if embedded.get("images"):
+            plan, regions = cls.TEXT_EXTRACTION_PLAN, TEXT_REGIONS
+        else:
+            plan, regions = cls.EXTRACTION_PLAN, PAGE_REGIONS
+        
+        # Only the regions the extraction plan reads are parsed; scripts, styles,
+        # ads and recommendation carousels never make it into the tree
+        soup = parse_html(data["html"], cls.parser_backend, parse_only=regions, drop_scripts=True)
+        
+        # All fields are collected in a single pass over the document
+        found = plan.run(soup)
+        found.update(embedded)
         
         # Initialize product_info dictionary
         product_info = {
-            "product_id": self._extract_product_id(data["url"]),
+            "product_id": cls._extract_product_id(data["url"]),
             "source": "Amazon",
             "url": data["url"],
-            "region": self._extract_region_from_url(data["url"])
+            "region": cls._extract_region_from_url(data["url"])
         }
         
         # Extract product name
-        product_name_elem = soup.select_one("#productTitle")
-        if product_name_elem:
-            product_info["name"] = product_name_elem.text.strip()
+        if "name" in found:
+            product_info["name"] = found["name"]
         
         # Extract brand
-        brand_elem = soup.select_one("#bylineInfo") or soup.select_one(".a-link-normal.contributorNameID")
-        if brand_elem:
-            brand_text = brand_elem.text.strip()
-            # Clean up brand text (e.g., "Visit the Brand Store" -> "Brand")
-            brand = re.sub(r'^(Visit the|Brand:|by)\s+', '', brand_text)
-            brand = re.sub(r'\s+Store$', '', brand)
-            product_info["brand"] = brand
-        
-        # Extract price
-        price_elem = soup.select_one(".a-price .a-offscreen")
-        if price_elem:
-            price_text = price_elem.text.strip()
-            product_info["selling_price"] = self._extract_price(price_text)
-        
-        # Extract original price (if available)
-        original_price_elem = soup.select_one("span.a-price.a-text-price span.a-offscreen")
-        if original_price_elem:
-            original_price_text = original_price_elem.text.strip()
-            product_info["mrp"] = self._extract_price(original_price_text)
-            
-            # Calculate discount percentage if both prices are available
-            if "selling_price" in product_info and "mrp" in product_info:
-                if product_info["mrp"] > 0:
-                    discount = ((product_info["mrp"] - product_info["selling_price"]) / product_info["mrp"]) * 100
-                    product_info["discount_percent"] = round(discount, 2)
+        if "byline" in found:
+            product_info["brand"] = found["byline"]
+        elif "contributor" in found:
+            product_info["brand"] = found["contributor"]
+        
+        # Extract price, original price and discount
+        cls._add_prices(product_info, found)
         
         # Extract rating
-        rating_elem = soup.select_one("#acrPopover")
-        if rating_elem and 'title' in rating_elem.attrs:
-            rating_text = rating_elem['title']
-            rating_match = re.search(r'(\d+(\.\d+)?)', rating_text)
-            if rating_match:
-                product_info["average_rating"] = float(rating_match.group(1))
+        if found.get("average_rating") is not None:
+            product_info["average_rating"] = found["average_rating"]
         
         # Extract rating count
-        rating_count_elem = soup.select_one("#acrCustomerReviewText")
-        if rating_count_elem:
-            count_text = rating_count_elem.text.strip()
-            count_match = re.search(r'(\d+(\,\d+)*)', count_text)
-            if count_match:
-                product_info["rating_count"] = int(count_match.group(1).replace(',', ''))
+        if found.get("rating_count") is not None:
+            product_info["rating_count"] = found["rating_count"]
         
         # Extract availability/stock status
-        availability_elem = soup.select_one("#availability")
-        if availability_elem:
-            availability = availability_elem.text.strip()
-            product_info["availability"] = availability
-            product_info["in_stock"] = "in stock" in availability.lower()
+        cls._add_availability(product_info, found)
         
         # Extract product description
-        description_elem = soup.select_one("#productDescription")
-        if description_elem:
-            product_info["description"] = description_elem.text.strip()
+        if "description" in found:
+            product_info["description"] = found["description"]
         
         # Extract product features/bullet points
-        feature_bullets = soup.select("#feature-bullets li")
-        if feature_bullets:
-            features = []
-            for bullet in feature_bullets:
-                bullet_text = bullet.text.strip()
-                if bullet_text and not "hide" in bullet.get("class", []):
-                    features.append(bullet_text)
-            
-            if features:
-                product_info["features"] = features
+        features = [feature for feature in found["features"] if feature]
+        if features:
+            product_info["features"] = features
         
-        # Extract product images
-        image_gallery = soup.select("#altImages img")
-        images = []
+        # Extract product images, trying to get the large image first
+        images = list(found.get("images", []))
+        if not images and found.get("landing_image"):
+            images.append(found["landing_image"])
         
-        # Try to get the large image first
-        main_image_elem = soup.select_one("#landingImage")
-        if main_image_elem and 'data-old-hires' in main_image_elem.attrs:
-            images.append(main_image_elem['data-old-hires'])
-        elif main_image_elem and 'src' in main_image_elem.attrs:
-            images.append(main_image_elem['src'])
-        
-        # Add gallery thumbnails (try to get larger versions)
-        for img in image_gallery:
-            if 'src' in img.attrs:
-                # Replace thumbnail with large image URL
-                img_url = img['src']
-                # Convert thumbnail URL to high-res URL
-                high_res_url = re.sub(r'._SS\d+_', '._SL1500_', img_url)
-                if high_res_url not in images:
-                    images.append(high_res_url)
+        # Add gallery thumbnails (converted to larger versions)
+        for high_res_url in found.get("gallery_images", []):
+            if high_res_url and high_res_url not in images:
+                images.append(high_res_url)
         
         if images:
             product_info["images"] = images
         
         # Extract product details table
         details_table = {}
-        detail_rows = soup.select(".prodDetTable tr") or soup.select(".a-expander-content table tr")
+        detail_rows = found["detail_rows"] or found["expander_rows"]
         
-        for row in detail_rows:
-            cells = row.select("td, th")
+        for cells in detail_rows:
             if len(cells) >= 2:
                 key = cells[0].text.strip()
                 value = cells[1].text.strip()
@@ -423,20 +423,64 @@ class AmazonScraper:
             product_info["specifications"] = details_table
         
         # Extract category information
-        breadcrumbs = soup.select("#wayfinding-breadcrumbs_feature_div li")
-        if breadcrumbs:
-            categories = []
-            for crumb in breadcrumbs:
-                crumb_text = crumb.text.strip()
-                if crumb_text and '›' not in crumb_text:
-                    categories.append(crumb_text)
+        categories = [crumb for crumb in found["breadcrumbs"] if crumb and '›' not in crumb]
+        if categories:
+            product_info["categories"] = categories
+            product_info["category"] = categories[-1]  # Main category
+        
+        return ProductRecord.from_dict(product_info)
+    
+    @classmethod
+    def extract_volatile_info(cls, data):
+        """
+        Extract only the price, discount and availability fields of a product page.
+        
+        Used to refresh cached products whose other fields are still fresh: only
+        the price and availability regions of the page are parsed.
+        
+        Args:
+            data (dict): Raw HTML and URL
             
-            if categories:
-                product_info["categories"] = categories
-                if categories:
-                    product_info["category"] = categories[-1]  # Main category
+        Returns:
+            dict: Volatile product fields (see fieldgroups.py)
+        """
+        if not data or "html" not in data:
+            return None
+        
+        soup = parse_html(data["html"], cls.parser_backend, parse_only=VOLATILE_REGIONS, drop_scripts=True)
+        found = cls.VOLATILE_EXTRACTION_PLAN.run(soup)
+        price = cls._extract_buybox_price(data["html"])
+        if price is not None:
+            found["selling_price"] = price
         
-        return product_info
+        volatile_info = {}
+        cls._add_prices(volatile_info, found)
+        cls._add_availability(volatile_info, found)
+        return volatile_info
+    
+    @staticmethod
+    def _add_prices(product_info, found):
+        """Copy the selling price and mrp into product_info and derive the discount percentage."""
+        if "selling_price" in found:
+            product_info["selling_price"] = found["selling_price"]
+        
+        # Original price (if available)
+        if "mrp" in found:
+            product_info["mrp"] = found["mrp"]
+            
+            # Calculate discount percentage if both prices are available
+            if product_info.get("selling_price") is not None and product_info["mrp"]:
+                if product_info["mrp"] > 0:
+                    discount = ((product_info["mrp"] - product_info["selling_price"]) / product_info["mrp"]) * 100
+                    product_info["discount_percent"] = round(discount, 2)
+    
+    @staticmethod
+    def _add_availability(product_info, found):
+        """Copy the availability text into product_info along with the derived in_stock flag."""
+        if "availability" in found:
+            availability = found["availability"]
+            product_info["availability"] = availability
+            product_info["in_stock"] = "in stock" in availability.lower()
     
     def save_to_json(self, data, output_file=None):
         """
@@ -461,7 +505,7 @@ class AmazonScraper:
         output_path = os.path.join(os.getcwd(), output_file)
         
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            json.dump(dict(data), f, indent=2, ensure_ascii=False)
         
         print(f"Product information saved to {output_path}")
         return output_path
@@ -516,29 +560,201 @@ class AmazonScraper:
         print(f"Product information saved to {output_path}")
         return output_path
     
-    def _extract_product_id(self, url):
+    @staticmethod
+    def _extract_product_id(url):
         """Extract the ASIN (Amazon product ID) from the URL."""
-        match = re.search(r'/dp/([A-Z0-9]{10})', url)
+        match = PRODUCT_ID_RE.search(url)
         if match:
             return match.group(1)
         return None
     
-    def _extract_region_from_url(self, url):
+    @classmethod
+    def _extract_region_from_url(cls, url):
         """Extract the region from the Amazon URL."""
-        for region, domain in self.AMAZON_DOMAINS.items():
+        for region, domain in cls.AMAZON_DOMAINS.items():
             if domain in url:
                 return region
         return "us"  # Default
     
-    def _extract_price(self, price_text):
+    @classmethod
+    def _extract_embedded(cls, html):
+        """
+        Read price and image data from the JSON embedded in the page, without building a DOM.
+        
+        Args:
+            html (str): Raw page HTML
+            
+        Returns:
+            dict: Any of "selling_price" and "images" that were found
+        """
+        embedded = {}
+        
+        price = cls._extract_buybox_price(html)
+        if price is not None:
+            embedded["selling_price"] = price
+        
+        # Image block: 'colorImages': { 'initial': [{"hiRes": ..., "large": ...}, ...] }
+        images = []
+        color_images = extract_json_after(html, "'colorImages': { 'initial':")
+        if isinstance(color_images, list):
+            for image in color_images:
+                if isinstance(image, dict):
+                    url = image.get("hiRes") or image.get("large")
+                    if url and url not in images:
+                        images.append(url)
+        
+        # Fall back to the landing image a-state if the image block is missing
+        if not images:
+            for key, value in iter_a_states(html):
+                if key == "desktop-landing-image-data" and isinstance(value, dict) and value.get("landingImageUrl"):
+                    images.append(value["landingImageUrl"])
+                    break
+        
+        if images:
+            embedded["images"] = images
+        return embedded
+    
+    @staticmethod
+    def _extract_buybox_price(html):
+        """Read the buy-box price from the JSON embedded in the page, or None."""
+        # Buy-box price data, e.g. {"desktop_buybox_group_1": [{"priceAmount": 499.0, ...}]}
+        price_data = extract_json_after(html, 'class="twister-plus-buying-options-price-data">')
+        if isinstance(price_data, dict):
+            for offers in price_data.values():
+                if isinstance(offers, list) and offers and isinstance(offers[0], dict):
+                    price = offers[0].get("priceAmount")
+                    if price is not None:
+                        return float(price)
+        return None
+    
+    @staticmethod
+    def _extract_price(price_text):
         """Extract numerical price from text."""
         if not price_text:
             return None
         
         # Remove currency symbol and commas
-        clean_price = re.sub(r'[^\d.]', '', price_text)
+        clean_price = NON_PRICE_CHARS_RE.sub('', price_text)
         
         try:
             return float(clean_price)
         except ValueError:
-            return None
\ No newline at end of file
+            return None
+    
+    @staticmethod
+    def _clean_brand(brand_text):
+        """Clean up brand text (e.g., "Visit the Brand Store" -> "Brand")."""
+        brand = BRAND_PREFIX_RE.sub('', brand_text)
+        return BRAND_SUFFIX_RE.sub('', brand)
+    
+    @staticmethod
+    def _extract_rating(rating_text):
+        """Extract the average rating from the rating popover title."""
+        if rating_text is None:
+            return None
+        rating_match = RATING_RE.search(rating_text)
+        return float(rating_match.group(1)) if rating_match else None
+    
+    @staticmethod
+    def _extract_rating_count(count_text):
+        """Extract the number of ratings from text like "1,234 ratings"."""
+        count_match = RATING_COUNT_RE.search(count_text)
+        return int(count_match.group(1).replace(',', '')) if count_match else None
+    
+    @staticmethod
+    def _extract_feature(bullet):
+        """Return a feature bullet's text, or None for hidden/empty bullets."""
+        bullet_text = bullet.text.strip()
+        if bullet_text and not "hide" in bullet.get("class", []):
+            return bullet_text
+        return None
+    
+    @staticmethod
+    def _extract_landing_image(image):
+        """Return the large landing image URL."""
+        if 'data-old-hires' in image.attrs:
+            return image['data-old-hires']
+        return image.get('src')
+    
+    @staticmethod
+    def _extract_gallery_image(image):
+        """Convert a gallery thumbnail URL to a high-res image URL."""
+        if 'src' not in image.attrs:
+            return None
+        return THUMBNAIL_SIZE_RE.sub('._SL1500_', image['src'])
+    
+    @staticmethod
+    def _extract_detail_cells(row):
+        """Return the header/value cells of a product details table row."""
+        return row.select("td, th")
+
+
+# Recognises Amazon's CAPTCHA and automated-access pages from the first few KB
+BLOCK_DETECTOR = BlockDetector(
+    captcha_markers=[b"/errors/validateCaptcha", b"Type the characters you see in this image"],
+    robot_markers=[b"<title>Robot Check</title>", b"api-services-support@amazon.com",
+                   b"To discuss automated access to Amazon data"],
+    block_statuses=(403, 429, 503)
+)
+
+# Statuses meaning the product does not exist, so it is not retried
+NOT_FOUND_STATUSES = (404, 410)
+
+# Connect timeout for proxied requests, so dead proxies fail fast
+PROXY_CONNECT_TIMEOUT = 5
+
+# Regular expressions used during extraction, compiled once
+NON_PRICE_CHARS_RE = re.compile(r'[^\d.]')
+BRAND_PREFIX_RE = re.compile(r'^(Visit the|Brand:|by)\s+')
+BRAND_SUFFIX_RE = re.compile(r'\s+Store$')
+RATING_RE = re.compile(r'(\d+(\.\d+)?)')
+RATING_COUNT_RE = re.compile(r'(\d+(\,\d+)*)')
+THUMBNAIL_SIZE_RE = re.compile(r'._SS\d+_')
+PRODUCT_ID_RE = re.compile(r'/dp/([A-Z0-9]{10})')
+
+# Page regions the extraction plan reads (every selector below lives inside one)
+PAGE_REGIONS = RegionStrainer(
+    ids=[
+        "productTitle", "bylineInfo", "acrPopover", "acrCustomerReviewText",
+        "availability", "productDescription", "feature-bullets", "landingImage",
+        "altImages", "wayfinding-breadcrumbs_feature_div"
+    ],
+    classes=["contributorNameID", "a-price", "prodDetTable", "a-expander-content"]
+)
+
+# Regions still needed when the images come from the embedded JSON
+TEXT_REGIONS = RegionStrainer(
+    ids=PAGE_REGIONS.ids - {"landingImage", "altImages"},
+    classes=PAGE_REGIONS.classes
+)
+
+# Regions holding the price and availability, for refreshing cached products
+VOLATILE_REGIONS = RegionStrainer(ids=["availability"], classes=["a-price"])
+
+# Declarative field spec for product pages, compiled once at import
+AmazonScraper.EXTRACTION_PLAN = ExtractionPlan([
+    Field("name", "#productTitle"),
+    Field("byline", "#bylineInfo", post=AmazonScraper._clean_brand),
+    Field("contributor", ".a-link-normal.contributorNameID", post=AmazonScraper._clean_brand),
+    Field("selling_price", ".a-price .a-offscreen", post=AmazonScraper._extract_price),
+    Field("mrp", "span.a-price.a-text-price span.a-offscreen", post=AmazonScraper._extract_price),
+    Field("average_rating", "#acrPopover", attr="title", post=AmazonScraper._extract_rating),
+    Field("rating_count", "#acrCustomerReviewText", post=AmazonScraper._extract_rating_count),
+    Field("availability", "#availability"),
+    Field("description", "#productDescription"),
+    Field("features", "#feature-bullets li", attr=ELEMENT, post=AmazonScraper._extract_feature, many=True),
+    Field("landing_image", "#landingImage", attr=ELEMENT, post=AmazonScraper._extract_landing_image),
+    Field("gallery_images", "#altImages img", attr=ELEMENT, post=AmazonScraper._extract_gallery_image, many=True),
+    Field("detail_rows", ".prodDetTable tr", attr=ELEMENT, post=AmazonScraper._extract_detail_cells, many=True),
+    Field("expander_rows", ".a-expander-content table tr", attr=ELEMENT, post=AmazonScraper._extract_detail_cells, many=True),
+    Field("breadcrumbs", "#wayfinding-breadcrumbs_feature_div li", many=True),
+])
+
+# The same plan without the image fields, used when images come from the embedded JSON
+AmazonScraper.TEXT_EXTRACTION_PLAN = AmazonScraper.EXTRACTION_PLAN.subset(
+    field.name for field in AmazonScraper.EXTRACTION_PLAN.fields
+    if field.name not in ("landing_image", "gallery_images")
+)
+
+# Only the price and availability fields, for refreshing cached products
+AmazonScraper.VOLATILE_EXTRACTION_PLAN = AmazonScraper.EXTRACTION_PLAN.subset(["selling_price", "mrp", "availability"])
\ No newline at end of file
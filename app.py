@@ -1,16 +1,28 @@
 import streamlit as st
 import pandas as pd
+import requests
 import json
 import time
 import random
+import threading
 from io import StringIO
 import base64
-from myntrascrapper import MyntraScraper
+from myntrascrapper import MyntraScraper, STYLE_FIELDS
+from fastjson import loads_fields
+from resultcolumns import ResultColumns
+from productrecord import EXPORT_NAMES
+from resultspool import ResultSpool, remove_old_spools
+from fetchengine import FetchEngine
+from ratelimiter import default_rate_limiter
+from cachestore import CacheStore, migrate_pickle_cache
+from responsecache import ResponseStore
+from refreshqueue import RefreshQueue
+from scraperpool import CookieJarStore, ScraperPool
+from sessionpool import SessionPool
+from retryqueue import RetryQueue, RetryableError
 import datetime
 import os
-import hashlib
 from xlsxwriter import Workbook
-import pickle
 from pathlib import Path
 import uuid
 
@@ -33,6 +45,36 @@ PLATFORMS = {
 # Cache configuration (unchanged)
 CACHE_DIR = Path("cache")
 CACHE_EXPIRY_DAYS = 7  # Cache entries expire after 7 days
+CACHE_EXPIRY_SECONDS = CACHE_EXPIRY_DAYS * 24 * 60 * 60
+CACHE_MAX_STALE_DAYS = 30  # Expired entries can still be served stale for this long
+CACHE_MAX_STALE_SECONDS = CACHE_MAX_STALE_DAYS * 24 * 60 * 60
+CACHE_VOLATILE_TTL_HOURS = 6  # Prices, discounts and stock are re-checked after 6 hours
+CACHE_VOLATILE_TTL_SECONDS = CACHE_VOLATILE_TTL_HOURS * 60 * 60
+CACHE_DB = CACHE_DIR / "products.db"
+CACHE_MEMORY_MB = 64  # In-memory LRU tier in front of the database, shared by all sessions
+CACHE_MAX_MB = 512  # Stored (compressed) size budget, enforced by background eviction
+CACHE_EVICTION_POLICY = "lru"  # "lru" or "lfu"
+CACHE_MAINTENANCE_INTERVAL = 300  # Seconds between background eviction/compaction steps
+RESPONSE_CACHE_DB = CACHE_DIR / "responses.db"  # Raw pages, so extraction can be re-run offline
+RESPONSE_CACHE_MAX_MB = 1024  # Stored (compressed) size budget for raw pages, enforced by background eviction
+RESPONSE_CACHE_MAX_AGE_DAYS = 30  # Pages the server has not confirmed for this long are dropped
+COOKIE_DIR = CACHE_DIR / "cookies"  # Site cookies, reused by new scrapers until they expire
+RETRY_BUDGET_RATIO = 0.5  # Retries allowed per run, as a fraction of the products to fetch
+RETRY_BUDGET_MIN = 10
+MYNTRA_FALLBACK_SESSIONS = 8  # Warm sessions kept for the cloud-safe Myntra path
+RESULTS_DIR = CACHE_DIR / "results"  # Per-run result files, written while scraping and served as downloads
+RESULTS_MAX_AGE_HOURS = 24  # Result files of older runs are deleted when a new run starts
+
+# Headers for the cloud-safe Myntra path
+MYNTRA_FALLBACK_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Accept": "application/json",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.myntra.com/",
+    "sec-ch-ua": '"Not A(Brand";v="99", "Google Chrome";v="121", "Chromium";v="121"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"macOS"'
+}
 
 # User state configuration
 USER_STATE_DIR = Path("user_state")
@@ -214,38 +256,45 @@ def clear_expired_user_states():
     
     return deleted_count
 
-# Existing cache functions (unchanged)
-def get_cache_key(platform, product_id):
-    """Generate a unique cache key for a product."""
-    key = f"{platform}_{product_id}"
-    return hashlib.md5(key.encode()).hexdigest()
+# Product cache, a single SQLite database under CACHE_DIR
+@st.cache_resource
+def get_cache_store():
+    """Open the product cache once per process, migrating any old pickle files."""
+    store = CacheStore(CACHE_DB, memory_bytes=CACHE_MEMORY_MB * 1024 * 1024,
+                       max_bytes=CACHE_MAX_MB * 1024 * 1024, eviction=CACHE_EVICTION_POLICY)
+    migrate_pickle_cache(store, CACHE_DIR, PLATFORMS.keys())
+    # Expiry, eviction and compaction run in the background instead of on button clicks;
+    # expired entries are kept while they can still be served stale
+    store.start_maintenance(CACHE_MAINTENANCE_INTERVAL, max_age=CACHE_EXPIRY_SECONDS + CACHE_MAX_STALE_SECONDS)
+    return store
+
+@st.cache_resource
+def get_refresh_queue():
+    """Background queue re-scraping stale cache entries, shared by all sessions."""
+    return RefreshQueue(workers=2)
+
+@st.cache_resource
+def get_response_store():
+    """Open the raw HTTP response store once per process."""
+    store = ResponseStore(RESPONSE_CACHE_DB, max_bytes=RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+                          max_age=RESPONSE_CACHE_MAX_AGE_DAYS * 24 * 60 * 60)
+    # Pages are evicted to budget in the background, like the product cache
+    store.start_maintenance(CACHE_MAINTENANCE_INTERVAL)
+    return store
 
 def get_from_cache(platform, product_id):
     """Retrieve product data from cache if available and not expired."""
-    cache_key = get_cache_key(platform, product_id)
-    cache_file = CACHE_DIR / f"{cache_key}.pkl"
-    
-    if cache_file.exists():
-        # Check if cache is expired
-        file_age = datetime.now() - datetime.fromtimestamp(cache_file.stat().st_mtime)
-        if file_age.days < CACHE_EXPIRY_DAYS:
-            try:
-                with open(cache_file, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                print(f"Error loading cache: {e}")
-    
+    try:
+        return get_cache_store().get(platform, product_id, max_age=CACHE_EXPIRY_SECONDS)
+    except Exception as e:
+        print(f"Error loading cache: {e}")
     return None
 
 def save_to_cache(platform, product_id, data):
     """Save product data to cache."""
     if data:
-        cache_key = get_cache_key(platform, product_id)
-        cache_file = CACHE_DIR / f"{cache_key}.pkl"
-        
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(data, f)
+            get_cache_store().put(platform, product_id, data)
         except Exception as e:
             print(f"Error saving to cache: {e}")
 
@@ -261,30 +310,104 @@ def download_link(object_to_download, download_filename, download_link_text):
     href = f'<a href="data:file/txt;base64,{b64}" download="{download_filename}" class="download-button">{download_link_text}</a>'
     return href
 
+def file_download_button(path, label, file_name, mime, key):
+    """
+    Offers a file written during the run for download, read straight from disk.
+    """
+    with open(path, "rb") as f:
+        # "ignore" keeps the results on screen instead of rerunning the app
+        st.download_button(label, f, file_name=file_name, mime=mime, key=key, on_click="ignore")
+
+def normalize_product_id(product_id):
+    """Return a product ID as a clean string, or None for blank cells.
+    
+    pandas reads numeric ID columns with blanks as floats, so "12345.0" is
+    turned back into "12345".
+    """
+    if product_id is None or pd.isna(product_id):
+        return None
+    product_id = str(product_id).strip()
+    if product_id.endswith(".0") and product_id[:-2].isdigit():
+        product_id = product_id[:-2]
+    return product_id or None
+
+def plan_batch(platform, product_ids, use_cache, serve_stale=False):
+    """
+    Work out what a scraping run has to do before it starts.
+    
+    Args:
+        platform (str): Selected platform
+        product_ids (iterable): IDs as uploaded, possibly with duplicates and blanks
+        use_cache (bool): Whether cached results may be used
+        serve_stale (bool): Also use expired entries (stale-while-revalidate)
+        
+    Returns:
+        tuple: (unique normalized IDs in upload order, dict of cached results
+            including stale ones, list of IDs to fetch, list of cached IDs whose
+            prices and stock have expired, dict of stale IDs -> age in seconds).
+            Products in the price refresh list are also in the cached results
+            when serve_stale is set.
+    """
+    unique_ids = []
+    seen = set()
+    for product_id in product_ids:
+        product_id = normalize_product_id(product_id)
+        if product_id and product_id not in seen:
+            seen.add(product_id)
+            unique_ids.append(product_id)
+    
+    cached = {}
+    to_refresh = []
+    stale = {}
+    if use_cache:
+        try:
+            cached, volatile_expired, stale_entries = get_cache_store().classify(
+                platform, unique_ids, CACHE_EXPIRY_SECONDS, CACHE_VOLATILE_TTL_SECONDS,
+                CACHE_MAX_STALE_SECONDS if serve_stale else 0
+            )
+            # Records whose static fields are still fresh only need their
+            # prices and stock re-read
+            to_refresh = list(volatile_expired)
+            if serve_stale:
+                cached.update(volatile_expired)
+                for product_id, (data, age) in stale_entries.items():
+                    cached[product_id] = data
+                    stale[product_id] = age
+        except Exception as e:
+            print(f"Error loading cache: {e}")
+    
+    refreshing = set(to_refresh)
+    to_fetch = [product_id for product_id in unique_ids if product_id not in cached and product_id not in refreshing]
+    return unique_ids, cached, to_fetch, to_refresh, stale
+
 def clear_cache():
-    """Clear all cached data or just expired items."""
-    cache_files = list(CACHE_DIR.glob("*.pkl"))
-    now = datetime.now()
-    expired = 0
-    total = len(cache_files)
-    
-    for cache_file in cache_files:
-        file_age = now - datetime.fromtimestamp(cache_file.stat().st_mtime)
-        if file_age.days >= CACHE_EXPIRY_DAYS:
-            cache_file.unlink()
-            expired += 1
-            
+    """Clear expired cache entries."""
+    store = get_cache_store()
+    total = store.stats()["items"]
+    expired = store.delete_expired(CACHE_EXPIRY_SECONDS)
     return total, expired
 
+@st.cache_resource
+def get_scraper_pool():
+    """Warm scrapers shared by all sessions and reruns, with cookies persisted under CACHE_DIR."""
+    return ScraperPool(create_scraper, CookieJarStore(COOKIE_DIR))
+
 def get_scraper(platform):
-    """Get appropriate scraper based on platform selection with cloud environment adaptations"""
+    """Get the warm scraper for a platform, building it on first use or once its cookies expire"""
+    return get_scraper_pool().get(platform)
+
+def create_scraper(platform, cookies=None):
+    """Build a scraper based on platform selection with cloud environment adaptations
+    
+    When saved cookies are passed in, the scraper skips its homepage visit.
+    """
     try:
         # Set cloud environment flag
         is_cloud = os.environ.get('IS_STREAMLIT_CLOUD', False)
         
         if platform == "myntra":
             from myntrascrapper import MyntraScraper
-            scraper = MyntraScraper()
+            scraper = MyntraScraper(cookies=cookies)
             
             # Always update Myntra headers for better reliability
             scraper.session.headers.update({
@@ -296,12 +419,6 @@ def get_scraper(platform):
                 'sec-ch-ua-mobile': '?0',
                 'sec-ch-ua-platform': '"Windows"'
             })
-            
-            # Ensure we have cookies by visiting the homepage
-            try:
-                scraper.session.get("https://www.myntra.com/")
-            except:
-                pass
                 
             return scraper
             
@@ -309,7 +426,7 @@ def get_scraper(platform):
         elif platform == "flipkart":
             # Your existing code for Flipkart
             from flipkartscrapper import FlipkartScraper
-            scraper = FlipkartScraper()
+            scraper = FlipkartScraper(cookies=cookies)
             # Cloud-specific settings for Flipkart
             if is_cloud:
                 scraper.session.headers.update({
@@ -324,9 +441,9 @@ def get_scraper(platform):
             # For Amazon, we need to be more careful in cloud environments
             if is_cloud:
                 # Use safer settings for cloud deployment
-                return AmazonScraper(region="in", use_proxies=False)
+                return AmazonScraper(region="in", use_proxies=False, cookies=cookies)
             else:
-                return AmazonScraper(region="in")
+                return AmazonScraper(region="in", cookies=cookies)
                 
         elif platform == "tatacliq":
             from tatacliqscrapper import TataCliqScraper
@@ -345,9 +462,62 @@ def get_scraper(platform):
         return None
 
 
+# Scrapes run on fetch engine worker threads, where st.* calls have no
+# script context and are dropped; warnings are collected per call instead
+# and shown by the script thread
+_scrape_warnings = threading.local()
+
+def warn_scrape(message):
+    """Report a per-product scrape problem from any thread."""
+    print(message)
+    messages = getattr(_scrape_warnings, 'messages', None)
+    if messages is not None:
+        messages.append(message)
+
+def collect_scrape_warnings(fn, *args):
+    """Call fn(*args) on this thread and return (result, warnings reported by warn_scrape)."""
+    _scrape_warnings.messages = []
+    try:
+        return fn(*args), _scrape_warnings.messages
+    finally:
+        _scrape_warnings.messages = None
+
+def scrape_and_cache(scraper, platform, product_id):
+    """Scrape one product and cache it if extraction succeeded."""
+    # Use safe scraping with fallbacks
+    product_info = safe_scrape(scraper, product_id, platform)
+    
+    # Save to cache if successful
+    if product_info:
+        save_to_cache(platform, product_id, product_info)
+    
+    return product_info
+
+def refresh_cached(scraper, platform, product_id):
+    """Re-read only the prices and stock of a cached product.
+    
+    The fresh fields are merged into the cached record, whose static fields
+    keep their own expiry. Falls back to a full scrape if the partial
+    refresh fails.
+    """
+    try:
+        fields = scraper.refresh_volatile(product_id)
+        if fields:
+            merged = get_cache_store().update_volatile(platform, {product_id: fields})
+            if product_id in merged:
+                return merged[product_id]
+    except Exception as e:
+        print(f"Error refreshing prices for {product_id}: {e}")
+    return scrape_and_cache(scraper, platform, product_id)
+
 # Add this after your imports
 def safe_scrape(scraper, product_id, platform):
     """Safe scraping wrapper with better error handling"""
+    # Borrow a pooled session so concurrent workers never share one
+    pool = getattr(scraper, 'session_pool', None)
+    session = pool.acquire() if pool else getattr(scraper, 'session', None)
+    fetch_kwargs = {"session": session} if pool else {}
+    
     try:
         # For cloud environment, always use the alternative method for Myntra
         is_cloud = os.environ.get('IS_STREAMLIT_CLOUD', False)
@@ -358,16 +528,16 @@ def safe_scrape(scraper, product_id, platform):
             return myntra_cloud_safe_scrape(scraper, product_id)
         
         # Standard approach for other platforms or local environment
-        data = scraper.get_product_details(str(product_id))
+        data = scraper.get_product_details(str(product_id), **fetch_kwargs)
         
         if not data:
             # If no data returned, try with different user agent
-            if hasattr(scraper, 'session'):
+            if session is not None:
                 # Save original headers
-                original_headers = scraper.session.headers.copy()
+                original_headers = session.headers.copy()
                 
                 # Try with a different user agent
-                scraper.session.headers.update({
+                session.headers.update({
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
                     'Accept': 'application/json, text/javascript, */*; q=0.01',
                     'Accept-Language': 'en-US,en;q=0.9',
@@ -379,17 +549,17 @@ def safe_scrape(scraper, product_id, platform):
                 })
                 
                 # Add cookies if missing
-                if platform == "myntra" and not scraper.session.cookies:
+                if platform == "myntra" and not session.cookies:
                     try:
-                        scraper.session.get('https://www.myntra.com/')
+                        session.get('https://www.myntra.com/')
                     except:
                         pass
                 
                 # Retry with new headers
-                data = scraper.get_product_details(str(product_id))
+                data = scraper.get_product_details(str(product_id), **fetch_kwargs)
                 
                 # Restore original headers
-                scraper.session.headers = original_headers
+                session.headers = original_headers
         
         if data:
             # For Myntra specifically, check if the data is valid JSON
@@ -400,8 +570,11 @@ def safe_scrape(scraper, product_id, platform):
                 except:
                     return None
             
-            # Extract product information
-            product_info = scraper.extract_product_info(data)
+            # Extract product information (in the parse pool for HTML platforms)
+            if hasattr(scraper, 'parse_product'):
+                product_info = scraper.parse_product(data)
+            else:
+                product_info = scraper.extract_product_info(data)
             
             # If extraction failed but we have data, try fallback extraction
             if not product_info and platform == "myntra":
@@ -414,51 +587,67 @@ def safe_scrape(scraper, product_id, platform):
             return myntra_cloud_safe_scrape(scraper, product_id)
         
         return None
+    except RetryableError:
+        # Let the fetch engine put the product back on the retry queue
+        raise
     except Exception as e:
-        st.warning(f"Error while scraping {platform} product {product_id}: {str(e)}")
+        warn_scrape(f"Error while scraping {platform} product {product_id}: {str(e)}")
         
         # If it's Myntra, try the alternative method
         if platform == "myntra":
             return myntra_cloud_safe_scrape(scraper, product_id)
         
         return None
+    finally:
+        if pool:
+            pool.release(session)
 
-def myntra_cloud_safe_scrape(scraper, product_id):
-    """Alternative scraping method optimized for cloud environments"""
-    try:
-        import requests
-        import json
-        import random
-        import time
-        
-        # Use a completely fresh session
-        session = requests.Session()
-        session.headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            "Accept": "application/json",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.myntra.com/",
-            "sec-ch-ua": '"Not A(Brand";v="99", "Google Chrome";v="121", "Chromium";v="121"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"macOS"'
-        }
-        
-        # First, visit homepage to get cookies
+def new_myntra_fallback_session():
+    """Create a warmed session for the cloud-safe Myntra path.
+    
+    Cookies saved by the Myntra scraper are reused when still valid, so the
+    homepage is only visited when there are none.
+    """
+    session = requests.Session()
+    session.headers = dict(MYNTRA_FALLBACK_HEADERS)
+    
+    saved = get_scraper_pool().cookie_store.load("myntra")
+    if saved:
+        session.cookies.update(saved[0])
+    else:
         try:
+            default_rate_limiter.acquire("https://www.myntra.com/")
             session.get("https://www.myntra.com/", timeout=10)
-            # Add delay to mimic human behavior
-            time.sleep(1 + random.random())
-        except:
+        except requests.exceptions.RequestException:
             pass
+    return session
+
+@st.cache_resource
+def get_myntra_fallback_pool():
+    """Pool of warmed fallback sessions for Myntra, shared by all sessions and reruns.
+    
+    A session whose requests keep failing is closed and replaced by a fresh one.
+    """
+    return SessionPool(new_myntra_fallback_session, max_size=MYNTRA_FALLBACK_SESSIONS, max_failures=3)
+
+def myntra_cloud_safe_scrape(scraper, product_id):
+    """Alternative scraping method optimized for cloud environments"""
+    try:
+        pool = get_myntra_fallback_pool()
+        api_url = f"https://www.myntra.com/gateway/v2/product/{product_id}"
         
-        # Then try to get product, with multiple retries
+        # Try to get product, with multiple retries; each attempt borrows a
+        # pooled session, so a failing one is not reused right away
         for attempt in range(3):
+            session = pool.acquire()
+            healthy = False
             try:
-                api_url = f"https://www.myntra.com/gateway/v2/product/{product_id}"
+                default_rate_limiter.acquire(api_url)
                 response = session.get(api_url, timeout=15)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    healthy = True
+                    data = loads_fields(response.content, "style", STYLE_FIELDS)
                     # Try to use the regular extract function
                     product_info = scraper.extract_product_info(data)
                     if not product_info:
@@ -466,12 +655,10 @@ def myntra_cloud_safe_scrape(scraper, product_id):
                     
                     if product_info:
                         return product_info
-                
-                # If unsuccessful, wait a bit and try again
-                time.sleep(2 + random.random())
             except Exception as e:
-                st.warning(f"Alternative scraping attempt {attempt+1} failed: {str(e)}")
-                time.sleep(2 + random.random())
+                warn_scrape(f"Alternative scraping attempt {attempt+1} for {product_id} failed: {str(e)}")
+            finally:
+                pool.release(session, healthy)
         
         # If all attempts fail, create a minimal placeholder with the ID
         return {
@@ -482,7 +669,7 @@ def myntra_cloud_safe_scrape(scraper, product_id):
             "retrieval_failed": True
         }
     except Exception as e:
-        st.warning(f"Cloud-safe scraping method failed: {str(e)}")
+        warn_scrape(f"Cloud-safe scraping method failed for {product_id}: {str(e)}")
         return None
     
     
@@ -606,7 +793,7 @@ def add_scheduled_scraping():
     
     schedule_button = st.button("Schedule Task")
 
-def add_advanced_export_options(results_df):
+def add_advanced_export_options(results, platform):
     st.subheader("🔄 Advanced Export & Integrations")
     
     export_format = st.selectbox(
@@ -619,6 +806,8 @@ def add_advanced_export_options(results_df):
         import io
         from xlsxwriter import Workbook
         
+        # The full DataFrame is only built for the formats that need one
+        results_df = results.to_dataframe().rename(columns=EXPORT_NAMES.get(platform, {}))
         buffer = io.BytesIO()
         with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
             results_df.to_excel(writer, sheet_name='Products')
@@ -643,34 +832,6 @@ def add_advanced_export_options(results_df):
         sheets_url = st.text_input("Google Sheets URL (must be publicly editable)")
         api_key = st.text_input("Google API Key", type="password")
 
-def create_enhanced_csv_export(results_df):
-    """
-    Creates an enhanced CSV export with all product details including images, brand, price, etc.
-    
-    Args:
-        results_df (pd.DataFrame): DataFrame containing the scraped product information
-        
-    Returns:
-        str: CSV string with all product information
-    """
-    # Make a copy of the DataFrame to avoid modifying the original
-    export_df = results_df.copy()
-    
-    # Handle list columns by joining them with pipe separators
-    for col in export_df.columns:
-        if export_df[col].dtype == 'object':
-            # Convert lists to pipe-separated strings
-            export_df[col] = export_df[col].apply(
-                lambda x: "|".join(str(item) for item in x) if isinstance(x, list) else x
-            )
-    
-    # Add timestamp
-    export_df['export_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Create CSV string
-    csv_str = export_df.to_csv(index=False)
-    return csv_str
-
 def main():
     # Set page config
     st.set_page_config(
@@ -690,12 +851,25 @@ def main():
     if 'use_cache' not in st.session_state:
         st.session_state.use_cache = user_state.get('use_cache', True)
     
-    if 'delay' not in st.session_state:
-        st.session_state.delay = user_state.get('delay', 2)
+    if 'serve_stale' not in st.session_state:
+        st.session_state.serve_stale = user_state.get('serve_stale', False)
+    
+    # Not saved with the user state, each offline re-parse is a deliberate one-off
+    if 'offline_reparse' not in st.session_state:
+        st.session_state.offline_reparse = False
+    
+    if 'rate_limit' not in st.session_state:
+        st.session_state.rate_limit = user_state.get('rate_limit', 0.5)
+    
+    if 'burst' not in st.session_state:
+        st.session_state.burst = user_state.get('burst', 1)
     
     if 'max_retries' not in st.session_state:
         st.session_state.max_retries = user_state.get('max_retries', 2)
     
+    if 'concurrency' not in st.session_state:
+        st.session_state.concurrency = user_state.get('concurrency', 4)
+    
     # Custom CSS for better UI (unchanged)
     st.markdown("""
     <style>
@@ -827,18 +1001,52 @@ def main():
         st.markdown("---")
         st.header("Cache Management")
         
-        # Count total and expired cache files
-        cache_files = list(CACHE_DIR.glob("*.pkl"))
-        cache_size_mb = sum(f.stat().st_size for f in cache_files) / (1024 * 1024)
+        # Item count and size come from the store's stats table
+        cache_stats = get_cache_store().stats()
+        last_maintenance = get_cache_store().last_maintenance()
+        if last_maintenance:
+            maintenance_note = (f"{datetime.fromtimestamp(last_maintenance['at']).strftime('%H:%M')}, "
+                                f"{last_maintenance['expired']} expired, {last_maintenance['evicted']} evicted")
+        else:
+            maintenance_note = "not run yet"
+        cache_size_mb = cache_stats["bytes"] / (1024 * 1024)
+        response_stats = get_response_store().stats()
+        response_size_mb = response_stats["bytes"] / (1024 * 1024)
+        memory_stats = get_cache_store().memory.stats()
+        memory_lookups = memory_stats["hits"] + memory_stats["misses"]
+        memory_hit_rate = memory_stats["hits"] / memory_lookups * 100 if memory_lookups else 0
         
         st.markdown(f"""
         <div class="cache-stats">
             <p><strong>Cache Status:</strong></p>
-            <p>📁 Cached items: {len(cache_files)}</p>
-            <p>💾 Cache size: {cache_size_mb:.2f} MB</p>
+            <p>📁 Cached items: {cache_stats['items']}</p>
+            <p>💾 Cache size: {cache_size_mb + response_size_mb:.2f} / {CACHE_MAX_MB + RESPONSE_CACHE_MAX_MB} MB (products {cache_size_mb:.2f} MB, {cache_stats['raw_bytes'] / (1024 * 1024):.2f} MB uncompressed)</p>
+            <p>🧹 Last maintenance: {maintenance_note}</p>
+            <p>⚡ In memory: {memory_stats['items']} items, {memory_stats['bytes'] / (1024 * 1024):.2f} / {CACHE_MEMORY_MB} MB</p>
+            <p>🗄️ Stored pages: {response_stats['items']} ({response_size_mb:.2f} / {RESPONSE_CACHE_MAX_MB} MB compressed)</p>
+            <p>🎯 Memory hit rate: {memory_hit_rate:.1f}% ({memory_stats['hits']} hits, {memory_stats['misses']} misses)</p>
         </div>
         """, unsafe_allow_html=True)
         
+        with st.expander("Compression by platform"):
+            # Scans every entry, so only on request (expander bodies run on every rerun)
+            if st.button("Compute compression report"):
+                size_report = get_cache_store().size_report()
+                if size_report:
+                    st.dataframe(pd.DataFrame([
+                        {
+                            "Platform": PLATFORMS.get(platform, {}).get("name", platform),
+                            "Items": figures["items"],
+                            "Raw MB": round(figures["raw_bytes"] / (1024 * 1024), 2),
+                            "Stored MB": round(figures["stored_bytes"] / (1024 * 1024), 2),
+                            "Ratio": f"{figures['ratio']:.1f}x",
+                            "Dictionary": "yes" if figures["dictionary"] else "no"
+                        }
+                        for platform, figures in size_report.items()
+                    ]), hide_index=True)
+                else:
+                    st.write("Nothing cached yet.")
+        
         cache_col1, cache_col2 = st.columns(2)
         with cache_col1:
             if st.button("Clear Expired Cache"):
@@ -848,13 +1056,31 @@ def main():
         
         with cache_col2:
             if st.button("Clear All Cache"):
-                for cache_file in cache_files:
-                    cache_file.unlink()
-                st.success(f"Cleared all {len(cache_files)} cached items.")
+                cleared = get_cache_store().clear()
+                st.success(f"Cleared all {cleared} cached items.")
                 st.rerun()
         
         # Use session state for cache checkbox
         use_cache = st.checkbox("Use cached results (faster)", value=st.session_state.use_cache, key="use_cache")
+        serve_stale = st.checkbox(
+            "Serve expired results instantly, refresh in background",
+            value=st.session_state.serve_stale, key="serve_stale", disabled=not use_cache,
+            help=f"Entries up to {CACHE_MAX_STALE_DAYS} days past expiry are returned immediately and re-scraped in the background"
+        )
+        offline_reparse = st.checkbox(
+            "Re-parse stored pages offline",
+            value=st.session_state.offline_reparse, key="offline_reparse",
+            help="Re-run extraction on the pages kept in the response cache without any network access; "
+                 "products whose page was never stored are reported as failed"
+        )
+        refresh_stats = get_refresh_queue().stats()
+        if refresh_stats["pending"] or refresh_stats["refreshed"] or refresh_stats["failed"]:
+            st.caption(f"🔄 Background refresh: {refresh_stats['pending']} pending, "
+                       f"{refresh_stats['refreshed']} refreshed, {refresh_stats['failed']} failed")
+        fallback_stats = get_myntra_fallback_pool().stats()
+        if fallback_stats["created"] or fallback_stats["retired"]:
+            st.caption(f"🔁 Myntra fallback sessions: {fallback_stats['created']} warm, "
+                       f"{fallback_stats['retired']} retired after repeated failures")
         
         with st.expander("About This Tool"):
             st.write("""
@@ -919,8 +1145,10 @@ def main():
                 
                 # Configuration options using session state
                 st.subheader("Scraping Options")
-                delay = st.slider("Delay between requests (seconds)", 1, 10, st.session_state.delay, key="delay")
+                rate_limit = st.slider("Max requests per second", 0.1, 10.0, st.session_state.rate_limit, step=0.1, key="rate_limit")
+                burst = st.number_input("Burst size", 1, 20, st.session_state.burst, key="burst")
                 max_retries = st.number_input("Max retries for failed requests", 0, 5, st.session_state.max_retries, key="max_retries")
+                concurrency = st.slider("Concurrent requests", 1, 16, st.session_state.concurrency, key="concurrency")
             
             # Scrape button with platform color
             scrape_button = st.button(
@@ -930,83 +1158,153 @@ def main():
             )
             
             if scrape_button:
-                # Get appropriate scraper
-                scraper = get_scraper(selected_platform)
+                # Plan the batch before any network work: normalize and dedupe
+                # the IDs and load every cache hit in one pass
+                # An offline re-parse reads every product from its stored page instead
+                serve_expired = serve_stale and use_cache and not offline_reparse
+                product_ids, cached, to_fetch, to_refresh, stale = plan_batch(
+                    selected_platform, df[id_column], use_cache and not offline_reparse, serve_expired
+                )
+                total_products = len(product_ids)
                 
-                if not scraper:
-                    st.error(f"Scraping for {PLATFORMS[selected_platform]['name']} is not yet implemented")
+                if not product_ids:
+                    st.error(f"No product IDs found in column '{id_column}'")
                     return
                 
+                # Expired prices are refreshed in the background when stale
+                # results are served, otherwise before the results are shown
+                refresh_now = [] if serve_expired else to_refresh
+                
+                st.info(f"{len(cached)} cached / {len(to_refresh)} price refresh / {len(to_fetch)} to fetch"
+                        + (f", {len(stale)} of the cached are stale and will refresh in the background" if stale else "")
+                        + (f" ({len(df) - total_products} duplicate or empty IDs skipped)" if len(df) > total_products else ""))
+                
+                # Only set up a scraper when something actually has to be fetched or refreshed
+                scraper = None
+                if to_fetch or to_refresh or stale:
+                    scraper = get_scraper(selected_platform)
+                    
+                    if not scraper:
+                        st.error(f"Scraping for {PLATFORMS[selected_platform]['name']} is not yet implemented")
+                        return
+                    
+                    # Keep raw responses so unchanged pages are revalidated
+                    # with a conditional GET instead of downloaded again
+                    if hasattr(scraper, 'enable_response_cache'):
+                        scraper.enable_response_cache(get_response_store())
+                    elif offline_reparse:
+                        st.error(f"Offline re-parse is not supported for {PLATFORMS[selected_platform]['name']}")
+                        return
+                    
+                    # All workers share one token bucket per host, so this is the
+                    # overall request rate regardless of concurrency
+                    if hasattr(scraper, 'base_url'):
+                        default_rate_limiter.configure(scraper.base_url, rate_limit, burst)
+                
                 # Initialize progress tracking
                 progress_bar = st.progress(0)
                 status_col1, status_col2 = st.columns([3, 1])
                 status_text = status_col1.empty()
                 timer_text = status_col2.empty()
                 
-                # Initialize results container
-                all_results = []
-                failed_ids = []
-                cache_hits = 0
-                
-                # Process each product ID
-                total_products = len(df)
-                start_time = time.time()
-                
-                for i, product_id in enumerate(df[id_column]):
-                    # Update progress
-                    progress = (i) / total_products
-                    progress_bar.progress(progress)
+                # Results are kept column by column as they arrive, and spooled to
+                # disk for the downloads; cache hits are already done
+                remove_old_spools(RESULTS_DIR, RESULTS_MAX_AGE_HOURS * 60 * 60)
+                with ResultSpool(RESULTS_DIR, selected_platform, EXPORT_NAMES.get(selected_platform)) as spool:
+                    all_results = ResultColumns()
+                    for product_id in product_ids:
+                        if product_id in cached:
+                            all_results.append(cached[product_id])
+                            spool.write(cached[product_id])
+                    failed_ids = []
+                    cache_hits = len(all_results)
                     
-                    # Update status
-                    elapsed = time.time() - start_time
-                    estimated_total = (elapsed / (i + 1)) * total_products if i > 0 else 0
-                    remaining = max(0, estimated_total - elapsed)
+                    start_time = time.time()
+                    progress_bar.progress(cache_hits / total_products)
                     
-                    status_text.text(f"Scraping product {i+1} of {total_products}: ID {product_id}")
-                    timer_text.text(f"⏱️ {int(elapsed//60)}m {int(elapsed%60)}s elapsed | ~{int(remaining//60)}m {int(remaining%60)}s remaining")
+                    # Only the misses and expired prices reach the fetch engine,
+                    # results come back in completion order
+                    pending = to_fetch + refresh_now
+                    partial = set(refresh_now)
                     
-                    try:
-                        product_info = None
+                    def scrape_one(product_id):
+                        # Runs on a worker thread; warnings come back with the result
+                        if offline_reparse:
+                            return collect_scrape_warnings(scraper.replay_product, product_id)
+                        if product_id in partial:
+                            return collect_scrape_warnings(refresh_cached, scraper, selected_platform, product_id)
+                        return collect_scrape_warnings(scrape_and_cache, scraper, selected_platform, product_id)
+                    
+                    # Retryable failures go back on a delay queue with their backoff
+                    # deadline while the workers carry on with other products
+                    retry_queue = RetryQueue(
+                        max_retries=max_retries,
+                        budget=max(RETRY_BUDGET_MIN, int(len(pending) * RETRY_BUDGET_RATIO))
+                    )
+                    
+                    engine = FetchEngine({selected_platform: concurrency})
+                    results = engine.scrape(selected_platform, pending, scrape_one, retry_queue)
+                    
+                    for i, (product_id, result, error) in enumerate(results):
+                        product_info, scrape_warnings = result if result else (None, [])
+                        for message in scrape_warnings:
+                            st.warning(message)
                         
-                        # Check cache if enabled
-                        if use_cache:
-                            product_info = get_from_cache(selected_platform, str(product_id))
-                            if product_info:
-                                cache_hits += 1
-                                status_text.text(f"Found in cache: product {i+1} of {total_products}: ID {product_id}")
+                        # Update progress
+                        done = cache_hits + i + 1
+                        progress_bar.progress(done / total_products)
                         
-                        # If not in cache or cache disabled, scrape from website
-                        if not product_info:
-                            # Use safe scraping with fallbacks
-                            product_info = safe_scrape(scraper, str(product_id), selected_platform)
-                            
-                            # Save to cache if successful
-                            if product_info:
-                                # Add to results
-                                all_results.append(product_info)
-                                save_to_cache(selected_platform, str(product_id), product_info)
-                            else:
-                                # Add diagnostic info to the failure record
-                                error_info = {
-                                    "product_id": product_id, 
-                                    "reason": "Failed to extract information",
-                                    "platform": selected_platform
-                                }
-                                failed_ids.append(error_info)
-                        else:
-                            # Add cached data to results
+                        # Update status
+                        elapsed = time.time() - start_time
+                        estimated_total = (elapsed / (i + 1)) * len(pending)
+                        remaining = max(0, estimated_total - elapsed)
+                        
+                        timer_text.text(f"⏱️ {int(elapsed//60)}m {int(elapsed%60)}s elapsed | ~{int(remaining//60)}m {int(remaining%60)}s remaining")
+                        
+                        if error:
+                            retry_state = retry_queue.state(product_id)
+                            failed_ids.append({
+                                "product_id": product_id,
+                                "reason": str(error),
+                                "retries": retry_state.attempts if retry_state else 0
+                            })
+                            continue
+                        
+                        status_text.text(f"Scraped product {i+1} of {len(pending)}: ID {product_id}")
+                        
+                        if product_info:
+                            # Add to results
                             all_results.append(product_info)
+                            spool.write(product_info)
+                        else:
+                            # Add diagnostic info to the failure record
+                            error_info = {
+                                "product_id": product_id, 
+                                "reason": "Failed to extract information",
+                                "platform": selected_platform
+                            }
+                            failed_ids.append(error_info)
                     
-                    except Exception as e:
-                        failed_ids.append({"product_id": product_id, "reason": str(e)})
+                    # Stale results are already in all_results; re-scrape them in the
+                    # background so the next read is fresh
+                    for product_id in stale:
+                        get_refresh_queue().submit(
+                            selected_platform, product_id,
+                            lambda product_id: scrape_and_cache(scraper, selected_platform, product_id)
+                        )
+                    if serve_expired:
+                        for product_id in to_refresh:
+                            get_refresh_queue().submit(
+                                selected_platform, product_id,
+                                lambda product_id: refresh_cached(scraper, selected_platform, product_id)
+                            )
                     
-                    # Add random delay between requests (only if not from cache)
-                    if not (use_cache and get_from_cache(selected_platform, str(product_id))):
-                        time.sleep(delay + random.uniform(0, 1))
-                
-                # Update progress to completion
-                progress_bar.progress(1.0)
-                status_text.text("✅ Scraping completed!")
+                    # Update progress to completion
+                    progress_bar.progress(1.0)
+                    status_text.text("✅ Scraping completed!")
+                    
+                    # Turn the spool into the download files, streaming over it on disk
+                    spool_files = spool.close()
                 
                 # Calculate total time
                 total_time = time.time() - start_time
@@ -1028,6 +1326,18 @@ def main():
                 metrics_col3.metric("Cache Hits", f"{cache_hits}", f"{cache_hits/total_products*100:.1f}%")
                 metrics_col4.metric("Total Time", f"{int(total_time//60)}m {int(total_time%60)}s")
                 
+                retry_stats = retry_queue.stats()
+                if retry_stats["scheduled"] or retry_stats["exhausted"]:
+                    st.caption(f"🔁 Retries: {retry_stats['scheduled']} scheduled, {retry_stats['recovered']} products recovered, "
+                               f"{retry_stats['exhausted']} gave up, {retry_stats['budget_left']} of the run's retry budget left")
+                
+                if stale:
+                    with st.expander(f"View {len(stale)} Stale Results (refreshing in background)"):
+                        st.dataframe(pd.DataFrame([
+                            {"product_id": product_id, "age_days": round(age / (24 * 60 * 60), 1)}
+                            for product_id, age in stale.items()
+                        ]))
+                
                 if failed_ids:
                     with st.expander(f"View {len(failed_ids)} Failed Products"):
                         st.dataframe(pd.DataFrame(failed_ids))
@@ -1036,51 +1346,48 @@ def main():
                 if all_results:
                     st.subheader("📥 Download Results")
                     
-                    # Create JSON string
-                    json_str = json.dumps(all_results, indent=2)
-                    
-                    # Create CSV from the results
-                    results_df = pd.DataFrame(all_results)
-                    
-                    # Display download links
+                    # Download the files written during the run
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.markdown(download_link(json_str, f"{selected_platform}_products.json", "📥 Download JSON"), unsafe_allow_html=True)
+                        file_download_button(spool_files["json"], "📥 Download JSON", f"{selected_platform}_products.json",
+                                             "application/json", "download_json")
                     
                     with col2:
                         # Basic CSV download
-                        csv = results_df.to_csv(index=False)
-                        st.markdown(download_link(csv, f"{selected_platform}_products.csv", "📥 Download CSV"), unsafe_allow_html=True)
+                        file_download_button(spool_files["csv"], "📥 Download CSV", f"{selected_platform}_products.csv",
+                                             "text/csv", "download_csv")
                     
                     with col3:
                         # Enhanced CSV with all details
-                        enhanced_csv = create_enhanced_csv_export(results_df)
-                        st.markdown(download_link(enhanced_csv, f"{selected_platform}_products_detailed.csv", "📥 Download Detailed CSV"), 
-                                    unsafe_allow_html=True)
+                        file_download_button(spool_files["detailed_csv"], "📥 Download Detailed CSV",
+                                             f"{selected_platform}_products_detailed.csv", "text/csv", "download_detailed_csv")
                     
                     # Show sample of data
                     with st.expander("Preview Sample of Scraped Data"):
-                        st.json(all_results[0])
+                        st.json(all_results.row(0))
                         
                     # Data overview
                     st.subheader("Data Overview")
                     
                     try:
+                        # Figures are computed from single columns, no DataFrame of the whole run
+                        columns = all_results.names()
+                        
                         # Display basic stats
-                        if 'mrp' in results_df.columns:
-                            price_stats = results_df['mrp'].describe()
+                        if 'mrp' in columns:
+                            price_stats = all_results.series('mrp').describe()
                             st.write("Price Statistics:")
                             st.dataframe(price_stats)
                         
                         # Most common brands
-                        if 'brand' in results_df.columns:
+                        if 'brand' in columns:
                             st.write("Most Common Brands:")
-                            st.dataframe(results_df['brand'].value_counts().head(10).reset_index().rename(columns={'index': 'Brand', 'brand': 'Count'}))
+                            st.dataframe(all_results.series('brand').value_counts().head(10).reset_index().rename(columns={'index': 'Brand', 'brand': 'Count'}))
                         
                         # Most common categories
-                        if 'category' in results_df.columns:
+                        if 'category' in columns:
                             st.write("Categories Distribution:")
-                            st.dataframe(results_df['category'].value_counts().reset_index().rename(columns={'index': 'Category', 'category': 'Count'}))
+                            st.dataframe(all_results.series('category').value_counts().reset_index().rename(columns={'index': 'Category', 'category': 'Count'}))
                     except Exception as e:
                         st.warning(f"Could not generate statistics: {str(e)}")
                 
@@ -1088,9 +1395,7 @@ def main():
                 
                 # Call advanced export options
                 if all_results:
-                    add_advanced_export_options(results_df)
-                    enhanced_csv = create_enhanced_csv_export(results_df)
-                    st.markdown(download_link(enhanced_csv, f"{selected_platform}_enhanced_products.csv", "📥 Download Enhanced CSV"), unsafe_allow_html=True)
+                    add_advanced_export_options(all_results, selected_platform)
                     
                     # Add export format options
                     export_format_container = st.expander("Export Options")
@@ -1098,8 +1403,11 @@ def main():
                         st.write("Configure your export format:")
                         
                         # Select which columns to include
-                        if not results_df.empty:
-                            available_columns = results_df.columns.tolist()
+                        if len(all_results):
+                            # Offered under the names the platform's exports use
+                            export_names = EXPORT_NAMES.get(selected_platform, {})
+                            field_names = {export_names.get(name, name): name for name in all_results.names()}
+                            available_columns = list(field_names)
                             selected_columns = st.multiselect(
                                 "Select columns to include (leave empty for all columns):",
                                 available_columns,
@@ -1112,12 +1420,10 @@ def main():
                             
                             # Create custom export button
                             if st.button("Generate Custom Export"):
-                                # Create custom DataFrame
-                                custom_df = results_df.copy()
-                                
-                                # Filter columns if specified
-                                if selected_columns:
-                                    custom_df = custom_df[selected_columns]
+                                # Create custom DataFrame, only with the columns asked for
+                                custom_df = all_results.to_dataframe(
+                                    [field_names[column] for column in selected_columns] or None
+                                ).rename(columns=export_names)
                                     
                                 # Handle image columns
                                 if 'images' in custom_df.columns and include_images:
@@ -1150,8 +1456,11 @@ def main():
     current_state = {
         'selected_platform': selected_platform,
         'use_cache': use_cache,
-        'delay': delay if 'delay' in locals() else st.session_state.delay,
+        'serve_stale': serve_stale,
+        'rate_limit': rate_limit if 'rate_limit' in locals() else st.session_state.rate_limit,
+        'burst': burst if 'burst' in locals() else st.session_state.burst,
         'max_retries': max_retries if 'max_retries' in locals() else st.session_state.max_retries,
+        'concurrency': concurrency if 'concurrency' in locals() else st.session_state.concurrency,
         'last_visit': datetime.now().isoformat()
     }
     save_user_state(current_state)
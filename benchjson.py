@@ -0,0 +1,79 @@
+# benchjson.py
+import argparse
+import glob
+import json
+import os
+import time
+
+from fastjson import is_available, loads, loads_fields, JSON_BACKENDS
+from myntrascrapper import MyntraScraper, STYLE_FIELDS
+from responsecache import ResponseStore
+
+
+def load_payloads(db=None, host="www.myntra.com", files=None, limit=None):
+    """Collect recorded API responses from the response store and/or JSON files."""
+    payloads = []
+    if db and os.path.exists(db):
+        store = ResponseStore(db)
+        payloads.extend(body for _, body in store.bodies(host, limit))
+    for pattern in files or []:
+        for path in glob.glob(pattern):
+            with open(path, "rb") as f:
+                payloads.append(f.read())
+    return payloads[:limit] if limit else payloads
+
+
+def time_per_payload(payloads, decode, extract, repeat):
+    """Best-of-repeat seconds per payload for decode + extract."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            extract(decode(payload))
+        elapsed = (time.perf_counter() - start) / len(payloads)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON decoding of recorded Myntra API responses')
+    parser.add_argument('--db', default='cache/responses.db', help='Response store to read payloads from')
+    parser.add_argument('--host', default='www.myntra.com', help='Host whose stored responses are used')
+    parser.add_argument('--files', nargs='*', help='Extra JSON files (glob patterns) to include')
+    parser.add_argument('--limit', type=int, help='Use at most this many payloads')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds, the best is reported (default: 5)')
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.db, args.host, args.files, args.limit)
+    if not payloads:
+        print("No recorded payloads found; scrape some Myntra products with the response cache enabled first")
+        return
+
+    # Extraction uses no instance state, so skip the constructor's homepage visit
+    scraper = MyntraScraper.__new__(MyntraScraper)
+    extract = scraper.extract_product_info
+
+    # Baseline: what requests' response.json() does
+    baseline = time_per_payload(payloads, lambda payload: json.loads(payload.decode("utf-8")), extract, args.repeat)
+    expected = [extract(json.loads(payload)) for payload in payloads]
+    size = sum(len(payload) for payload in payloads) / len(payloads)
+    print(f"{len(payloads)} payloads, {size / 1024:.1f} KB on average")
+    print(f"{'backend':<10} {'mode':<10} {'us/product':>12} {'speedup':>8}  matches")
+    print(f"{'json':<10} {'baseline':<10} {baseline * 1e6:>12.1f} {1.0:>7.2f}x")
+
+    for backend in JSON_BACKENDS:
+        if not is_available(backend):
+            print(f"{backend:<10} (not installed)")
+            continue
+        modes = [
+            ("full", lambda payload, backend=backend: loads(payload, backend)),
+            ("selective", lambda payload, backend=backend: loads_fields(payload, "style", STYLE_FIELDS, backend)),
+        ]
+        for mode, decode in modes:
+            seconds = time_per_payload(payloads, decode, extract, args.repeat)
+            matches = sum(1 for payload, want in zip(payloads, expected) if extract(decode(payload)) == want)
+            print(f"{backend:<10} {mode:<10} {seconds * 1e6:>12.1f} {baseline / seconds:>7.2f}x  {matches}/{len(payloads)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# blobstore.py
+import hashlib
+import logging
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 6
+
+# Dictionary training settings, per namespace (platform or host)
+DICT_SIZE = 112 * 1024
+DICT_MIN_SAMPLES = 100
+DICT_MAX_SAMPLES = 2000
+
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+
+class BlobStore:
+    """Compressed, content-addressed payloads inside an existing SQLite database.
+
+    Payloads are keyed by the sha256 of their raw bytes, so identical
+    payloads are stored once no matter how many rows point at them. Each
+    namespace (a platform or a host) gets its own zstd dictionary once it has
+    enough samples; pages built from the same templates then compress to a
+    fraction of what they would alone. Without the zstandard package,
+    payloads are deflated with zlib.
+
+    The owning store keeps the rows that reference blobs by hash and calls
+    ``delete_orphans`` after removing them. Training reads and recompresses a
+    whole namespace, so it never runs on the write path: the owning store's
+    maintenance step calls ``train_pending``.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY,
+        namespace TEXT NOT NULL,
+        codec TEXT NOT NULL,
+        dict_id INTEGER,
+        raw_size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_blobs_namespace ON blobs (namespace);
+
+    CREATE TABLE IF NOT EXISTS blob_dictionaries (
+        dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        namespace TEXT NOT NULL,
+        data BLOB NOT NULL,
+        created_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, connect, referenced_by):
+        """
+        Attach the blob tables to a database.
+
+        Args:
+            connect (callable): Returns the calling thread's sqlite3 connection
+            referenced_by (list): (table, column) pairs holding blob hashes,
+                used to find blobs nothing points at any more
+        """
+        self.connect = connect
+        self.referenced_by = list(referenced_by)
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.dictionaries = {}  # dict_id -> raw dictionary bytes
+        self.active = {}  # namespace -> dict_id used for new payloads
+        self.attempts = {}  # namespace -> sample count at the last failed training
+        conn = connect()
+        with conn:
+            conn.executescript(self.SCHEMA)
+        for dict_id, namespace, data in conn.execute(
+            "SELECT dict_id, namespace, data FROM blob_dictionaries ORDER BY dict_id"
+        ):
+            self.dictionaries[dict_id] = data
+            self.active[namespace] = dict_id
+
+    @staticmethod
+    def hash(raw):
+        return hashlib.sha256(raw).hexdigest()
+
+    def _zstd(self, kind, dict_id):
+        """Return this thread's zstd (de)compressor for a dictionary (zstd objects are not thread-safe)."""
+        cache = self.local.__dict__.setdefault("zstd", {})
+        key = (kind, dict_id)
+        codec = cache.get(key)
+        if codec is None:
+            dictionary = None
+            if dict_id is not None:
+                if dict_id not in self.dictionaries:
+                    # Trained by another process sharing the database
+                    row = self.connect().execute(
+                        "SELECT data FROM blob_dictionaries WHERE dict_id = ?", (dict_id,)
+                    ).fetchone()
+                    self.dictionaries[dict_id] = row[0]
+                dictionary = zstandard.ZstdCompressionDict(self.dictionaries[dict_id])
+            if kind == "c":
+                codec = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary)
+            else:
+                codec = zstandard.ZstdDecompressor(dict_data=dictionary)
+            cache[key] = codec
+        return codec
+
+    def encode(self, namespace, raw):
+        """Compress a payload.
+
+        Returns:
+            tuple: (codec, dict_id, data)
+        """
+        if HAS_ZSTD:
+            dict_id = self.active.get(namespace)
+            return "zstd", dict_id, self._zstd("c", dict_id).compress(raw)
+        return "zlib", None, zlib.compress(raw, ZLIB_LEVEL)
+
+    def decode(self, codec, dict_id, data):
+        """Decompress a payload produced by encode."""
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if codec == "zstd":
+            if not HAS_ZSTD:
+                raise RuntimeError("zstandard is required to read this cache entry")
+            return self._zstd("d", dict_id).decompress(data)
+        if codec == "raw":
+            return bytes(data)
+        raise ValueError(f"Unknown blob codec: {codec}")
+
+    def put(self, conn, namespace, raw):
+        """Store a payload inside the caller's transaction and return its hash."""
+        digest = self.hash(raw)
+        if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+            codec, dict_id, data = self.encode(namespace, raw)
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, namespace, codec, dict_id, raw_size, data) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, namespace, codec, dict_id, len(raw), data)
+            )
+        return digest
+
+    def delete_orphans(self, conn, hashes=None):
+        """Delete blobs no row references any more, inside the caller's transaction.
+
+        Args:
+            conn (sqlite3.Connection): Connection holding the transaction
+            hashes (iterable): Only consider these blobs (e.g. the ones just
+                replaced); None checks every blob
+
+        Returns:
+            int: Number of deleted blobs
+        """
+        conditions = " AND ".join(
+            f"NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.{column} = blobs.hash)"
+            for table, column in self.referenced_by
+        )
+        if hashes is None:
+            return conn.execute(f"DELETE FROM blobs WHERE {conditions}").rowcount
+        hashes = list(set(hashes))
+        deleted = 0
+        for start in range(0, len(hashes), _BATCH_SIZE):
+            batch = hashes[start:start + _BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            deleted += conn.execute(
+                f"DELETE FROM blobs WHERE hash IN ({placeholders}) AND {conditions}", batch
+            ).rowcount
+        return deleted
+
+    def maybe_train(self, namespace):
+        """Train the namespace's dictionary once it has enough samples and none exists yet."""
+        if not HAS_ZSTD or namespace in self.active:
+            return None
+        with self.lock:
+            if namespace in self.active:
+                return None
+            count = self.connect().execute("SELECT COUNT(*) FROM blobs WHERE namespace = ?", (namespace,)).fetchone()[0]
+            # After a failed attempt, wait until the sample set has doubled
+            if count < max(DICT_MIN_SAMPLES, 2 * self.attempts.get(namespace, 0)):
+                return None
+            dict_id = self.train(namespace)
+            if dict_id is None:
+                self.attempts[namespace] = count
+            return dict_id
+
+    def train_pending(self):
+        """Train a dictionary for every namespace that has enough samples and none yet.
+
+        Returns:
+            list: Ids of the dictionaries trained
+        """
+        if not HAS_ZSTD:
+            return []
+        namespaces = [row[0] for row in self.connect().execute("SELECT DISTINCT namespace FROM blobs")]
+        trained = []
+        for namespace in namespaces:
+            dict_id = self.maybe_train(namespace)
+            if dict_id is not None:
+                trained.append(dict_id)
+        return trained
+
+    def train(self, namespace):
+        """Train a zstd dictionary from a namespace's payloads and recompress them with it.
+
+        Returns:
+            int: The new dictionary's id, or None if training was not possible
+        """
+        if not HAS_ZSTD:
+            return None
+        with self.lock:
+            conn = self.connect()
+            rows = conn.execute(
+                "SELECT hash, codec, dict_id, data FROM blobs WHERE namespace = ? ORDER BY RANDOM() LIMIT ?",
+                (namespace, DICT_MAX_SAMPLES)
+            ).fetchall()
+            samples = [self.decode(codec, dict_id, data) for _, codec, dict_id, data in rows]
+            try:
+                dictionary = zstandard.train_dictionary(DICT_SIZE, samples)
+            except Exception as e:
+                logger.warning(f"Could not train a compression dictionary for {namespace}: {e}")
+                return None
+
+            with conn:
+                dict_id = conn.execute(
+                    "INSERT INTO blob_dictionaries (namespace, data, created_at) VALUES (?, ?, ?)",
+                    (namespace, dictionary.as_bytes(), time.time())
+                ).lastrowid
+            self.dictionaries[dict_id] = dictionary.as_bytes()
+            self.active[namespace] = dict_id
+
+        recompressed = self.recompress(namespace)
+        logger.info(f"Trained compression dictionary {dict_id} for {namespace} from {len(samples)} samples, "
+                    f"recompressed {recompressed} entries")
+        return dict_id
+
+    def recompress(self, namespace):
+        """Re-encode a namespace's payloads that do not use its current dictionary.
+
+        Returns:
+            int: Number of re-encoded payloads
+        """
+        if not HAS_ZSTD:
+            return 0
+        conn = self.connect()
+        target = self.active.get(namespace)
+        total = 0
+        while True:
+            rows = conn.execute(
+                "SELECT hash, codec, dict_id, data FROM blobs WHERE namespace = ? AND "
+                "(codec != 'zstd' OR dict_id IS NOT ?) LIMIT ?",
+                (namespace, target, _BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                return total
+            updates = []
+            for digest, codec, dict_id, data in rows:
+                new_codec, new_dict_id, new_data = self.encode(namespace, self.decode(codec, dict_id, data))
+                updates.append((new_codec, new_dict_id, new_data, digest))
+            with conn:
+                conn.executemany("UPDATE blobs SET codec = ?, dict_id = ?, data = ? WHERE hash = ?", updates)
+            total += len(updates)
+
+    def report(self):
+        """Compression figures per namespace.
+
+        Returns:
+            dict: namespace -> {"blobs", "raw_bytes", "stored_bytes", "ratio", "dictionary"}
+        """
+        report = {}
+        for namespace, blobs, raw_bytes, stored_bytes in self.connect().execute(
+            "SELECT namespace, COUNT(*), SUM(raw_size), SUM(LENGTH(data)) FROM blobs GROUP BY namespace"
+        ):
+            report[namespace] = {
+                "blobs": blobs,
+                "raw_bytes": raw_bytes,
+                "stored_bytes": stored_bytes,
+                "ratio": raw_bytes / stored_bytes if stored_bytes else 0,
+                "dictionary": namespace in self.active,
+            }
+        return report
@@ -0,0 +1,99 @@
+# blockdetect.py
+
+# What a response turned out to be
+PRODUCT = "product"
+CAPTCHA = "captcha"
+ROBOT_CHECK = "robot_check"
+BLOCKED = "blocked"
+OTHER = "other"
+
+# Bytes read before deciding; block pages are small and say what they are early
+HEAD_BYTES = 16 * 1024
+CHUNK_SIZE = 8 * 1024
+
+
+class BlockDetector:
+    """Classify a streamed response from its status, headers and first few KB.
+
+    Block pages are recognised before the rest of the body is downloaded,
+    so they cost one small read instead of a full transfer and decode.
+    Markers are matched case-sensitively against raw bytes, which avoids
+    decoding and lowercasing the page, and avoids false positives from
+    product pages that merely mention a word like "captcha".
+    """
+
+    def __init__(self, captcha_markers=(), robot_markers=(), block_statuses=(403, 429, 503), head_bytes=HEAD_BYTES):
+        """
+        Create a detector.
+
+        Args:
+            captcha_markers (iterable): Byte strings only found on solvable CAPTCHA pages
+            robot_markers (iterable): Byte strings only found on automated-access block pages
+            block_statuses (iterable): Statuses the site uses to block or throttle
+            head_bytes (int): How much of the body to read before deciding
+        """
+        self.captcha_markers = tuple(captcha_markers)
+        self.robot_markers = tuple(robot_markers)
+        self.block_statuses = frozenset(block_statuses)
+        self.head_bytes = head_bytes
+
+    def classify(self, status, headers, head):
+        """Classify a response from its status, headers and the start of its body.
+
+        Args:
+            status (int): HTTP status
+            headers (Mapping): Response headers
+            head (bytes): First bytes of the (decoded) body
+
+        Returns:
+            str: PRODUCT, CAPTCHA, ROBOT_CHECK, BLOCKED or OTHER
+        """
+        # Block pages often come with a block status, so look at the markers first
+        if any(marker in head for marker in self.captcha_markers):
+            return CAPTCHA
+        if any(marker in head for marker in self.robot_markers):
+            return ROBOT_CHECK
+        if status in self.block_statuses:
+            return BLOCKED
+        if status != 200:
+            return OTHER
+        return PRODUCT
+
+    def read(self, response):
+        """Classify a response and read its body only if it is a product page.
+
+        The response should come from a request made with ``stream=True``;
+        a response whose body has already been read is classified from it.
+        For anything but a product page the connection is closed after the
+        head, and ``response.content`` holds just the head (enough for a
+        CAPTCHA form).
+
+        Args:
+            response (requests.Response): The response
+
+        Returns:
+            str: The classification (see classify)
+        """
+        if response._content_consumed:
+            return self.classify(response.status_code, response.headers, response.content[:self.head_bytes])
+
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        head = bytearray()
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= self.head_bytes:
+                break
+        head = bytes(head)
+
+        kind = self.classify(response.status_code, response.headers, head)
+        if kind != PRODUCT:
+            # Abort the download, the rest of a block page is of no use
+            # (closing before the body counts as read drops the connection)
+            response.close()
+            response._content = head
+            response._content_consumed = True
+            return kind
+
+        response._content = head + b"".join(chunks)
+        response._content_consumed = True
+        return kind
@@ -0,0 +1,675 @@
+# cachestore.py
+import hashlib
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from blobstore import BlobStore
+from fieldgroups import merge_volatile
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+
+class MemoryCache:
+    """Thread-safe LRU of decoded products bounded by total size in bytes.
+
+    Sizes are the pickled sizes reported by the disk store, so the bound
+    tracks the same numbers the sidebar shows. Cached values are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Create the cache.
+
+        Args:
+            max_bytes (int): Total size budget; least recently used entries are evicted past it
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size, fetched_at, volatile_at)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, cutoff=None):
+        """Return (value, fetched_at, volatile_at) on a hit or None on a miss.
+
+        Entries fetched before cutoff (a timestamp) count as misses.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or (cutoff is not None and entry[2] < cutoff):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[2], entry[3]
+
+    def put(self, key, value, size, fetched_at, volatile_at=None):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            # A single entry larger than the whole budget is not worth keeping
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size, fetched_at, fetched_at if volatile_at is None else volatile_at)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                evicted_size = self.entries.popitem(last=False)[1][1]
+                self.bytes -= evicted_size
+
+    def discard(self, key):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+    def discard_older(self, cutoff):
+        """Drop every entry fetched before cutoff."""
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry[2] < cutoff]:
+                self.bytes -= self.entries.pop(key)[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "items": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class CacheStore:
+    """Product cache kept in a single SQLite database in WAL mode.
+
+    Entries are keyed on (platform, product_id) with their fetch time; the
+    pickled record itself lives in a BlobStore, compressed with the
+    platform's dictionary and shared by every entry with identical content.
+    Fields are split into a static and a volatile group (see
+    fieldgroups.py): ``fetched_at`` is when the whole record was scraped,
+    ``volatile_at`` when its prices and stock were last refreshed by
+    ``update_volatile``. An index on ``fetched_at`` keeps expiry cheap and triggers maintain a
+    one-row stats table, so item count and size are read without scanning
+    anything.
+
+    An optional MemoryCache in front of the database serves repeated lookups
+    without touching disk; every write, expiry and clear goes through both
+    tiers so they never disagree.
+
+    With max_bytes set, ``maintain`` (run periodically by
+    ``start_maintenance``) keeps the stored size under budget by evicting the
+    least recently or least frequently used entries, and compacts the file
+    a few pages at a time.
+    """
+
+    # Entries evicted per statement, so one maintenance step never holds the write lock for long
+    EVICTION_BATCH = 200
+    # Free pages returned to the file system per maintenance step
+    VACUUM_PAGES = 256
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS products (
+        platform TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        blob_hash TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        fetched_at REAL NOT NULL,
+        accessed_at REAL NOT NULL DEFAULT 0,
+        hits INTEGER NOT NULL DEFAULT 0,
+        volatile_at REAL,  -- NULL means the volatile fields are as old as the record
+        PRIMARY KEY (platform, product_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_products_fetched_at ON products (fetched_at);
+    CREATE INDEX IF NOT EXISTS idx_products_blob_hash ON products (blob_hash);
+    CREATE INDEX IF NOT EXISTS idx_products_lru ON products (accessed_at);
+    CREATE INDEX IF NOT EXISTS idx_products_lfu ON products (hits, accessed_at);
+
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        items INTEGER NOT NULL,
+        raw_bytes INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO cache_stats (id, items, raw_bytes, bytes)
+        SELECT 0, (SELECT COUNT(*) FROM products), (SELECT COALESCE(SUM(size), 0) FROM products),
+            (SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs);
+
+    CREATE TRIGGER IF NOT EXISTS products_stats_insert AFTER INSERT ON products BEGIN
+        UPDATE cache_stats SET items = items + 1, raw_bytes = raw_bytes + NEW.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS products_stats_delete AFTER DELETE ON products BEGIN
+        UPDATE cache_stats SET items = items - 1, raw_bytes = raw_bytes - OLD.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS products_stats_update AFTER UPDATE OF size ON products BEGIN
+        UPDATE cache_stats SET raw_bytes = raw_bytes - OLD.size + NEW.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS blobs_stats_insert AFTER INSERT ON blobs BEGIN
+        UPDATE cache_stats SET bytes = bytes + LENGTH(NEW.data) WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS blobs_stats_delete AFTER DELETE ON blobs BEGIN
+        UPDATE cache_stats SET bytes = bytes - LENGTH(OLD.data) WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS blobs_stats_update AFTER UPDATE OF data ON blobs BEGIN
+        UPDATE cache_stats SET bytes = bytes - LENGTH(OLD.data) + LENGTH(NEW.data) WHERE id = 0;
+    END;
+
+    CREATE TABLE IF NOT EXISTS cache_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, path, memory_bytes=0, max_bytes=None, eviction="lru"):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path (str or Path): Database file
+            memory_bytes (int): Size of the in-memory LRU tier (0 disables it)
+            max_bytes (int): Budget for stored (compressed) bytes; None means unbounded
+            eviction (str): "lru" (least recently used) or "lfu" (least frequently used)
+        """
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.path = str(path)
+        self.local = threading.local()
+        self.memory = MemoryCache(memory_bytes) if memory_bytes else None
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        # Reads are recorded here and written in batches by maintain()
+        self.accesses = {}
+        self.accesses_lock = threading.Lock()
+        self.maintenance_thread = None
+        self.maintenance_stop = threading.Event()
+        conn = self._connect()
+        self.blobs = BlobStore(self._connect, [("products", "blob_hash")])
+        with conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # Lets compact() shrink the file; only takes effect on a new database,
+            # so it has to come before WAL mode writes the header
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    @staticmethod
+    def _cutoff(max_age):
+        return None if max_age is None else time.time() - max_age
+
+    def get(self, platform, product_id, max_age=None):
+        """Return a cached product, or None if missing or older than max_age seconds."""
+        return self.get_many(platform, [product_id], max_age).get(str(product_id))
+
+    def get_many(self, platform, product_ids, max_age=None):
+        """Load many cached products in a few queries.
+
+        Args:
+            platform (str): Platform key
+            product_ids (iterable): Product IDs
+            max_age (float): Optional maximum age in seconds
+
+        Returns:
+            dict: product_id (str) -> product data for every fresh hit
+        """
+        entries = self.get_entries(platform, product_ids, max_age)
+        return {product_id: entry[0] for product_id, entry in entries.items()}
+
+    def get_with_stale(self, platform, product_ids, max_age, max_stale=None):
+        """Load products, also returning expired ones for stale-while-revalidate.
+
+        Args:
+            platform (str): Platform key
+            product_ids (iterable): Product IDs
+            max_age (float): Age in seconds after which an entry is stale
+            max_stale (float): How long past max_age a stale entry is still
+                served (None serves any age)
+
+        Returns:
+            tuple: (fresh, stale) where fresh maps product_id -> data and
+                stale maps product_id -> (data, age in seconds)
+        """
+        fresh, _, stale = self.classify(platform, product_ids, max_age, max_stale=max_stale)
+        return fresh, stale
+
+    def classify(self, platform, product_ids, max_age, volatile_max_age=None, max_stale=None):
+        """Load products and sort them by which field group has expired.
+
+        Args:
+            platform (str): Platform key
+            product_ids (iterable): Product IDs
+            max_age (float): TTL of the record as a whole (the static fields)
+            volatile_max_age (float): TTL of the volatile fields (None: same as max_age)
+            max_stale (float): How long past max_age an entry is still
+                returned as stale (None returns any age)
+
+        Returns:
+            tuple: (fresh, volatile_expired, stale) where fresh and
+                volatile_expired map product_id -> data (the latter only
+                need their volatile fields refreshed) and stale maps
+                product_id -> (data, age in seconds)
+        """
+        limit = None if max_stale is None else max_age + max_stale
+        now = time.time()
+        fresh = {}
+        volatile_expired = {}
+        stale = {}
+        for product_id, (data, fetched_at, volatile_at) in self.get_entries(platform, product_ids, limit).items():
+            age = now - fetched_at
+            if age >= max_age:
+                stale[product_id] = (data, age)
+            elif volatile_max_age is not None and now - volatile_at >= volatile_max_age:
+                volatile_expired[product_id] = data
+            else:
+                fresh[product_id] = data
+        return fresh, volatile_expired, stale
+
+    def get_entries(self, platform, product_ids, max_age=None):
+        """Load cached products with their fetch times.
+
+        Returns:
+            dict: product_id (str) -> (data, fetched_at, volatile_at) for every
+                hit no older than max_age
+        """
+        product_ids = [str(product_id) for product_id in product_ids]
+        cutoff = self._cutoff(max_age)
+        results = {}
+
+        if self.memory is not None:
+            missing = []
+            for product_id in product_ids:
+                entry = self.memory.get((platform, product_id), cutoff)
+                if entry is not None:
+                    results[product_id] = entry
+                else:
+                    missing.append(product_id)
+            self._record_access(platform, results)
+            product_ids = missing
+
+        conn = self._connect()
+        for start in range(0, len(product_ids), _BATCH_SIZE):
+            batch = product_ids[start:start + _BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            query = (
+                "SELECT p.product_id, p.size, p.fetched_at, COALESCE(p.volatile_at, p.fetched_at), "
+                "b.codec, b.dict_id, b.data "
+                "FROM products p JOIN blobs b ON b.hash = p.blob_hash "
+                f"WHERE p.platform = ? AND p.product_id IN ({placeholders})"
+            )
+            params = [platform] + batch
+            if cutoff is not None:
+                query += " AND p.fetched_at >= ?"
+                params.append(cutoff)
+            for product_id, size, fetched_at, volatile_at, codec, dict_id, blob in conn.execute(query, params):
+                try:
+                    data = pickle.loads(self.blobs.decode(codec, dict_id, blob))
+                except Exception as e:
+                    logger.error(f"Error loading cache entry {platform}/{product_id}: {e}")
+                    continue
+                results[product_id] = (data, fetched_at, volatile_at)
+                if self.memory is not None:
+                    self.memory.put((platform, product_id), data, size, fetched_at, volatile_at)
+                self._record_access(platform, (product_id,))
+        return results
+
+    def _record_access(self, platform, product_ids):
+        """Count a read for eviction; the counts are written by maintain()."""
+        if not product_ids:
+            return
+        with self.accesses_lock:
+            for product_id in product_ids:
+                key = (platform, product_id)
+                self.accesses[key] = self.accesses.get(key, 0) + 1
+
+    def put(self, platform, product_id, data, fetched_at=None):
+        """Store one product."""
+        self.put_many(platform, [(product_id, data)], fetched_at)
+
+    def put_many(self, platform, items, fetched_at=None):
+        """Store many products in one transaction.
+
+        Args:
+            platform (str): Platform key
+            items (iterable): (product_id, data) pairs
+            fetched_at (float): Fetch time (defaults to now)
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        entries = []
+        for product_id, data in items:
+            entries.append((str(product_id), data, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+        if not entries:
+            return
+        conn = self._connect()
+        with conn:
+            replaced = self._blob_hashes(conn, platform, [entry[0] for entry in entries])
+            rows = [(platform, product_id, self.blobs.put(conn, platform, raw), len(raw), fetched_at, time.time())
+                    for product_id, _, raw in entries]
+            conn.executemany("""
+                INSERT INTO products (platform, product_id, blob_hash, size, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (platform, product_id) DO UPDATE SET
+                    blob_hash = excluded.blob_hash, size = excluded.size, fetched_at = excluded.fetched_at,
+                    accessed_at = excluded.accessed_at, volatile_at = NULL
+            """, rows)
+            # Replaced records may have left their old payload unreferenced
+            self.blobs.delete_orphans(conn, replaced)
+        if self.memory is not None:
+            for product_id, data, raw in entries:
+                self.memory.put((platform, product_id), data, len(raw), fetched_at)
+
+    def update_volatile(self, platform, updates, refreshed_at=None):
+        """Merge freshly scraped volatile fields into cached records.
+
+        The static fields and ``fetched_at`` are left alone, so the record
+        keeps its full-refresh schedule while prices and stock restart their
+        shorter TTL.
+
+        Args:
+            platform (str): Platform key
+            updates (dict): product_id -> volatile fields (see fieldgroups.volatile_fields)
+            refreshed_at (float): Refresh time (defaults to now)
+
+        Returns:
+            dict: product_id -> merged record, for every product that was cached
+        """
+        refreshed_at = time.time() if refreshed_at is None else refreshed_at
+        updates = {str(product_id): fields for product_id, fields in updates.items()}
+        current = self.get_entries(platform, list(updates))
+        merged = {}
+        entries = []
+        for product_id, (data, fetched_at, _) in current.items():
+            record = merge_volatile(data, updates[product_id])
+            merged[product_id] = record
+            entries.append((product_id, record, fetched_at, pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)))
+        if not entries:
+            return merged
+
+        conn = self._connect()
+        with conn:
+            replaced = self._blob_hashes(conn, platform, [entry[0] for entry in entries])
+            conn.executemany(
+                "UPDATE products SET blob_hash = ?, size = ?, volatile_at = ? WHERE platform = ? AND product_id = ?",
+                [(self.blobs.put(conn, platform, raw), len(raw), refreshed_at, platform, product_id)
+                 for product_id, _, _, raw in entries]
+            )
+            self.blobs.delete_orphans(conn, replaced)
+        if self.memory is not None:
+            for product_id, record, fetched_at, raw in entries:
+                self.memory.put((platform, product_id), record, len(raw), fetched_at, refreshed_at)
+        return merged
+
+    @staticmethod
+    def _blob_hashes(conn, platform, product_ids):
+        """Blob hashes currently referenced by the given entries."""
+        hashes = []
+        for start in range(0, len(product_ids), _BATCH_SIZE):
+            batch = product_ids[start:start + _BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            hashes.extend(row[0] for row in conn.execute(
+                f"SELECT blob_hash FROM products WHERE platform = ? AND product_id IN ({placeholders})",
+                [platform] + batch
+            ))
+        return hashes
+
+    def delete_expired(self, max_age):
+        """Delete entries older than max_age seconds.
+
+        Returns:
+            int: Number of deleted entries
+        """
+        cutoff = self._cutoff(max_age)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM products WHERE fetched_at < ?", (cutoff,))
+            self.blobs.delete_orphans(conn)
+        if self.memory is not None:
+            self.memory.discard_older(cutoff)
+        return cursor.rowcount
+
+    def clear(self):
+        """Delete every entry.
+
+        Returns:
+            int: Number of deleted entries
+        """
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM products")
+            self.blobs.delete_orphans(conn)
+        if self.memory is not None:
+            self.memory.clear()
+        return cursor.rowcount
+
+    def flush_accesses(self):
+        """Write the read counts recorded since the last flush."""
+        with self.accesses_lock:
+            accesses, self.accesses = self.accesses, {}
+        if not accesses:
+            return
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE products SET accessed_at = ?, hits = hits + ? WHERE platform = ? AND product_id = ?",
+                [(now, count, platform, product_id) for (platform, product_id), count in accesses.items()]
+            )
+
+    def evict(self, max_bytes=None):
+        """Evict entries until the stored size fits the budget.
+
+        Args:
+            max_bytes (int): Budget in stored bytes (defaults to the store's max_bytes)
+
+        Returns:
+            int: Number of evicted entries
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return 0
+        order = "p.accessed_at" if self.eviction == "lru" else "p.hits, p.accessed_at"
+        conn = self._connect()
+        evicted = 0
+        while True:
+            excess = self.stats()["bytes"] - max_bytes
+            if excess <= 0:
+                break
+            with conn:
+                candidates = conn.execute(
+                    "SELECT p.platform, p.product_id, p.blob_hash, LENGTH(b.data) "
+                    f"FROM products p JOIN blobs b ON b.hash = p.blob_hash ORDER BY {order} LIMIT ?",
+                    (self.EVICTION_BATCH,)
+                ).fetchall()
+                if not candidates:
+                    break
+                # Take just enough entries to cover the excess
+                victims = []
+                for platform, product_id, blob_hash, stored_size in candidates:
+                    victims.append((platform, product_id, blob_hash))
+                    excess -= stored_size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM products WHERE platform = ? AND product_id = ?",
+                                 [(platform, product_id) for platform, product_id, _ in victims])
+                self.blobs.delete_orphans(conn, [blob_hash for _, _, blob_hash in victims])
+            if self.memory is not None:
+                for platform, product_id, _ in victims:
+                    self.memory.discard((platform, product_id))
+            evicted += len(victims)
+        return evicted
+
+    def compact(self, pages=None):
+        """Remove unreferenced blobs and return up to `pages` free pages to the file system.
+
+        Returns:
+            int: Free pages left in the file afterwards
+        """
+        conn = self._connect()
+        with conn:
+            self.blobs.delete_orphans(conn)
+        # executescript steps the pragma to completion (execute stops after the first page)
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages or self.VACUUM_PAGES)});")
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def maintain(self, max_age=None):
+        """Run one maintenance step: flush read counts, expire, evict to budget, train dictionaries and compact.
+
+        Args:
+            max_age (float): Delete entries older than this many seconds (None keeps them)
+
+        Returns:
+            dict: What the step did, also kept in the manifest as "last_maintenance"
+        """
+        started = time.time()
+        self.flush_accesses()
+        expired = self.delete_expired(max_age) if max_age is not None else 0
+        evicted = self.evict()
+        trained = self.blobs.train_pending()
+        free_pages = self.compact()
+        report = {
+            "at": started,
+            "expired": expired,
+            "evicted": evicted,
+            "trained": len(trained),
+            "free_pages": free_pages,
+            "seconds": round(time.time() - started, 3),
+        }
+        self.set_meta("last_maintenance", json.dumps(report))
+        return report
+
+    def start_maintenance(self, interval=300, max_age=None):
+        """Run maintain() every `interval` seconds on a daemon thread (once per store)."""
+        if self.maintenance_thread is not None:
+            return
+
+        def run():
+            while not self.maintenance_stop.wait(interval):
+                try:
+                    self.maintain(max_age)
+                except Exception as e:
+                    logger.error(f"Cache maintenance failed: {e}")
+
+        self.maintenance_thread = threading.Thread(target=run, name="cache-maintenance", daemon=True)
+        self.maintenance_thread.start()
+
+    def stop_maintenance(self):
+        self.maintenance_stop.set()
+
+    def last_maintenance(self):
+        """Return the report of the last maintenance step, or None."""
+        value = self.get_meta("last_maintenance")
+        return json.loads(value) if value else None
+
+    def stats(self):
+        """Return {"items", "raw_bytes", "bytes"} from the stats table (bytes are stored, compressed bytes)."""
+        row = self._connect().execute("SELECT items, raw_bytes, bytes FROM cache_stats WHERE id = 0").fetchone()
+        if not row:
+            return {"items": 0, "raw_bytes": 0, "bytes": 0}
+        return {"items": row[0], "raw_bytes": row[1], "bytes": row[2]}
+
+    def size_report(self):
+        """Compression figures per platform.
+
+        Returns:
+            dict: platform -> {"items", "raw_bytes", "blobs", "stored_bytes",
+                "ratio", "dictionary"}, where raw_bytes counts every entry and
+                ratio includes the savings from deduplication
+        """
+        report = {}
+        blobs = self.blobs.report()
+        for platform, items, raw_bytes in self._connect().execute(
+            "SELECT platform, COUNT(*), SUM(size) FROM products GROUP BY platform"
+        ):
+            stored = blobs.get(platform, {})
+            stored_bytes = stored.get("stored_bytes", 0)
+            report[platform] = {
+                "items": items,
+                "raw_bytes": raw_bytes,
+                "blobs": stored.get("blobs", 0),
+                "stored_bytes": stored_bytes,
+                "ratio": raw_bytes / stored_bytes if stored_bytes else 0,
+                "dictionary": stored.get("dictionary", False),
+            }
+        return report
+
+    def get_meta(self, key, default=None):
+        row = self._connect().execute("SELECT value FROM cache_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def migrate_pickle_cache(store, cache_dir, platforms):
+    """Move the old one-file-per-product pickle cache into the store.
+
+    Old files are named md5("<platform>_<product_id>"), so each file's
+    platform is recovered by matching that hash against the product_id stored
+    inside it. The files are left where they are: they are tracked in the
+    repository and shipped with the image, so the migration only reads
+    them. It is recorded in the store and never runs twice; the files
+    themselves are to be removed from the repository once the store has
+    shipped.
+
+    Args:
+        store (CacheStore): Destination store
+        cache_dir (Path): Directory holding the *.pkl files
+        platforms (iterable): Platform keys the old cache may contain
+
+    Returns:
+        tuple: (migrated, skipped) file counts
+    """
+    if store.get_meta("pickle_migrated"):
+        return 0, 0
+
+    migrated = 0
+    skipped = 0
+    rows = {}
+    for cache_file in Path(cache_dir).glob("*.pkl"):
+        try:
+            with open(cache_file, 'rb') as f:
+                data = pickle.load(f)
+            product_id = str(data.get('product_id'))
+        except Exception as e:
+            logger.warning(f"Skipping unreadable cache file {cache_file.name}: {e}")
+            skipped += 1
+            continue
+
+        for platform in platforms:
+            if hashlib.md5(f"{platform}_{product_id}".encode()).hexdigest() == cache_file.stem:
+                rows.setdefault((platform, cache_file.stat().st_mtime), []).append((product_id, data))
+                migrated += 1
+                break
+        else:
+            skipped += 1
+
+    for (platform, fetched_at), items in rows.items():
+        store.put_many(platform, items, fetched_at)
+    store.set_meta("pickle_migrated", time.time())
+
+    logger.info(f"Migrated {migrated} cache files, {skipped} could not be matched to a product key")
+    return migrated, skipped
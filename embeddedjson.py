@@ -0,0 +1,101 @@
+# embeddedjson.py
+import html as html_lib
+import json
+import re
+
+_decoder = json.JSONDecoder()
+
+# <script type="a-state" data-a-state="{...}">{...}</script> blocks on Amazon pages
+A_STATE_RE = re.compile(
+    r'<script[^>]*\btype="a-state"[^>]*\bdata-a-state="([^"]*)"[^>]*>(.*?)</script>',
+    re.DOTALL
+)
+
+
+def extract_json_after(text, marker, start=0):
+    """Decode the JSON value that follows a marker in a page.
+
+    The page is only scanned for the marker and the value is decoded in
+    place, so no DOM is ever built.
+
+    Args:
+        text (str): Page source
+        marker (str): Literal text preceding the JSON value (e.g. "window.__INITIAL_STATE__")
+        start (int): Position to start scanning from
+
+    Returns:
+        object: The decoded value, or None if the marker or a valid value is missing
+    """
+    position = text.find(marker, start)
+    if position < 0:
+        return None
+    position += len(marker)
+
+    # Skip "=", ":" and whitespace up to the opening bracket
+    length = len(text)
+    while position < length and text[position] not in '{[':
+        if text[position] not in ' \t\r\n=:':
+            return None
+        position += 1
+
+    try:
+        value, _ = _decoder.raw_decode(text, position)
+    except ValueError:
+        return None
+    return value
+
+
+def iter_a_states(text):
+    """Yield (key, value) for every Amazon a-state JSON block in a page."""
+    for match in A_STATE_RE.finditer(text):
+        try:
+            state = json.loads(html_lib.unescape(match.group(1)))
+            value = json.loads(match.group(2))
+        except ValueError:
+            continue
+        if isinstance(state, dict):
+            yield state.get("key"), value
+
+
+def find_first(obj, predicate, skip=None):
+    """Depth-first search for the first dict in a decoded JSON tree matching predicate.
+
+    Args:
+        obj (object): Decoded JSON
+        predicate (callable): Called with each dict
+        skip (callable): Optional; dicts it returns True for are not searched,
+            nor is anything below them (e.g. another product's widget)
+
+    Returns:
+        dict: The first matching dict, or None
+    """
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if skip is not None and skip(current):
+                continue
+            if predicate(current):
+                return current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return None
+
+
+def find_all(obj, predicate, skip=None):
+    """Return every dict in a decoded JSON tree matching predicate, in document order (see find_first)."""
+    found = []
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if skip is not None and skip(current):
+                continue
+            if predicate(current):
+                found.append(current)
+                continue
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return found
@@ -0,0 +1,244 @@
+# extractplan.py
+import re
+
+from bs4 import Tag
+
+from htmlbackends import LexborElement
+
+# Pass the matched element itself to the post-processor instead of its text
+ELEMENT = object()
+
+# One simple selector part: tag, #id, .class or [attr] / [attr="value"]
+_SIMPLE_PART_RE = re.compile(r'([#.]?)([\w-]+)|\[([\w-]+)(?:=["\']?([^"\'\]]*)["\']?)?\]')
+
+
+class Field:
+    """Declarative description of one field to extract from a page."""
+
+    __slots__ = ("name", "selector", "attr", "post", "many")
+
+    def __init__(self, name, selector, attr=None, post=None, many=False):
+        """
+        Define a field.
+
+        Args:
+            name (str): Key the value is stored under
+            selector (str): CSS selector (tags, #id, .class, [attr] and descendant combinators)
+            attr (str or ELEMENT): Attribute to read; None reads the stripped text,
+                ELEMENT passes the element itself
+            post (callable): Optional post-processor applied to the value
+            many (bool): Collect every match (in document order) instead of the first
+        """
+        self.name = name
+        self.selector = selector
+        self.attr = attr
+        self.post = post
+        self.many = many
+
+    def value(self, element):
+        """Read this field's value from a matched element."""
+        if self.attr is ELEMENT:
+            value = element
+        elif self.attr is None:
+            value = element.text.strip()
+        else:
+            value = element.get(self.attr)
+        return self.post(value) if self.post else value
+
+
+class _Compound:
+    """A compiled compound selector such as ``span.a-price.a-text-price``."""
+
+    __slots__ = ("tag", "id", "classes", "attrs")
+
+    def __init__(self, text):
+        self.tag = None
+        self.id = None
+        self.classes = []
+        self.attrs = []
+        pos = 0
+        while pos < len(text):
+            match = _SIMPLE_PART_RE.match(text, pos)
+            if not match:
+                raise ValueError(f"Unsupported selector syntax: {text!r}")
+            prefix, name, attr, attr_value = match.groups()
+            if attr:
+                self.attrs.append((attr, attr_value))
+            elif prefix == "#":
+                self.id = name
+            elif prefix == ".":
+                self.classes.append(name)
+            else:
+                self.tag = name.lower()
+            pos = match.end()
+
+    def index_key(self):
+        """The most selective key used to look this selector up during the walk."""
+        if self.id:
+            return ("id", self.id)
+        if self.classes:
+            return ("class", self.classes[0])
+        if self.tag:
+            return ("tag", self.tag)
+        return ("any", None)
+
+    def matches(self, name, attrs):
+        if self.tag and name != self.tag:
+            return False
+        if self.id and attrs.get("id") != self.id:
+            return False
+        if self.classes:
+            element_classes = attrs.get("class") or ()
+            for cls in self.classes:
+                if cls not in element_classes:
+                    return False
+        for attr, attr_value in self.attrs:
+            if attr not in attrs:
+                return False
+            if attr_value is not None and attrs[attr] != attr_value:
+                return False
+        return True
+
+
+class _Rule:
+    """One comma-separated alternative of a field's selector, compiled."""
+
+    __slots__ = ("field_index", "chain")
+
+    def __init__(self, field_index, selector):
+        self.field_index = field_index
+        self.chain = [_Compound(part) for part in selector.split()]
+
+    def matches_ancestors(self, ancestors):
+        """Check the descendant combinators against the element's ancestors (nearest last)."""
+        position = len(self.chain) - 2
+        if position < 0:
+            return True
+        for name, attrs in reversed(ancestors):
+            if self.chain[position].matches(name, attrs):
+                position -= 1
+                if position < 0:
+                    return True
+        return False
+
+
+class ExtractionPlan:
+    """A set of fields compiled once into a single-pass extractor.
+
+    Instead of one CSS traversal per field, the plan walks the document once
+    and tests every element only against the rules indexed under its id,
+    classes and tag name, so per-page cost no longer grows with the number of
+    fields. Documents parsed by selectolax are matched with one combined CSS
+    query in C instead.
+    """
+
+    def __init__(self, fields):
+        """
+        Compile a plan.
+
+        Args:
+            fields (list): Field definitions, in the order values are produced
+        """
+        self.fields = list(fields)
+        self.index = {}
+        self.union_selector = ", ".join(field.selector for field in self.fields)
+        for field_index, field in enumerate(self.fields):
+            for alternative in field.selector.split(","):
+                rule = _Rule(field_index, alternative.strip())
+                self.index.setdefault(rule.chain[-1].index_key(), []).append(rule)
+        self.wildcard_rules = self.index.get(("any", None), [])
+
+    def subset(self, names):
+        """Return a new plan with only the named fields."""
+        names = set(names)
+        return ExtractionPlan([field for field in self.fields if field.name in names])
+
+    def run(self, doc):
+        """Extract every field from a parsed document.
+
+        Args:
+            doc (object): Document returned by htmlbackends.parse_html
+
+        Returns:
+            dict: Field name -> value for every field that matched. Fields
+                with many=True always map to a (possibly empty) list.
+        """
+        if isinstance(doc, LexborElement):
+            matches = self._match_lexbor(doc)
+        else:
+            matches = self._match_tree(doc)
+
+        values = {}
+        for field, matched in zip(self.fields, matches):
+            if field.many:
+                values[field.name] = [field.value(element) for element in matched]
+            elif matched is not None:
+                values[field.name] = field.value(matched)
+        return values
+
+    def _empty_matches(self):
+        return [[] if field.many else None for field in self.fields]
+
+    def _match_tree(self, doc):
+        """Single pre-order walk over a BeautifulSoup tree."""
+        matches = self._empty_matches()
+        fields = self.fields
+        index = self.index
+        wildcard_rules = self.wildcard_rules
+        ancestors = []
+        # Stack of (element, depth); children are pushed reversed to keep document order
+        stack = [(child, 0) for child in reversed(doc.contents) if isinstance(child, Tag)]
+
+        while stack:
+            element, depth = stack.pop()
+            del ancestors[depth:]
+            name = element.name
+            attrs = element.attrs
+
+            candidates = []
+            element_id = attrs.get("id")
+            if element_id:
+                candidates.extend(index.get(("id", element_id), ()))
+            for cls in attrs.get("class") or ():
+                candidates.extend(index.get(("class", cls), ()))
+            candidates.extend(index.get(("tag", name), ()))
+            candidates.extend(wildcard_rules)
+
+            for rule in candidates:
+                slot = matches[rule.field_index]
+                if slot is not None and not fields[rule.field_index].many:
+                    continue
+                if not rule.chain[-1].matches(name, attrs) or not rule.matches_ancestors(ancestors):
+                    continue
+                if fields[rule.field_index].many:
+                    if not slot or slot[-1] is not element:
+                        slot.append(element)
+                else:
+                    matches[rule.field_index] = element
+
+            ancestors.append((name, attrs))
+            children = [child for child in element.contents if isinstance(child, Tag)]
+            for child in reversed(children):
+                stack.append((child, depth + 1))
+
+        return matches
+
+    def _match_lexbor(self, doc):
+        """One combined CSS query, then route each match to its fields."""
+        matches = self._empty_matches()
+        last_id = None
+        for node in doc.node.css(self.union_selector):
+            # The combined query repeats a node once per alternative it matches
+            if node.mem_id == last_id:
+                continue
+            last_id = node.mem_id
+            element = LexborElement(node)
+            for field_index, field in enumerate(self.fields):
+                if not field.many and matches[field_index] is not None:
+                    continue
+                if node.css_matches(field.selector):
+                    if field.many:
+                        matches[field_index].append(element)
+                    else:
+                        matches[field_index] = element
+        return matches
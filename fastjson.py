@@ -0,0 +1,139 @@
+# fastjson.py
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Backends in order of preference when JSON_BACKEND is "auto"
+JSON_BACKENDS = ("simdjson", "orjson", "json")
+
+try:
+    import simdjson
+    HAS_SIMDJSON = True
+except ImportError:
+    HAS_SIMDJSON = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# simdjson parsers are not thread-safe and each parse invalidates the previous document
+_local = threading.local()
+
+
+def is_available(backend):
+    """Return True if the given JSON backend can be used."""
+    if backend == "simdjson":
+        return HAS_SIMDJSON
+    if backend == "orjson":
+        return HAS_ORJSON
+    return backend == "json"
+
+
+def resolve_backend(backend=None):
+    """Pick the JSON backend to use.
+
+    Args:
+        backend (str): "simdjson", "orjson", "json" or "auto". Defaults to the
+            JSON_BACKEND environment variable, then "auto".
+
+    Returns:
+        str: An installed backend name, falling back to "json"
+    """
+    backend = backend or os.environ.get("JSON_BACKEND", "auto")
+    if backend == "auto":
+        for candidate in JSON_BACKENDS:
+            if is_available(candidate):
+                return candidate
+    if not is_available(backend):
+        logger.warning(f"JSON backend '{backend}' is not available, using json")
+        return "json"
+    return backend
+
+
+def _simdjson_parser():
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = simdjson.Parser()
+    return parser
+
+
+def _materialize(value):
+    """Turn a lazy simdjson value into plain Python objects."""
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
+
+
+def loads(data, backend=None):
+    """Decode a whole JSON document.
+
+    Args:
+        data (bytes or str): The document
+        backend (str): Backend name (see resolve_backend)
+
+    Returns:
+        object: The decoded document
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    backend = resolve_backend(backend)
+    if backend == "simdjson":
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return _materialize(_simdjson_parser().parse(data))
+    if backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def loads_fields(data, root, fields, backend=None):
+    """Decode only some fields of one object in a JSON document.
+
+    With simdjson, returns ``{root: {field: value, ...}}`` holding just the
+    listed fields of ``document[root]``, in the shape the full document
+    would have; the rest of the document is never turned into Python
+    objects. The other backends cannot skip anything, so they return the
+    whole document (picking fields afterwards would only add work). A
+    document without ``root`` is decoded whole, so callers can still look
+    for other layouts.
+
+    Args:
+        data (bytes or str): The document
+        root (str): Top-level key of the object to pick fields from
+        fields (iterable): Keys of that object to keep
+        backend (str): Backend name (see resolve_backend)
+
+    Returns:
+        dict: The selected fields, or the whole document
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    backend = resolve_backend(backend)
+    if backend == "simdjson":
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        document = _simdjson_parser().parse(data)
+        try:
+            obj = document[root]
+        except (KeyError, TypeError):
+            return _materialize(document)
+        if not isinstance(obj, simdjson.Object):
+            return {root: _materialize(obj)}
+        selected = {}
+        for field in fields:
+            try:
+                selected[field] = _materialize(obj[field])
+            except KeyError:
+                pass
+        return {root: selected}
+
+    return loads(data, backend)
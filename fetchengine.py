@@ -0,0 +1,218 @@
+# fetchengine.py
+import asyncio
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from retryqueue import RetryableError
+
+logger = logging.getLogger(__name__)
+
+# How often a run with a stop event checks it while scrapes are in flight (seconds)
+STOP_POLL_INTERVAL = 0.2
+
+_END = object()
+
+
+def scrape_product(scraper, product_id):
+    """Fetch and extract a single product with any scraper.
+
+    Works with every scraper exposing ``get_product_details`` and
+    ``extract_product_info`` (Myntra, Flipkart, Amazon).
+
+    Args:
+        scraper (object): Scraper instance
+        product_id (str): The product ID
+
+    Returns:
+        ProductRecord: Extracted product information or None
+    """
+    # Scrapers built on ScraperBase fetch on a pooled, thread-safe session
+    if hasattr(scraper, 'scrape_product'):
+        return scraper.scrape_product(product_id)
+
+    data = scraper.get_product_details(str(product_id))
+    if not data:
+        return None
+    return scraper.extract_product_info(data)
+
+
+class FetchEngine:
+    """Runs product scrapes concurrently on an asyncio event loop.
+
+    The scrapers themselves are built on blocking ``requests`` calls, so each
+    scrape runs on a worker thread while the event loop bounds how many are in
+    flight per platform and hands results back in completion order. Throughput
+    therefore scales with the concurrency limit instead of round-trip latency.
+    """
+
+    # Default number of in-flight requests per platform
+    DEFAULT_CONCURRENCY = {
+        "myntra": 8,
+        "flipkart": 4,
+        "amazon": 4
+    }
+
+    def __init__(self, concurrency=None):
+        """
+        Initialize the fetch engine.
+
+        Args:
+            concurrency (dict or int): Per-platform concurrency limits, or a
+                single limit applied to every platform
+        """
+        if isinstance(concurrency, int):
+            self.concurrency = {platform: concurrency for platform in self.DEFAULT_CONCURRENCY}
+            self.default_concurrency = concurrency
+        else:
+            self.concurrency = dict(self.DEFAULT_CONCURRENCY)
+            self.concurrency.update(concurrency or {})
+            self.default_concurrency = 4
+
+    def get_concurrency(self, platform):
+        """Return the concurrency limit configured for a platform."""
+        return max(1, int(self.concurrency.get(platform, self.default_concurrency)))
+
+    async def scrape_async(self, platform, product_ids, scrape_fn, retry_queue=None, stop=None):
+        """Scrape products concurrently, yielding results as they complete.
+
+        At most the platform's concurrency limit of scrapes exist at any
+        time: product IDs are taken from the iterable (due retries first)
+        only as slots free up, so a large run allocates no per-product work
+        upfront. With a retry queue, a product whose scrape raises
+        RetryableError is put back on the queue with its backoff deadline
+        instead of being reported; its slot goes to the next product in the
+        meantime.
+
+        Args:
+            platform (str): Platform key used to pick the concurrency limit
+            product_ids (iterable): Product IDs to scrape
+            scrape_fn (callable): Blocking function taking a product ID and
+                returning the product information
+            retry_queue (RetryQueue): Optional queue for retryable failures
+            stop (threading.Event): Optional; once set, no further product is
+                started and the run ends without waiting for scrapes in flight
+
+        Yields:
+            tuple: (product_id, product_info, error) where error is the
+                exception raised by scrape_fn (by its last attempt) or None
+        """
+        limit = self.get_concurrency(platform)
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"fetch-{platform}")
+
+        async def run_one(product_id):
+            try:
+                result = await loop.run_in_executor(executor, scrape_fn, product_id)
+                return product_id, result, None
+            except RetryableError as e:
+                logger.warning(f"Retryable error scraping {platform} product {product_id}: {e}")
+                return product_id, None, e
+            except Exception as e:
+                logger.error(f"Error scraping {platform} product {product_id}: {e}")
+                return product_id, None, e
+
+        def stopped():
+            return stop is not None and stop.is_set()
+
+        remaining = iter(product_ids)
+        exhausted = False
+        ready = deque()  # Retries that are due but waiting for a free slot
+        running = set()
+        try:
+            while not stopped():
+                if retry_queue is not None:
+                    ready.extend(retry_queue.pop_ready())
+
+                # Fill the free slots, checking for a stop before taking each product
+                while len(running) < limit and not stopped():
+                    if ready:
+                        product_id = ready.popleft()
+                    elif not exhausted:
+                        product_id = next(remaining, _END)
+                        if product_id is _END:
+                            exhausted = True
+                            continue
+                    else:
+                        break
+                    running.add(asyncio.ensure_future(run_one(product_id)))
+
+                waiting = retry_queue is not None and len(retry_queue) > 0
+                if not running and not waiting:
+                    break
+
+                # Wake up for whichever comes first: a finished scrape, a due retry or a stop
+                timeout = retry_queue.next_delay() if waiting else None
+                if stop is not None:
+                    timeout = STOP_POLL_INTERVAL if timeout is None else min(timeout, STOP_POLL_INTERVAL)
+                if running:
+                    done, running = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    await asyncio.sleep(timeout)
+                    done = set()
+
+                for task in done:
+                    product_id, result, error = task.result()
+                    if retry_queue is not None:
+                        if isinstance(error, RetryableError) and retry_queue.schedule(product_id, error) is not None:
+                            continue
+                        if error is None:
+                            retry_queue.succeeded(product_id)
+                    yield product_id, result, error
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            executor.shutdown(wait=False)
+
+    def scrape(self, platform, product_ids, scrape_fn, retry_queue=None):
+        """Synchronous driver for scrape_async.
+
+        Runs the event loop on a background thread so blocking callers such as
+        the Streamlit UI loop and the command line can consume results as they
+        complete.
+
+        Args:
+            platform (str): Platform key used to pick the concurrency limit
+            product_ids (iterable): Product IDs to scrape
+            scrape_fn (callable): Blocking function taking a product ID
+            retry_queue (RetryQueue): Optional queue for retryable failures
+
+        Yields:
+            tuple: (product_id, product_info, error)
+        """
+        results = queue.Queue()
+        done = object()
+        stop = threading.Event()
+
+        async def pump():
+            agen = self.scrape_async(platform, product_ids, scrape_fn, retry_queue, stop)
+            try:
+                async for item in agen:
+                    results.put(item)
+                    if stop.is_set():
+                        break
+            finally:
+                await agen.aclose()
+
+        def run_loop():
+            try:
+                asyncio.run(pump())
+            except Exception as e:
+                logger.error(f"Fetch engine stopped unexpectedly: {e}")
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=run_loop, name=f"fetch-engine-{platform}", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            # Consumer stopped early; let the loop wind down its tasks
+            stop.set()
@@ -0,0 +1,61 @@
+# fieldgroups.py
+from productrecord import ProductRecord
+
+# Fields that change often (prices, discounts, stock) and get a short TTL;
+# everything else in a product record is static
+VOLATILE_FIELDS = ("mrp", "selling_price", "discount_percent", "in_stock", "availability")
+
+
+def volatile_fields(product_info):
+    """Pick the volatile group out of a full product record.
+
+    Size availability is volatile while the size list itself is not, so
+    sizes are reduced to their label and availability.
+
+    Args:
+        product_info (ProductRecord or dict): Extracted product information
+
+    Returns:
+        dict: The volatile fields present in the record
+    """
+    fields = {key: product_info[key] for key in VOLATILE_FIELDS if key in product_info}
+    if "sizes" in product_info:
+        fields["sizes"] = [
+            {"label": size.get("label"), "available": size.get("available")}
+            for size in product_info["sizes"]
+        ]
+    return fields
+
+
+def merge_volatile(record, fields):
+    """Return a copy of a cached record with a fresh volatile group merged in.
+
+    Args:
+        record (ProductRecord or dict): Cached product record (not modified);
+            older caches hold plain dicts with site-specific keys
+        fields (dict): Fresh volatile fields from volatile_fields or an
+            extract_volatile_info method
+
+    Returns:
+        ProductRecord: The merged record
+    """
+    # Going through a record first maps old keys such as discounted_price
+    # onto the canonical ones the fresh fields use
+    merged = ProductRecord.from_dict(record).to_dict()
+    for key in VOLATILE_FIELDS:
+        if key in fields:
+            merged[key] = fields[key]
+
+    if "sizes" in fields:
+        fresh_sizes = {size.get("label"): size for size in fields["sizes"]}
+        sizes = []
+        for size in merged.get("sizes", []):
+            size = dict(size)
+            fresh = fresh_sizes.pop(size.get("label"), None)
+            if fresh is not None:
+                size["available"] = fresh.get("available")
+            sizes.append(size)
+        # Sizes the product did not have when it was fully scraped
+        sizes.extend(dict(size) for size in fresh_sizes.values())
+        merged["sizes"] = sizes
+    return ProductRecord.from_dict(merged)
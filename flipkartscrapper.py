@@ -1,18 +1,30 @@
 # flipkartscrapper.py
 import requests
 import json
-import time
-import random
 import os
 import csv
+import re
 from datetime import datetime
-from bs4 import BeautifulSoup
+from ratelimiter import default_rate_limiter
+from htmlbackends import RegionStrainer, parse_html
+from extractplan import ELEMENT, ExtractionPlan, Field
+from embeddedjson import extract_json_after, find_all, find_first
+from productrecord import ProductRecord
+from scraperbase import ScraperBase
 
-class FlipkartScraper:
+class FlipkartScraper(ScraperBase):
     """A scraper for extracting product details from Flipkart's API."""
     
-    def __init__(self):
+    # Pages are large HTML documents, parse them in the process pool
+    parse_in_process = True
+    
+    # HTML parser backend ("selectolax", "lxml", "html.parser" or "auto");
+    # None uses the HTML_PARSER_BACKEND environment variable
+    parser_backend = None
+    
+    def __init__(self, rate_limiter=None, cookies=None):
         self.base_url = "https://www.flipkart.com/"
+        self.rate_limiter = rate_limiter or default_rate_limiter
         self.session = requests.Session()
         self.session.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
@@ -23,25 +35,31 @@ class FlipkartScraper:
             "Connection": "keep-alive"
         }
         
-        # Get initial cookies
-        self.session.get("https://www.flipkart.com/")
+        # Get initial cookies, unless saved ones were passed in
+        if cookies:
+            self.session.cookies.update(cookies)
+        else:
+            self.rate_limiter.acquire("https://www.flipkart.com/")
+            self.session.get("https://www.flipkart.com/")
     
-    def get_product_details(self, product_id):
+    def get_product_details(self, product_id, session=None):
         """Fetch product details from Flipkart API for a given product ID.
         
         Args:
             product_id (str): The Flipkart product ID
+            session (requests.Session, optional): Session to fetch with. Defaults to the scraper's own session.
             
         Returns:
             dict: Product details data
         """
+        session = session or self.session
         # Flipkart product URL format
         url = f"{self.base_url}/product/{product_id}"
         
         try:
-            # Add random delay
-            time.sleep(2 + random.uniform(0, 2))
-            response = self.session.get(url)
+            # Wait for our turn on the shared per-host rate limiter
+            self.rate_limiter.acquire(url)
+            response = session.get(url)
             response.raise_for_status()
             
             # Flipkart likely requires HTML parsing
@@ -51,43 +69,218 @@ class FlipkartScraper:
             print(f"Error fetching product details: {e}")
             return None
     
-    def extract_product_info(self, data):
+    @classmethod
+    def extract_product_info(cls, data):
         """Extract relevant product information from the API response.
         
+        Uses no instance state, so it can run in a worker process of the parse pool.
+        
         Args:
             data (dict): The API response data
             
         Returns:
-            dict: Extracted product information
+            ProductRecord: Extracted product information
         """
         if not data or "html" not in data:
             return None
         
-        soup = BeautifulSoup(data["html"], "html.parser")
+        # Fast path: read the product state JSON the page ships with, no DOM needed
+        product_info = cls._extract_from_state(data)
+        if product_info:
+            return ProductRecord.from_dict(product_info)
+        
+        soup = parse_html(data["html"], cls.parser_backend)
         
-        # Extract product information from HTML
+        # Extract product information from HTML in a single pass over the document.
         # These selectors need to be adjusted based on Flipkart's actual HTML structure
         try:
+            found = cls.EXTRACTION_PLAN.run(soup)
             product_info = {
                 "product_id": data["url"].split("/")[-1].split("?")[0],
-                "name": soup.select_one("span.B_NuCI").text.strip() if soup.select_one("span.B_NuCI") else None,
-                "brand": soup.select_one("span.G6XhRU").text.strip() if soup.select_one("span.G6XhRU") else None,
-                "mrp": self._extract_price(soup.select_one("div._3I9_wc")),
-                "selling_price": self._extract_price(soup.select_one("div._30jeq3")),
-                "discount_percent": self._extract_discount(soup.select_one("div._3Ay6Sb")),
-                "rating": float(soup.select_one("div._3LWZlK").text.strip()) if soup.select_one("div._3LWZlK") else None,
-                "rating_count": self._extract_rating_count(soup.select_one("span._2_R_DZ")),
-                "highlights": [li.text.strip() for li in soup.select("div._2cM9lP li")],
-                "specifications": self._extract_specifications(soup),
-                "images": [img.get("src").replace("/128/", "/832/") for img in soup.select("div.CXW8mj img")]
+                "name": found.get("name"),
+                "brand": found.get("brand"),
+                "mrp": found.get("mrp"),
+                "selling_price": found.get("selling_price"),
+                "discount_percent": found.get("discount_percent"),
+                "average_rating": found.get("rating"),
+                "rating_count": found.get("rating_count"),
+                "highlights": found["highlights"],
+                "specifications": cls._extract_specifications(found["spec_tables"]),
+                "images": found["images"]
             }
             
-            return product_info
+            return ProductRecord.from_dict(product_info)
         except Exception as e:
             print(f"Error extracting product info: {e}")
             return None
     
-    def _extract_price(self, element):
+    @classmethod
+    def _extract_from_state(cls, data):
+        """Extract product information from the embedded window.__INITIAL_STATE__ JSON.
+        
+        Args:
+            data (dict): Raw HTML and URL
+            
+        Returns:
+            dict: Extracted product information, or None if the page has no usable
+            state (the caller then falls back to HTML parsing)
+        """
+        state = extract_json_after(data["html"], "window.__INITIAL_STATE__")
+        if not state:
+            return None
+        
+        try:
+            context, skip = cls._state_scope(state)
+            title = find_first(state, lambda d: isinstance(d.get("titleComponent"), dict), skip)
+            pricing = find_first(state, lambda d: isinstance(d.get("finalPrice"), dict), skip)
+            if not title or not pricing:
+                return None
+            
+            title_value = title["titleComponent"].get("value") or {}
+            name = title_value.get("newTitle") or title_value.get("title")
+            selling_price = pricing["finalPrice"].get("value")
+            if not name or selling_price is None:
+                return None
+            
+            # The page context carries the product's own rating; elsewhere a
+            # rating or highlights block may belong to a seller or another product
+            rating = context.get("rating")
+            if not isinstance(rating, dict) or "average" not in rating:
+                rating = find_first(state, lambda d: "average" in d and "count" in d, skip)
+            highlights = find_first(state, lambda d: "highlights" in d, skip)
+            
+            product_info = {
+                "product_id": data["url"].split("/")[-1].split("?")[0],
+                "name": name,
+                "brand": title_value.get("superTitle"),
+                **cls._state_prices(pricing),
+                "average_rating": cls._state_number(rating.get("average")) if rating else None,
+                "rating_count": cls._state_count(rating.get("count")) if rating else None,
+                "highlights": cls._state_highlights(highlights),
+                "specifications": cls._state_specifications(state, skip),
+                "images": cls._state_images(state, skip)
+            }
+            return product_info
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"Error reading embedded product state, falling back to HTML: {e}")
+            return None
+    
+    @classmethod
+    def extract_volatile_info(cls, data):
+        """Extract only the price and discount fields of a product page.
+        
+        Used to refresh cached products whose other fields are still fresh:
+        the prices come from the embedded state, or from a parse of just the
+        price elements.
+        
+        Args:
+            data (dict): Raw HTML and URL
+            
+        Returns:
+            dict: Volatile product fields (see fieldgroups.py)
+        """
+        if not data or "html" not in data:
+            return None
+        
+        state = extract_json_after(data["html"], "window.__INITIAL_STATE__")
+        pricing = None
+        if state:
+            _, skip = cls._state_scope(state)
+            pricing = find_first(state, lambda d: isinstance(d.get("finalPrice"), dict), skip)
+        if pricing and pricing["finalPrice"].get("value") is not None:
+            return cls._state_prices(pricing)
+        
+        soup = parse_html(data["html"], cls.parser_backend, parse_only=VOLATILE_REGIONS, drop_scripts=True)
+        found = cls.VOLATILE_EXTRACTION_PLAN.run(soup)
+        return {
+            "mrp": found.get("mrp"),
+            "selling_price": found.get("selling_price"),
+            "discount_percent": found.get("discount_percent")
+        }
+    
+    @classmethod
+    def _state_prices(cls, pricing):
+        """Helper to read mrp, selling price and discount from the product state's pricing block"""
+        return {
+            "mrp": cls._state_number((pricing.get("mrp") or {}).get("value")),
+            "selling_price": cls._state_number(pricing["finalPrice"].get("value")),
+            "discount_percent": cls._state_number(pricing.get("totalDiscount"))
+        }
+    
+    @staticmethod
+    def _state_scope(state):
+        """Helper to find the page context and a find_first skip predicate for state that is not the page's product.
+        
+        Recommendation and similar-product widgets carry their own productId,
+        seller blocks a sellerId; neither is searched for the product's fields.
+        """
+        container = find_first(state, lambda d: isinstance(d.get("pageContext"), dict))
+        context = container["pageContext"] if container else {}
+        product_id = context.get("productId")
+        
+        def skip(d):
+            if "sellerId" in d:
+                return True
+            return product_id is not None and d.get("productId") not in (None, product_id)
+        
+        return context, skip
+    
+    @staticmethod
+    def _state_number(value):
+        """Helper to convert a numeric state value (price, discount, rating) to float"""
+        if value is None:
+            return None
+        try:
+            return float(str(value).replace(",", ""))
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _state_count(value):
+        """Helper to convert a state count such as "1,234" to int"""
+        number = FlipkartScraper._state_number(value)
+        return int(number) if number is not None else None
+    
+    @staticmethod
+    def _state_highlights(container):
+        """Helper to read the highlights list from the product state"""
+        if not container:
+            return []
+        highlights = container["highlights"]
+        if isinstance(highlights, dict):
+            highlights = (highlights.get("value") or {}).get("text", [])
+        return [text.strip() for text in highlights if isinstance(text, str)]
+    
+    @staticmethod
+    def _state_specifications(state, skip=None):
+        """Helper to read specification groups ({"key": ..., "attributes": [...]}) from the product state"""
+        specs = {}
+        groups = find_all(state, lambda d: isinstance(d.get("attributes"), list) and "key" in d, skip)
+        for group in groups:
+            spec_dict = {}
+            for attribute in group["attributes"]:
+                if isinstance(attribute, dict) and attribute.get("name"):
+                    values = attribute.get("values") or []
+                    spec_dict[attribute["name"]] = ", ".join(str(value) for value in values)
+            specs[group.get("key") or "General"] = spec_dict
+        return specs
+    
+    @staticmethod
+    def _state_images(state, skip=None):
+        """Helper to read image URLs from the product state's multimedia components"""
+        container = find_first(state, lambda d: isinstance(d.get("multimediaComponents"), list), skip)
+        if not container:
+            return []
+        images = []
+        for component in container["multimediaComponents"]:
+            url = (component.get("value") or {}).get("url") if isinstance(component, dict) else None
+            if url:
+                url = url.replace("{@width}", "832").replace("{@height}", "832").replace("{@quality}", "70")
+                images.append(url)
+        return images
+    
+    @staticmethod
+    def _extract_price(element):
         """Helper to extract price from an element"""
         if not element:
             return None
@@ -99,37 +292,43 @@ class FlipkartScraper:
         except ValueError:
             return None
     
-    def _extract_discount(self, element):
+    @staticmethod
+    def _extract_discount(element):
         """Helper to extract discount percentage"""
         if not element:
             return None
         discount_text = element.text.strip()
         # Extract percentage value
-        import re
-        match = re.search(r'(\d+)%', discount_text)
+        match = DISCOUNT_RE.search(discount_text)
         if match:
             return int(match.group(1))
         return None
     
-    def _extract_rating_count(self, element):
+    @staticmethod
+    def _extract_rating_count(element):
         """Helper to extract rating count"""
         if not element:
             return None
         text = element.text.strip()
         # Extract rating count
-        import re
-        match = re.search(r'(\d+(?:,\d+)*)', text)
+        match = RATING_COUNT_RE.search(text)
         if match:
             return int(match.group(1).replace(",", ""))
         return None
     
-    def _extract_specifications(self, soup):
-        """Helper to extract specifications table"""
+    @staticmethod
+    def _extract_image(img):
+        """Helper to convert a thumbnail URL to a large image URL"""
+        return img.get("src").replace("/128/", "/832/")
+    
+    @staticmethod
+    def _extract_specifications(tables):
+        """Helper to extract specifications from the matched specification tables"""
         specs = {}
-        tables = soup.select("div._14cfVK")
         
         for table in tables:
-            category = table.select_one("div._2lzn0o").text.strip() if table.select_one("div._2lzn0o") else "General"
+            category_elem = table.select_one("div._2lzn0o")
+            category = category_elem.text.strip() if category_elem else "General"
             spec_dict = {}
             
             rows = table.select("tr._1s_Smc")
@@ -153,4 +352,31 @@ class FlipkartScraper:
     def save_to_csv(self, data, output_file=None):
         """Save the extracted product information to a CSV file."""
         # Implementation similar to MyntraScraper
-        pass
\ No newline at end of file
+        pass
+
+
+# Regular expressions used during extraction, compiled once
+DISCOUNT_RE = re.compile(r'(\d+)%')
+RATING_COUNT_RE = re.compile(r'(\d+(?:,\d+)*)')
+
+# Declarative field spec for product pages, compiled once at import
+FlipkartScraper.EXTRACTION_PLAN = ExtractionPlan([
+    Field("name", "span.B_NuCI"),
+    Field("brand", "span.G6XhRU"),
+    Field("mrp", "div._3I9_wc", attr=ELEMENT, post=FlipkartScraper._extract_price),
+    Field("selling_price", "div._30jeq3", attr=ELEMENT, post=FlipkartScraper._extract_price),
+    Field("discount_percent", "div._3Ay6Sb", attr=ELEMENT, post=FlipkartScraper._extract_discount),
+    Field("rating", "div._3LWZlK", post=float),
+    Field("rating_count", "span._2_R_DZ", attr=ELEMENT, post=FlipkartScraper._extract_rating_count),
+    Field("highlights", "div._2cM9lP li", many=True),
+    Field("spec_tables", "div._14cfVK", attr=ELEMENT, many=True),
+    Field("images", "div.CXW8mj img", attr=ELEMENT, post=FlipkartScraper._extract_image, many=True),
+])
+
+# Only the price fields, for refreshing cached products
+FlipkartScraper.VOLATILE_EXTRACTION_PLAN = FlipkartScraper.EXTRACTION_PLAN.subset(
+    ["mrp", "selling_price", "discount_percent"]
+)
+
+# Page regions holding those fields
+VOLATILE_REGIONS = RegionStrainer(classes=["_3I9_wc", "_30jeq3", "_3Ay6Sb"])
\ No newline at end of file
@@ -0,0 +1,196 @@
+# htmlbackends.py
+import logging
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# Backends in order of preference when HTML_PARSER_BACKEND is "auto"
+PARSER_BACKENDS = ("selectolax", "lxml", "html.parser")
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    try:
+        # Older selectolax releases only ship the Modest engine
+        from selectolax.parser import HTMLParser as LexborHTMLParser
+        HAS_SELECTOLAX = True
+    except ImportError:
+        HAS_SELECTOLAX = False
+
+
+def is_available(backend):
+    """Return True if the given parser backend can be used."""
+    if backend == "selectolax":
+        return HAS_SELECTOLAX
+    if backend == "lxml":
+        return HAS_LXML
+    return backend == "html.parser"
+
+
+def resolve_backend(backend=None):
+    """Pick the parser backend to use.
+
+    Args:
+        backend (str): "selectolax", "lxml", "html.parser" or "auto". Defaults
+            to the HTML_PARSER_BACKEND environment variable, then "auto".
+
+    Returns:
+        str: An installed backend name, falling back to "html.parser"
+    """
+    backend = backend or os.environ.get("HTML_PARSER_BACKEND", "auto")
+    if backend == "auto":
+        for candidate in PARSER_BACKENDS:
+            if is_available(candidate):
+                return candidate
+    if not is_available(backend):
+        logger.warning(f"HTML parser backend '{backend}' is not available, using html.parser")
+        return "html.parser"
+    return backend
+
+
+def parse_html(html, backend=None, parse_only=None, drop_scripts=False):
+    """Parse an HTML document with the configured backend.
+
+    Every backend returns a document exposing the subset of the BeautifulSoup
+    API the scrapers use: ``select_one``/``select`` returning elements with
+    ``.text``, ``.attrs``, ``.get()`` and ``[attr]``.
+
+    Args:
+        html (str): Raw HTML
+        backend (str): Optional backend override (see resolve_backend)
+        parse_only (SoupStrainer): Optional strainer limiting which elements
+            BeautifulSoup builds; ignored by selectolax, whose full parse is
+            already cheaper than a strained one
+        drop_scripts (bool): Remove <script>/<style> bodies before a
+            BeautifulSoup parse (also skipped for selectolax)
+
+    Returns:
+        object: Parsed document
+    """
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        return LexborElement(LexborHTMLParser(html).root)
+    if drop_scripts:
+        html = strip_scripts(html)
+    return BeautifulSoup(html, backend, parse_only=parse_only)
+
+
+# <script>/<style> elements including their bodies
+SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+
+def strip_scripts(html):
+    """Drop <script> and <style> elements (bodies included) before parsing."""
+    return SCRIPT_STYLE_RE.sub('', html)
+
+
+class RegionStrainer(SoupStrainer):
+    """Only build the page regions whose id or class is listed.
+
+    A matching element is kept together with its whole subtree; everything
+    outside the regions is discarded while parsing, so the tree never gets
+    built for it. Works with both the pre- and post-4.13 BeautifulSoup
+    strainer interfaces.
+    """
+
+    def __init__(self, ids=(), classes=()):
+        super().__init__()
+        self.ids = frozenset(ids)
+        self.classes = frozenset(classes)
+
+    def _wanted(self, attrs):
+        if not attrs:
+            return False
+        if not isinstance(attrs, dict):
+            attrs = dict(attrs)
+        if attrs.get("id") in self.ids:
+            return True
+        classes = attrs.get("class")
+        if not classes:
+            return False
+        if isinstance(classes, str):
+            classes = classes.split()
+        return not self.classes.isdisjoint(classes)
+
+    # BeautifulSoup >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self._wanted(attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    # BeautifulSoup < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self._wanted(markup_attrs)
+
+
+class LexborElement:
+    """Wraps a selectolax node in the BeautifulSoup-style API used by the extractors."""
+
+    __slots__ = ("node", "_attrs")
+
+    # Text inside these elements is not part of BeautifulSoup's .text
+    SKIP_TEXT_TAGS = ("script", "style", "template", "-comment")
+
+    def __init__(self, node):
+        self.node = node
+        self._attrs = None
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    @property
+    def attrs(self):
+        if self._attrs is None:
+            attrs = {}
+            for key, value in self.node.attributes.items():
+                value = "" if value is None else value
+                # BeautifulSoup exposes class as a list of names
+                attrs[key] = value.split() if key == "class" else value
+            self._attrs = attrs
+        return self._attrs
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __contains__(self, key):
+        return key in self.attrs
+
+    @property
+    def text(self):
+        if self.node.css_first("script, style, template") is None:
+            return self.node.text(deep=True)
+        parts = []
+        self._collect_text(self.node, parts)
+        return "".join(parts)
+
+    def _collect_text(self, node, parts):
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                parts.append(child.text(deep=False))
+            elif child.tag not in self.SKIP_TEXT_TAGS:
+                self._collect_text(child, parts)
+
+    def get_text(self):
+        return self.text
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return LexborElement(node) if node is not None else None
+
+    def select(self, selector):
+        return [LexborElement(node) for node in self.node.css(selector)]
@@ -4,19 +4,26 @@ import argparse
 from datetime import datetime
 import os
 import csv
-import time
-import random
 import logging
+from fastjson import loads_fields
+from productrecord import ProductRecord, export_dict
+from ratelimiter import default_rate_limiter
+from scraperbase import ScraperBase
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class MyntraScraper:
+class MyntraScraper(ScraperBase):
     """A scraper for extracting product details from Myntra's API."""
     
-    def __init__(self):
+    # JSON backend for API responses ("simdjson", "orjson", "json" or "auto");
+    # None uses the JSON_BACKEND environment variable
+    json_backend = None
+    
+    def __init__(self, rate_limiter=None, cookies=None):
         self.base_url = "https://www.myntra.com/gateway/v2/product/"
+        self.rate_limiter = rate_limiter or default_rate_limiter
         self.session = requests.Session()
         self.session.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -30,27 +37,34 @@ class MyntraScraper:
         }
         
         
-        # Visit the homepage first to get cookies
-        self.session.get("https://www.myntra.com/")
+        # Reuse saved cookies if we have them, otherwise visit the homepage first to get cookies
+        if cookies:
+            self.session.cookies.update(cookies)
+        else:
+            self.rate_limiter.acquire("https://www.myntra.com/")
+            self.session.get("https://www.myntra.com/")
 
-    def get_product_details(self, product_id):
+    def get_product_details(self, product_id, session=None):
         """Fetch product details from Myntra API for a given product ID.
         
         Args:
             product_id (str): The Myntra product ID
+            session (requests.Session, optional): Session to fetch with. Defaults to the scraper's own session.
             
         Returns:
             dict: Product details data
         """
+        session = session or self.session
         url = f"{self.base_url}{product_id}"
         try:
-            # Add a random delay between 1-3 seconds
-            time.sleep(1 + 2 * random.random())
+            # Wait for our turn on the shared per-host rate limiter
+            self.rate_limiter.acquire(url)
             logger.info(f"Fetching details for product ID: {product_id}")
-            response = self.session.get(url)
+            response = session.get(url)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            # Only the style fields the extractors read are decoded
+            return loads_fields(response.content, "style", STYLE_FIELDS, self.json_backend)
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error fetching product details for ID {product_id}: {e}")
             return None    
 
@@ -62,7 +76,7 @@ class MyntraScraper:
             data (dict): The API response data
             
         Returns:
-            dict: Extracted product information
+            ProductRecord: Extracted product information
         """
         if not data or 'style' not in data:
             logger.warning("Invalid API response: 'style' not found in data")
@@ -94,7 +108,7 @@ class MyntraScraper:
         discounts = style.get('discounts', [])
         if discounts:
             product_info["discount_percent"] = discounts[0].get('discountPercent')
-            product_info["discounted_price"] = int(style.get('mrp') * (1 - discounts[0].get('discountPercent', 0)/100))
+            product_info["selling_price"] = int(style.get('mrp') * (1 - discounts[0].get('discountPercent', 0)/100))
         
         # Extract images
         images = []
@@ -137,7 +151,37 @@ class MyntraScraper:
             product_info["average_rating"] = ratings.get('averageRating')
             product_info["rating_count"] = ratings.get('totalCount')
         
-        return product_info
+        return ProductRecord.from_dict(product_info)
+    
+    def extract_volatile_info(self, data):
+        """Extract only the price, discount and stock fields from the API response.
+        
+        Args:
+            data (dict): The API response data
+            
+        Returns:
+            dict: Volatile product fields (see fieldgroups.py)
+        """
+        if not data or 'style' not in data:
+            logger.warning("Invalid API response: 'style' not found in data")
+            return None
+        
+        style = data['style']
+        volatile_info = {
+            "mrp": style.get('mrp'),
+            "in_stock": not style.get('flags', {}).get('outOfStock', False),
+            "sizes": [
+                {"label": size.get('label'), "available": size.get('available'), "sku_id": size.get('skuId')}
+                for size in style.get('sizes', [])
+            ]
+        }
+        
+        discounts = style.get('discounts', [])
+        if discounts:
+            volatile_info["discount_percent"] = discounts[0].get('discountPercent')
+            volatile_info["selling_price"] = int(style.get('mrp') * (1 - discounts[0].get('discountPercent', 0)/100))
+        
+        return volatile_info
     
     def save_to_json(self, data, output_file=None):
         """Save the extracted product information to a JSON file.
@@ -160,7 +204,7 @@ class MyntraScraper:
         output_path = os.path.join(os.getcwd(), output_file)
         
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            json.dump(export_dict(data, "myntra"), f, indent=2, ensure_ascii=False)
         
         print(f"Product information saved to {output_path}")
         return output_path
@@ -186,7 +230,7 @@ class MyntraScraper:
         output_path = os.path.join(os.getcwd(), output_file)
         
         # Flatten the nested dictionary for CSV
-        flat_data = {k: v for k, v in data.items() if not isinstance(v, (dict, list))}
+        flat_data = {k: v for k, v in export_dict(data, "myntra").items() if not isinstance(v, (dict, list))}
         
         # Handle special fields
         if 'images' in data and data['images']:
@@ -205,6 +249,14 @@ class MyntraScraper:
         print(f"Product information saved to {output_path}")
         return output_path
 
+# Fields of the API's "style" object read by extract_product_info,
+# extract_volatile_info and the app's fallback extraction
+STYLE_FIELDS = (
+    "id", "name", "brand", "mrp", "price", "discounts", "flags", "analytics",
+    "baseColour", "countryOfOrigin", "manufacturer", "media", "productDetails",
+    "sizes", "ratings"
+)
+
 def main():
     parser = argparse.ArgumentParser(description='Scrape product details from Myntra')
     parser.add_argument('product_id', help='Myntra product ID')
@@ -212,6 +264,8 @@ def main():
                         help='Output format (default: json)')
     parser.add_argument('--output', help='Output file name (without extension)')
     parser.add_argument('--from-csv', help='Load product IDs from a CSV file')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Number of products fetched in parallel with --from-csv (default: 8)')
     
     args = parser.parse_args()
     
@@ -242,18 +296,14 @@ def main():
             logger.info(f"Successfully loaded {len(product_ids)} product IDs from CSV")
             logger.info(f"First 5 IDs for verification: {product_ids[:5]}")
             
-            # Process each product ID
-            for i, product_id in enumerate(product_ids):
-                logger.info(f"Processing product {i+1}/{len(product_ids)}: {product_id}")
-                data = scraper.get_product_details(product_id)
-                
-                if not data:
-                    logger.warning(f"Failed to retrieve data for product ID: {product_id}")
-                    continue
-                
-                product_info = scraper.extract_product_info(data)
+            # Process product IDs concurrently, handling each as it completes
+            from fetchengine import FetchEngine, scrape_product
+            engine = FetchEngine({"myntra": args.concurrency})
+            results = engine.scrape("myntra", product_ids, lambda pid: scrape_product(scraper, pid))
+            for i, (product_id, product_info, error) in enumerate(results):
+                logger.info(f"Processed product {i+1}/{len(product_ids)}: {product_id}")
                 
-                if not product_info:
+                if error or not product_info:
                     logger.warning(f"Failed to extract information for product ID: {product_id}")
                     continue
                 
@@ -0,0 +1,109 @@
+# parsepool.py
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Return the process-wide pool used to parse product HTML.
+
+    The pool size defaults to the number of CPU cores and can be overridden
+    with the ``PARSE_PROCESSES`` environment variable. Workers are spawned,
+    not forked: the pool is created lazily in a process that already runs
+    fetch threads, so a fork could copy a held lock (logging, sqlite) into
+    a worker and deadlock it.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.environ.get('PARSE_PROCESSES', 0)) or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_parse_pool():
+    """Shut down the shared parse pool (a new one is created on next use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def discard_parse_pool(pool):
+    """Drop a broken pool so the next caller gets a fresh one.
+
+    Only ``pool`` is dropped: if another thread already replaced it, the
+    replacement is kept.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(parse_fn, page):
+    """Submit a page, restarting a broken pool once; returns (pool, future)."""
+    pool = get_parse_pool()
+    try:
+        return pool, pool.submit(parse_fn, page)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool
+        logger.warning("Parse pool was broken, restarting it")
+        discard_parse_pool(pool)
+        pool = get_parse_pool()
+        return pool, pool.submit(parse_fn, page)
+
+
+def submit_parse(parse_fn, data):
+    """Submit a page to the parse pool.
+
+    Only the raw page (``html`` and ``url``) is sent to the worker process and
+    only the extracted product dict comes back.
+
+    Args:
+        parse_fn (callable): Picklable function taking the page dict
+        data (dict): Raw page data with ``html`` and ``url``
+
+    Returns:
+        Future: Resolves to the extracted product information
+    """
+    return _submit(parse_fn, {"html": data["html"], "url": data["url"]})[1]
+
+
+def run_parse(parse_fn, data):
+    """Parse a page in the pool and wait for the result.
+
+    If the pool breaks while the page is queued or parsed (a worker died,
+    e.g. killed for memory), it is replaced for later pages and this page is
+    parsed in the calling process, so one crashed worker does not fail every
+    product in flight.
+
+    Args:
+        parse_fn (callable): Picklable function taking the page dict
+        data (dict): Raw page data with ``html`` and ``url``
+
+    Returns:
+        object: What parse_fn returned
+    """
+    page = {"html": data["html"], "url": data["url"]}
+    pool, future = _submit(parse_fn, page)
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        logger.warning("Parse pool broke while parsing a page, restarting it and parsing in-process")
+        discard_parse_pool(pool)
+        return parse_fn(page)
+
+
+atexit.register(shutdown_parse_pool)
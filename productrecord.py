@@ -0,0 +1,200 @@
+# productrecord.py
+import sys
+from collections.abc import Mapping
+
+# Every field a scraper may fill in, with the kind of value it holds:
+# "str", "float", "int", "bool", "id" (sites use ints or strings, stored as str),
+# "list" (of strings), "dict" (of strings) or "sizes" (of SizeRecord)
+FIELD_KINDS = {
+    "product_id": "id",
+    "source": "str",
+    "url": "str",
+    "region": "str",
+    "name": "str",
+    "brand": "str",
+    "category": "str",
+    "sub_category": "str",
+    "article_type": "str",
+    "gender": "str",
+    "color": "str",
+    "country_of_origin": "str",
+    "manufacturer": "str",
+    "mrp": "float",
+    "selling_price": "float",
+    "discount_percent": "float",
+    "average_rating": "float",
+    "rating_count": "int",
+    "availability": "str",
+    "in_stock": "bool",
+    "description": "str",
+    "details": "str",
+    "material_care": "str",
+    "size_fit": "str",
+    "features": "list",
+    "highlights": "list",
+    "categories": "list",
+    "images": "list",
+    "specifications": "dict",
+    "sizes": "sizes",
+}
+FIELDS = tuple(FIELD_KINDS)
+
+# Low-cardinality strings repeated across thousands of products; interning
+# makes every record share one copy
+INTERNED_FIELDS = frozenset((
+    "source", "region", "brand", "category", "sub_category", "article_type",
+    "gender", "color", "country_of_origin", "manufacturer", "availability"
+))
+
+# Site-specific names for canonical fields
+ALIASES = {
+    "discounted_price": "selling_price",
+    "rating": "average_rating",
+}
+
+# Names a platform's exported files used before its fields got their
+# canonical names; exports keep them so existing consumers do not break
+EXPORT_NAMES = {
+    "flipkart": {"average_rating": "rating"},
+    "myntra": {"selling_price": "discounted_price"},
+}
+
+
+def export_dict(product_info, platform):
+    """Return a product as a plain dict keyed by the names the platform's exports use."""
+    names = EXPORT_NAMES.get(platform, {})
+    return {names.get(key, key): value for key, value in dict(product_info).items()}
+
+
+class SizeRecord:
+    """One size/variant of a product and whether it can be bought."""
+
+    __slots__ = ("label", "available", "sku_id")
+
+    def __init__(self, label=None, available=None, sku_id=None):
+        self.label = sys.intern(label) if isinstance(label, str) else label
+        self.available = available
+        self.sku_id = sku_id
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, SizeRecord):
+            return data
+        return cls(data.get("label"), data.get("available"), data.get("sku_id"))
+
+    def to_dict(self):
+        return {"label": self.label, "available": self.available, "sku_id": self.sku_id}
+
+    def __eq__(self, other):
+        if not isinstance(other, SizeRecord):
+            return NotImplemented
+        return (self.label, self.available, self.sku_id) == (other.label, other.available, other.sku_id)
+
+    def __repr__(self):
+        return f"SizeRecord({self.label!r}, {self.available!r}, {self.sku_id!r})"
+
+
+class ProductRecord(Mapping):
+    """Extracted product information with a fixed set of canonical fields.
+
+    Scrapers fill in the fields they find and leave the rest as None.
+    Values are stored in slots (lists as tuples, sizes as SizeRecord), so
+    a record takes a fraction of the memory of the equivalent dict, and
+    categorical strings such as brand and category are interned.
+
+    A record also reads like the dict the scrapers used to return: it maps
+    every field that is not None, plus any keys outside the schema (e.g.
+    the fallback markers), to plain values, so ``dict(record)`` is ready
+    for JSON or a DataFrame. Site-specific names in ALIASES are accepted
+    for the canonical ones.
+    """
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields):
+        """
+        Create a record.
+
+        Args:
+            **fields: Field values by canonical name or alias; keys outside
+                the schema are kept in ``extra``
+        """
+        for name in FIELDS:
+            setattr(self, name, None)
+        self.extra = None
+        for key, value in fields.items():
+            self.set(key, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a product dict (a record is returned as is)."""
+        if isinstance(data, ProductRecord):
+            return data
+        return cls(**data)
+
+    def set(self, key, value):
+        """Set a field by canonical name or alias, normalising its value."""
+        key = ALIASES.get(key, key)
+        kind = FIELD_KINDS.get(key)
+        if kind is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+            return
+        if value is not None:
+            if kind == "sizes":
+                value = tuple(SizeRecord.from_dict(size) for size in value)
+            elif kind == "list":
+                value = tuple(value)
+            elif kind == "id":
+                value = str(value)
+            elif key in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+        setattr(self, key, value)
+
+    def to_dict(self):
+        """Return the fields that are set as a plain dict."""
+        return {key: self[key] for key in self}
+
+    def __getitem__(self, key):
+        key = ALIASES.get(key, key)
+        kind = FIELD_KINDS.get(key)
+        if kind is None:
+            if self.extra is None:
+                raise KeyError(key)
+            return self.extra[key]
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        if kind == "sizes":
+            return [size.to_dict() for size in value]
+        if kind == "list":
+            return list(value)
+        return value
+
+    def __iter__(self):
+        for name in FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __getstate__(self):
+        # Only the fields that are set, records of sparse sites pickle small
+        return {key: getattr(self, key) for key in FIELDS if getattr(self, key) is not None}, self.extra
+
+    def __setstate__(self, state):
+        values, extra = state
+        for name in FIELDS:
+            value = values.get(name)
+            # Interning does not survive a pickle round trip
+            if name in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+        self.extra = extra
+
+    def __repr__(self):
+        return f"ProductRecord({self.to_dict()!r})"
@@ -0,0 +1,219 @@
+# proxypool.py
+import random
+import threading
+import time
+from collections import deque
+
+from retryqueue import RetryableError
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Request outcomes reported back to the pool
+OK = "ok"
+CAPTCHA = "captcha"
+ERROR = "error"
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProxyStats:
+    """Health of one proxy over its most recent requests."""
+
+    def __init__(self, proxy, window):
+        self.proxy = proxy
+        self.outcomes = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)  # Seconds, successful requests only
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.in_flight = 0
+
+    def success_rate(self):
+        # Laplace smoothing, so a new proxy starts at a middling score
+        return (sum(1 for outcome in self.outcomes if outcome == OK) + 1) / (len(self.outcomes) + 2)
+
+    def captcha_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for outcome in self.outcomes if outcome == CAPTCHA) / len(self.outcomes)
+
+    def latency(self, fraction):
+        return _percentile(self.latencies, fraction) if self.latencies else None
+
+    def score(self):
+        """Selection weight: reliable, captcha-free, fast proxies score highest."""
+        p50 = self.latency(0.5)
+        p95 = self.latency(0.95)
+        # Unmeasured proxies are assumed to be about as fast as a typical page fetch
+        expected = 1.0 if p50 is None else p50 + 0.25 * (p95 - p50)
+        return self.success_rate() * (1.0 - self.captcha_rate()) / max(expected, 0.05)
+
+
+class ProxyPool:
+    """Weighted proxy selection with circuit breakers and per-proxy concurrency caps.
+
+    Each proxy's recent success rate, captcha rate and p50/p95 latency give
+    it a score, and traffic is spread across the available proxies in
+    proportion to their scores. A proxy that fails ``failure_threshold``
+    times in a row (or mostly fails over its recent window) is taken out of
+    rotation; after a cooldown it gets a single half-open probe request,
+    which either puts it back or opens the breaker again with twice the
+    cooldown.
+    """
+
+    def __init__(self, proxies, max_concurrency=2, failure_threshold=3, min_success_rate=0.2,
+                 cooldown=30, max_cooldown=600, window=50):
+        """
+        Create the pool.
+
+        Args:
+            proxies (list): Proxy URLs
+            max_concurrency (int): Requests allowed through one proxy at a time
+            failure_threshold (int): Consecutive failures that open a proxy's breaker
+            min_success_rate (float): Success rate over a full window below which
+                the breaker opens
+            cooldown (float): Seconds before the first half-open probe
+            max_cooldown (float): Longest cooldown after repeated failed probes
+            window (int): Number of recent requests the statistics cover
+        """
+        self.stats = {proxy: ProxyStats(proxy, window) for proxy in dict.fromkeys(proxies)}
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.min_success_rate = min_success_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.window = window
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.stats)
+
+    def _available(self, now):
+        """Proxies that may take a request right now (call with the condition held)."""
+        available = []
+        for stats in self.stats.values():
+            if stats.state == OPEN and now - stats.opened_at >= stats.cooldown:
+                stats.state = HALF_OPEN
+            if stats.state == CLOSED and stats.in_flight < self.max_concurrency:
+                available.append(stats)
+            elif stats.state == HALF_OPEN and stats.in_flight == 0:
+                # Exactly one probe at a time
+                available.append(stats)
+        return available
+
+    def acquire(self, timeout=30):
+        """Pick a proxy for one request.
+
+        Waits only while healthy proxies are at their concurrency cap, which
+        frees up as soon as a request finishes. When no proxy is healthy
+        (every breaker is open or probing) it fails at once, so the fetch
+        thread goes on to other work and the retry queue brings the request
+        back when a probe is due.
+
+        Args:
+            timeout (float): Longest wait for a healthy proxy to free up
+
+        Returns:
+            str: Proxy URL
+
+        Raises:
+            RetryableError: If no healthy proxy is available, or none freed up in time
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                available = self._available(now)
+                if available:
+                    # A tiny floor keeps an all-captcha pool selectable
+                    weights = [max(stats.score(), 1e-6) for stats in available]
+                    chosen = random.choices(available, weights=weights)[0]
+                    chosen.in_flight += 1
+                    return chosen.proxy
+
+                if not any(stats.state == CLOSED for stats in self.stats.values()):
+                    raise RetryableError("No healthy proxy available", retry_after=self._next_probe_in(now))
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise RetryableError("Every healthy proxy is busy")
+                self.condition.wait(remaining)
+
+    def release(self, proxy, outcome, latency=None):
+        """Report how a request through a proxy went.
+
+        Args:
+            proxy (str): Proxy URL from acquire
+            outcome (str): OK, CAPTCHA or ERROR
+            latency (float): Request time in seconds (recorded for OK only)
+        """
+        with self.condition:
+            stats = self.stats[proxy]
+            stats.in_flight -= 1
+            stats.outcomes.append(outcome)
+
+            if outcome == OK:
+                if latency is not None:
+                    stats.latencies.append(latency)
+                stats.consecutive_failures = 0
+                if stats.state == HALF_OPEN:
+                    stats.state = CLOSED
+                    stats.cooldown = 0.0
+            else:
+                stats.consecutive_failures += 1
+                failing = (
+                    stats.consecutive_failures >= self.failure_threshold
+                    or (len(stats.outcomes) == self.window and stats.success_rate() < self.min_success_rate)
+                )
+                if stats.state == HALF_OPEN or failing:
+                    self._open(stats)
+
+            self.condition.notify_all()
+
+    def _open(self, stats):
+        """Take a proxy out of rotation, doubling the cooldown after a failed probe."""
+        if stats.state == HALF_OPEN:
+            stats.cooldown = min(self.max_cooldown, max(self.base_cooldown, stats.cooldown * 2))
+        else:
+            stats.cooldown = self.base_cooldown
+        stats.state = OPEN
+        stats.opened_at = time.monotonic()
+
+    def next_probe_in(self):
+        """Seconds until the earliest open breaker allows a probe (0 if a proxy is usable now)."""
+        with self.condition:
+            return self._next_probe_in(time.monotonic())
+
+    def _next_probe_in(self, now):
+        waits = [
+            max(0.0, stats.opened_at + stats.cooldown - now) if stats.state == OPEN else 0.0
+            for stats in self.stats.values()
+        ]
+        return min(waits) if waits else 0.0
+
+    def report(self):
+        """Per-proxy health.
+
+        Returns:
+            dict: proxy -> {"state", "success_rate", "captcha_rate", "p50", "p95",
+                "in_flight", "score"}
+        """
+        with self.condition:
+            return {
+                proxy: {
+                    "state": stats.state,
+                    "success_rate": stats.success_rate(),
+                    "captcha_rate": stats.captcha_rate(),
+                    "p50": stats.latency(0.5),
+                    "p95": stats.latency(0.95),
+                    "in_flight": stats.in_flight,
+                    "score": stats.score(),
+                }
+                for proxy, stats in self.stats.items()
+            }
@@ -0,0 +1,154 @@
+# ratelimiter.py
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``. Callers
+    that find the bucket empty reserve the next token and sleep only until it
+    becomes available, so concurrent workers are spaced out at exactly the
+    configured rate without any extra sleep on top of request latency.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Maximum number of tokens that can accumulate
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def set_rate(self, rate, burst=None):
+        """Change the refill rate (and optionally the burst size) in place."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if burst is not None:
+                self.burst = max(1, int(burst))
+                self.tokens = min(self.tokens, self.burst)
+
+
+class RateLimiter:
+    """Per-host politeness scheduler shared by all scrapers.
+
+    Every request consults ``acquire`` with its URL (and proxy, if any) instead
+    of sleeping inline. Each host/proxy identity gets its own token bucket so a
+    rotating proxy pool is paced per exit address.
+    """
+
+    # Default (requests per second, burst) per host, matching the delays the
+    # scrapers used to sleep between requests
+    DEFAULT_LIMITS = {
+        "www.myntra.com": (0.5, 1),
+        "www.flipkart.com": (0.33, 1),
+        "www.amazon.in": (0.5, 1),
+        "www.amazon.com": (0.5, 1)
+    }
+
+    def __init__(self, default_rate=0.5, default_burst=1, limits=None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            default_rate (float): Requests per second for hosts without a limit
+            default_burst (int): Burst size for hosts without a limit
+            limits (dict): Optional {host: (rate, burst)} overrides
+        """
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.limits = dict(self.DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_host(url):
+        """Return the host part of a URL (or the value itself if it is a bare host)."""
+        return urlparse(url).netloc or url
+
+    def configure(self, host, rate, burst=None):
+        """Set the rate for a host, updating any buckets already in use for it.
+
+        Args:
+            host (str): Host name or URL
+            rate (float): Requests per second
+            burst (int): Optional burst size
+        """
+        host = self.get_host(host)
+        with self.lock:
+            _, current_burst = self.limits.get(host, (self.default_rate, self.default_burst))
+            burst = current_burst if burst is None else burst
+            self.limits[host] = (rate, burst)
+            for (bucket_host, _), bucket in self.buckets.items():
+                if bucket_host == host:
+                    bucket.set_rate(rate, burst)
+
+    def get_bucket(self, url, proxy=None):
+        """Return the token bucket for a URL's host and proxy identity."""
+        host = self.get_host(url)
+        key = (host, proxy)
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                rate, burst = self.limits.get(host, (self.default_rate, self.default_burst))
+                bucket = TokenBucket(rate, burst)
+                self.buckets[key] = bucket
+            return bucket
+
+    def acquire(self, url, proxy=None):
+        """Block until a request to this URL (through this proxy) is allowed.
+
+        Args:
+            url (str): URL about to be requested
+            proxy (str): Optional proxy URL the request goes through
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        return self.get_bucket(url, proxy).acquire()
+
+
+class Unlimited:
+    """Stand-in limiter that never waits, for requests that never reach the network."""
+
+    def acquire(self, url, proxy=None):
+        return 0.0
+
+
+# Process-wide limiter used by every scraper unless one is passed in explicitly
+default_rate_limiter = RateLimiter()
@@ -0,0 +1,66 @@
+# refreshqueue.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshQueue:
+    """Background re-scraping of stale cache entries.
+
+    Each (platform, product_id) is queued at most once at a time, so
+    repeated reads of the same stale entry do not pile up requests. Workers
+    run on their own small thread pool and go through the same per-host
+    rate limiter as foreground scraping.
+    """
+
+    def __init__(self, workers=2):
+        """
+        Create the queue.
+
+        Args:
+            workers (int): Number of refreshes running at once
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cache-refresh")
+        self.in_flight = set()
+        self.refreshed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def submit(self, platform, product_id, refresh_fn):
+        """Queue a refresh unless one is already pending for this product.
+
+        Args:
+            platform (str): Platform key
+            product_id (str): Product ID
+            refresh_fn (callable): Called with product_id; returns the fresh
+                product (saving it is up to the function) or None on failure
+
+        Returns:
+            bool: True if a new refresh was queued
+        """
+        key = (platform, str(product_id))
+        with self.lock:
+            if key in self.in_flight:
+                return False
+            self.in_flight.add(key)
+        self.executor.submit(self._run, key, refresh_fn)
+        return True
+
+    def _run(self, key, refresh_fn):
+        try:
+            refreshed = refresh_fn(key[1]) is not None
+        except Exception as e:
+            logger.warning(f"Background refresh of {key[0]}/{key[1]} failed: {e}")
+            refreshed = False
+        with self.lock:
+            self.in_flight.discard(key)
+            if refreshed:
+                self.refreshed += 1
+            else:
+                self.failed += 1
+
+    def stats(self):
+        with self.lock:
+            return {"pending": len(self.in_flight), "refreshed": self.refreshed, "failed": self.failed}
@@ -0,0 +1,433 @@
+# responsecache.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from blobstore import BlobStore
+
+logger = logging.getLogger(__name__)
+
+# The stored body is already decoded, so these no longer describe it
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class ResponseStore:
+    """Raw HTTP responses kept in a SQLite database, keyed on the full URL.
+
+    Each entry holds the status, headers, validators (ETag and
+    Last-Modified) and the time the body was last confirmed by the server.
+    Bodies live in a BlobStore, compressed with a per-host dictionary and
+    stored once however many URLs return the same bytes. Triggers maintain
+    a one-row stats table, so item count and size are read without
+    scanning anything.
+
+    Full product pages are large, so the store has its own budget: with
+    max_bytes or max_age set, ``maintain`` (run periodically by
+    ``start_maintenance``) drops responses the server has not confirmed for
+    the longest time and compacts the file a few pages at a time.
+    """
+
+    # Responses evicted per statement, so one maintenance step never holds the write lock for long
+    EVICTION_BATCH = 100
+    # Free pages returned to the file system per maintenance step
+    VACUUM_PAGES = 256
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        url TEXT PRIMARY KEY,
+        host TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        blob_hash TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        fetched_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_responses_blob_hash ON responses (blob_hash);
+    CREATE INDEX IF NOT EXISTS idx_responses_fetched_at ON responses (fetched_at);
+
+    CREATE TABLE IF NOT EXISTS response_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        items INTEGER NOT NULL,
+        raw_bytes INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO response_stats (id, items, raw_bytes, bytes)
+        SELECT 0, (SELECT COUNT(*) FROM responses), (SELECT COALESCE(SUM(raw_size), 0) FROM blobs),
+            (SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs);
+
+    CREATE TRIGGER IF NOT EXISTS responses_stats_insert AFTER INSERT ON responses BEGIN
+        UPDATE response_stats SET items = items + 1 WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS responses_stats_delete AFTER DELETE ON responses BEGIN
+        UPDATE response_stats SET items = items - 1 WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS blobs_stats_insert AFTER INSERT ON blobs BEGIN
+        UPDATE response_stats SET raw_bytes = raw_bytes + NEW.raw_size, bytes = bytes + LENGTH(NEW.data) WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS blobs_stats_delete AFTER DELETE ON blobs BEGIN
+        UPDATE response_stats SET raw_bytes = raw_bytes - OLD.raw_size, bytes = bytes - LENGTH(OLD.data) WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS blobs_stats_update AFTER UPDATE OF data ON blobs BEGIN
+        UPDATE response_stats SET bytes = bytes - LENGTH(OLD.data) + LENGTH(NEW.data) WHERE id = 0;
+    END;
+    """
+
+    def __init__(self, path, max_bytes=None, max_age=None):
+        """
+        Open (and create if needed) the response database.
+
+        Args:
+            path (str or Path): Database file
+            max_bytes (int): Budget for stored (compressed) bytes; None means unbounded
+            max_age (float): Drop responses not confirmed for this many seconds; None keeps them
+        """
+        self.path = str(path)
+        self.local = threading.local()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.maintenance_thread = None
+        self.maintenance_stop = threading.Event()
+        conn = self._connect()
+        self.blobs = BlobStore(self._connect, [("responses", "blob_hash")])
+        with conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # Lets compact() shrink the file; only takes effect on a new database,
+            # so it has to come before WAL mode writes the header
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, url):
+        """Return the stored entry for a URL as a dict, or None."""
+        row = self._connect().execute(
+            "SELECT r.status, r.headers, r.etag, r.last_modified, r.fetched_at, b.codec, b.dict_id, b.data "
+            "FROM responses r JOIN blobs b ON b.hash = r.blob_hash WHERE r.url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, etag, last_modified, fetched_at, codec, dict_id, data = row
+        return {
+            "url": url,
+            "status": status,
+            "headers": json.loads(headers),
+            "body": self.blobs.decode(codec, dict_id, data),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+
+    def validators(self, url):
+        """Return (etag, last_modified) of the stored entry for a URL without loading its body, or None."""
+        return self._connect().execute(
+            "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+
+    def put(self, url, status, headers, body, fetched_at=None):
+        """Store a response, replacing any previous one for the URL.
+
+        Args:
+            url (str): Request URL
+            status (int): HTTP status
+            headers (dict): Response headers
+            body (bytes): Decoded response body
+            fetched_at (float): Fetch time (defaults to now)
+        """
+        headers = {key: value for key, value in headers.items() if key.lower() not in _DROPPED_HEADERS}
+        lower = {key.lower(): value for key, value in headers.items()}
+        host = urlparse(url).netloc
+        conn = self._connect()
+        with conn:
+            replaced = [row[0] for row in conn.execute("SELECT blob_hash FROM responses WHERE url = ?", (url,))]
+            # An upsert, not INSERT OR REPLACE: the implicit delete of a replace
+            # does not fire the stats triggers
+            conn.execute(
+                "INSERT INTO responses (url, host, status, headers, blob_hash, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET host = excluded.host, status = excluded.status, "
+                "headers = excluded.headers, blob_hash = excluded.blob_hash, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, fetched_at = excluded.fetched_at",
+                (url, host, status, json.dumps(headers), self.blobs.put(conn, host, body),
+                 lower.get("etag"), lower.get("last-modified"),
+                 time.time() if fetched_at is None else fetched_at)
+            )
+            self.blobs.delete_orphans(conn, replaced)
+
+    def touch(self, url, fetched_at=None):
+        """Record that the server confirmed the stored body is still current."""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?",
+                         (time.time() if fetched_at is None else fetched_at, url))
+
+    def discard(self, url):
+        conn = self._connect()
+        with conn:
+            replaced = [row[0] for row in conn.execute("SELECT blob_hash FROM responses WHERE url = ?", (url,))]
+            conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.blobs.delete_orphans(conn, replaced)
+
+    def clear(self):
+        """Delete every stored response and return how many there were."""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM responses")
+            self.blobs.delete_orphans(conn)
+        return cursor.rowcount
+
+    def bodies(self, host=None, limit=None):
+        """Yield (url, body) for stored responses, optionally only those of one host.
+
+        Args:
+            host (str): Only responses from this host (e.g. "www.myntra.com")
+            limit (int): Stop after this many responses
+        """
+        query = "SELECT r.url, b.codec, b.dict_id, b.data FROM responses r JOIN blobs b ON b.hash = r.blob_hash"
+        params = []
+        if host is not None:
+            query += " WHERE r.host = ?"
+            params.append(host)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for url, codec, dict_id, data in self._connect().execute(query, params).fetchall():
+            yield url, self.blobs.decode(codec, dict_id, data)
+
+    def stats(self):
+        """Return {"items", "raw_bytes", "bytes"} from the stats table (bytes are compressed)."""
+        row = self._connect().execute("SELECT items, raw_bytes, bytes FROM response_stats WHERE id = 0").fetchone()
+        if not row:
+            return {"items": 0, "raw_bytes": 0, "bytes": 0}
+        return {"items": row[0], "raw_bytes": row[1], "bytes": row[2]}
+
+    def size_report(self):
+        """Compression figures per host (see BlobStore.report)."""
+        return self.blobs.report()
+
+    def delete_expired(self, max_age):
+        """Delete responses not fetched or revalidated for max_age seconds.
+
+        Returns:
+            int: Number of deleted responses
+        """
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - max_age,))
+            self.blobs.delete_orphans(conn)
+        return cursor.rowcount
+
+    def evict(self, max_bytes=None):
+        """Evict the least recently confirmed responses until the stored size fits the budget.
+
+        Args:
+            max_bytes (int): Budget in stored bytes (defaults to the store's max_bytes)
+
+        Returns:
+            int: Number of evicted responses
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return 0
+        conn = self._connect()
+        evicted = 0
+        while True:
+            excess = self.stats()["bytes"] - max_bytes
+            if excess <= 0:
+                break
+            with conn:
+                candidates = conn.execute(
+                    "SELECT r.url, r.blob_hash, LENGTH(b.data) FROM responses r JOIN blobs b ON b.hash = r.blob_hash "
+                    "ORDER BY r.fetched_at LIMIT ?", (self.EVICTION_BATCH,)
+                ).fetchall()
+                if not candidates:
+                    break
+                # Take just enough responses to cover the excess
+                victims = []
+                for url, blob_hash, stored_size in candidates:
+                    victims.append((url, blob_hash))
+                    excess -= stored_size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM responses WHERE url = ?", [(url,) for url, _ in victims])
+                self.blobs.delete_orphans(conn, [blob_hash for _, blob_hash in victims])
+            evicted += len(victims)
+        return evicted
+
+    def compact(self, pages=None):
+        """Return up to `pages` free pages to the file system.
+
+        Returns:
+            int: Free pages left in the file afterwards
+        """
+        conn = self._connect()
+        # executescript steps the pragma to completion (execute stops after the first page)
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages or self.VACUUM_PAGES)});")
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def maintain(self):
+        """Run one maintenance step: expire, evict to budget, train dictionaries and compact.
+
+        Returns:
+            dict: What the step did
+        """
+        started = time.time()
+        expired = self.delete_expired(self.max_age) if self.max_age is not None else 0
+        evicted = self.evict()
+        trained = self.blobs.train_pending()
+        free_pages = self.compact()
+        return {
+            "at": started,
+            "expired": expired,
+            "evicted": evicted,
+            "trained": len(trained),
+            "free_pages": free_pages,
+            "seconds": round(time.time() - started, 3),
+        }
+
+    def start_maintenance(self, interval=300):
+        """Run maintain() every `interval` seconds on a daemon thread (once per store)."""
+        if self.maintenance_thread is not None:
+            return
+
+        def run():
+            while not self.maintenance_stop.wait(interval):
+                try:
+                    self.maintain()
+                except Exception as e:
+                    logger.error(f"Response cache maintenance failed: {e}")
+
+        self.maintenance_thread = threading.Thread(target=run, name="response-cache-maintenance", daemon=True)
+        self.maintenance_thread.start()
+
+    def stop_maintenance(self):
+        self.maintenance_stop.set()
+
+
+def build_response(request, entry):
+    """Turn a stored entry back into a requests Response for the given request."""
+    response = Response()
+    response.status_code = entry["status"]
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"]
+    response._content_consumed = True
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.from_cache = True
+    return response
+
+
+class RevalidatingAdapter(HTTPAdapter):
+    """Transport adapter that keeps raw GET responses in a ResponseStore.
+
+    Online, a stored URL is re-requested with If-None-Match/If-Modified-Since
+    and a 304 is answered with the stored body, so an unchanged page costs
+    only headers. Offline, stored responses are served without any network
+    access and a missing URL raises ConnectionError.
+
+    A response requested with ``stream=True`` is not read here; it is stored
+    when the caller hands it to store_streamed_response after reading the
+    body, so a caller that aborts a download (e.g. a block page) never
+    stores it.
+    """
+
+    def __init__(self, store, offline=False, cacheable=None, **kwargs):
+        """
+        Create the adapter.
+
+        Args:
+            store (ResponseStore): Where responses are kept
+            offline (bool): Serve only stored responses, never touch the network
+            cacheable (callable): Optional predicate deciding whether a fresh
+                response is stored; defaults to any 200 response
+            **kwargs: Passed to HTTPAdapter
+        """
+        super().__init__(**kwargs)
+        self.store = store
+        self.offline = offline
+        self.cacheable = cacheable or (lambda response: response.status_code == 200)
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            if self.offline:
+                raise ConnectionError(f"Offline: refusing {request.method} {request.url}", request=request)
+            return super().send(request, **kwargs)
+
+        url = request.url
+
+        if self.offline:
+            entry = self.store.get(url)
+            if entry is None:
+                raise ConnectionError(f"Offline: no stored response for {url}", request=request)
+            return build_response(request, entry)
+
+        # Ask the server whether our copy is still current; the body is only
+        # loaded if it is
+        validators = self.store.validators(url)
+        if validators is not None:
+            etag, last_modified = validators
+            if etag:
+                request.headers["If-None-Match"] = etag
+            if last_modified:
+                request.headers["If-Modified-Since"] = last_modified
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and validators is not None:
+            entry = self.store.get(url)
+            # An entry evicted meanwhile leaves the bare 304, which callers treat as a failed fetch
+            if entry is not None:
+                response.close()
+                self.store.touch(url)
+                return build_response(request, entry)
+
+        response.from_cache = False
+        if kwargs.get("stream"):
+            response.cache_adapter = self
+        else:
+            self.store_response(response)
+        return response
+
+    def store_response(self, response):
+        """Store a fetched response whose body has been read, if it is cacheable."""
+        if self.cacheable(response):
+            try:
+                self.store.put(response.request.url, response.status_code, dict(response.headers), response.content)
+            except Exception as e:
+                logger.error(f"Error storing response for {response.request.url}: {e}")
+
+
+def store_streamed_response(response):
+    """Store a response fetched with stream=True once its body has been read.
+
+    Does nothing for responses that did not come through a RevalidatingAdapter.
+    """
+    adapter = getattr(response, "cache_adapter", None)
+    if adapter is not None:
+        adapter.store_response(response)
+
+
+def mount_response_cache(session, store, offline=False, cacheable=None):
+    """Route a session's http(s) traffic through a RevalidatingAdapter."""
+    adapter = RevalidatingAdapter(store, offline=offline, cacheable=cacheable)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,334 @@
+# resultcolumns.py
+import math
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from productrecord import FIELD_KINDS, FIELDS, ProductRecord
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def _arrow_array(values, type=None):
+    """Build an Arrow array, as strings if the values mix types (e.g. a price scraped as text)."""
+    try:
+        return pa.array(values, type=type, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def _grow(buffer, append, *args):
+    """Append to an array/bytearray that a DataFrame or Arrow view may still be reading.
+
+    A buffer exported zero-copy cannot be resized, so the first append
+    after an export moves the column to a fresh buffer (the old view keeps
+    the old one).
+    """
+    try:
+        append(*args)
+        return buffer
+    except BufferError:
+        buffer = type(buffer)(buffer) if isinstance(buffer, bytearray) else array(buffer.typecode, buffer)
+        getattr(buffer, append.__name__)(*args)
+        return buffer
+
+
+class ObjectColumn:
+    """Python objects (strings, ids, dicts), None where a row has no value."""
+
+    def __init__(self, values=None):
+        self.values = values if values is not None else []
+
+    def __len__(self):
+        return len(self.values)
+
+    def pad(self, length):
+        self.values.extend([None] * (length - len(self.values)))
+
+    def append(self, value):
+        self.values.append(value)
+        return self
+
+    def get(self, index):
+        return self.values[index]
+
+    def to_pandas(self):
+        return pd.Series(self.values, dtype=object)
+
+    def to_arrow(self, kind):
+        if kind == "dict":
+            return pa.array(
+                [None if value is None else [(str(k), None if v is None else str(v)) for k, v in value.items()]
+                 for value in self.values],
+                type=pa.map_(pa.string(), pa.string())
+            )
+        return _arrow_array(self.values)
+
+
+class NumberColumn:
+    """Typed values in an array, with a validity mask for ints and bools.
+
+    Floats mark missing rows with NaN. A value that does not fit the type
+    (e.g. a price scraped as text) turns the column into an ObjectColumn.
+    """
+
+    # kind -> (array typecode, numpy dtype, accepted types)
+    TYPES = {
+        "float": ("d", np.float64, (int, float)),
+        "int": ("q", np.int64, (int,)),
+        "bool": ("b", np.bool_, (bool,)),
+    }
+
+    def __init__(self, kind):
+        typecode, self.dtype, self.accepts = self.TYPES[kind]
+        self.kind = kind
+        self.values = array(typecode)
+        self.missing = None if kind == "float" else bytearray()
+
+    def __len__(self):
+        return len(self.values)
+
+    def pad(self, length):
+        count = length - len(self.values)
+        if count <= 0:
+            return
+        filler = math.nan if self.kind == "float" else 0
+        self.values = _grow(self.values, self.values.extend, [filler] * count)
+        if self.missing is not None:
+            self.missing = _grow(self.missing, self.missing.extend, b"\x01" * count)
+
+    def append(self, value):
+        """Append a value, returning the column to use from now on."""
+        if not isinstance(value, self.accepts) or (self.kind == "int" and isinstance(value, bool)):
+            return self.to_object().append(value)
+        self.values = _grow(self.values, self.values.append, value)
+        if self.missing is not None:
+            self.missing = _grow(self.missing, self.missing.append, 0)
+        return self
+
+    def get(self, index):
+        if self.missing is not None:
+            return None if self.missing[index] else self.dtype(self.values[index]).item()
+        value = self.values[index]
+        return None if math.isnan(value) else value
+
+    def to_object(self):
+        return ObjectColumn([self.get(index) for index in range(len(self))])
+
+    def _numpy(self):
+        # Views over the column's own buffers, no copy
+        values = np.frombuffer(self.values, dtype=self.dtype) if len(self) else np.empty(0, self.dtype)
+        if self.missing is None:
+            return values, None
+        missing = np.frombuffer(self.missing, dtype=np.bool_) if len(self) else np.empty(0, np.bool_)
+        return values, missing
+
+    def to_pandas(self):
+        values, missing = self._numpy()
+        if self.kind == "float":
+            return pd.Series(values, copy=False)
+        if self.kind == "int":
+            return pd.Series(pd.arrays.IntegerArray(values, missing), copy=False)
+        return pd.Series(pd.arrays.BooleanArray(values, missing), copy=False)
+
+    def to_arrow(self, kind):
+        values, missing = self._numpy()
+        if missing is None:
+            return pa.array(values, from_pandas=True)
+        return pa.array(values, mask=missing)
+
+
+class ListColumn:
+    """Variable-length lists stored flat: row i is values[offsets[i]:offsets[i + 1]]."""
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.values = []
+        self.missing = bytearray()
+
+    def __len__(self):
+        return len(self.missing)
+
+    def pad(self, length):
+        count = length - len(self)
+        if count > 0:
+            self.offsets = _grow(self.offsets, self.offsets.extend, [self.offsets[-1]] * count)
+            self.missing = _grow(self.missing, self.missing.extend, b"\x01" * count)
+
+    def append(self, value):
+        self._extend_values(value)
+        self.offsets = _grow(self.offsets, self.offsets.append, self.offsets[-1] + len(value))
+        self.missing = _grow(self.missing, self.missing.append, 0)
+        return self
+
+    def _extend_values(self, value):
+        self.values.extend(value)
+
+    def _row(self, start, end):
+        return self.values[start:end]
+
+    def get(self, index):
+        if self.missing[index]:
+            return None
+        return self._row(self.offsets[index], self.offsets[index + 1])
+
+    def to_pandas(self):
+        return pd.Series([self.get(index) for index in range(len(self))], dtype=object)
+
+    def _arrow_values(self):
+        return _arrow_array(self.values, pa.string())
+
+    def to_arrow(self, kind):
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        missing = np.frombuffer(self.missing, dtype=np.bool_) if len(self) else np.empty(0, np.bool_)
+        return pa.LargeListArray.from_arrays(offsets, self._arrow_values(), mask=pa.array(missing))
+
+
+class SizesColumn(ListColumn):
+    """Lists of sizes, stored flat as one column per size attribute."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = None
+        self.labels = []
+        self.available = []
+        self.sku_ids = []
+
+    def _extend_values(self, value):
+        for size in value:
+            self.labels.append(size.label)
+            self.available.append(size.available)
+            self.sku_ids.append(size.sku_id)
+
+    def _row(self, start, end):
+        return [
+            {"label": self.labels[i], "available": self.available[i], "sku_id": self.sku_ids[i]}
+            for i in range(start, end)
+        ]
+
+    def _arrow_values(self):
+        return pa.StructArray.from_arrays(
+            [_arrow_array(self.labels, pa.string()), _arrow_array(self.available, pa.bool_()),
+             _arrow_array(self.sku_ids)],
+            names=["label", "available", "sku_id"]
+        )
+
+
+def _new_column(kind):
+    if kind in NumberColumn.TYPES:
+        return NumberColumn(kind)
+    if kind == "list":
+        return ListColumn()
+    if kind == "sizes":
+        return SizesColumn()
+    return ObjectColumn()
+
+
+class ResultColumns:
+    """Column-oriented accumulator for the products of a scraping run.
+
+    Products are appended as they arrive and stored one column per field:
+    numbers in typed arrays, lists (images, features, sizes, ...) as one
+    flat value list plus row offsets, so a large run holds no per-product
+    dicts at all. The columns are handed out as a DataFrame, with the
+    numeric columns viewing the arrays in place, or as an Arrow table when
+    pyarrow is installed.
+
+    Columns appear in schema order, followed by keys outside the schema
+    (fallback markers) in the order they were first seen; a column no
+    product has a value for is left out, as with a DataFrame built from
+    dicts.
+    """
+
+    def __init__(self):
+        self.length = 0
+        self.columns = {}
+        self.extra_kinds = {}
+
+    def __len__(self):
+        return self.length
+
+    def append(self, product_info):
+        """Append one product (a ProductRecord or a product dict)."""
+        record = ProductRecord.from_dict(product_info)
+        for name in FIELDS:
+            value = getattr(record, name)
+            if value is not None:
+                self._set(name, FIELD_KINDS[name], value)
+        if record.extra:
+            for key, value in record.extra.items():
+                if value is not None:
+                    self._set(key, self.extra_kinds.setdefault(key, "object"), value)
+        self.length += 1
+
+    def extend(self, products):
+        for product_info in products:
+            self.append(product_info)
+
+    def _set(self, name, kind, value):
+        column = self.columns.get(name)
+        if column is None:
+            column = _new_column(kind)
+        column.pad(self.length)
+        self.columns[name] = column.append(value)
+
+    def names(self):
+        """Column names in output order."""
+        return [name for name in FIELDS if name in self.columns] + list(self.extra_kinds)
+
+    def row(self, index):
+        """Rebuild one product as a plain dict of its set fields."""
+        product = {}
+        for name in self.names():
+            column = self.columns[name]
+            value = column.get(index) if index < len(column) else None
+            if value is not None:
+                product[name] = value
+        return product
+
+    def rows(self):
+        for index in range(self.length):
+            yield self.row(index)
+
+    def series(self, name):
+        """Return one column as a Series without building the others.
+
+        Raises:
+            KeyError: If no product has a value for the column
+        """
+        column = self.columns[name]
+        column.pad(self.length)
+        return column.to_pandas().rename(name)
+
+    def to_dataframe(self, names=None):
+        """Return the results as a DataFrame; numeric columns share the accumulator's buffers.
+
+        Only float, int and bool columns are views; text, list and dict
+        columns are built as Python-object Series, so prefer ``series`` for
+        figures that need a column or two.
+
+        Args:
+            names (list): Only these columns, in this order (defaults to all)
+        """
+        return pd.DataFrame({name: self.series(name) for name in (names or self.names())}, copy=False)
+
+    def to_arrow(self):
+        """Return the results as a pyarrow Table.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow is required for ResultColumns.to_arrow")
+        arrays = []
+        names = self.names()
+        for name in names:
+            column = self.columns[name]
+            column.pad(self.length)
+            arrays.append(column.to_arrow(FIELD_KINDS.get(name, "object")))
+        return pa.Table.from_arrays(arrays, names=names)
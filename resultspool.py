@@ -0,0 +1,143 @@
+# resultspool.py
+import csv
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from productrecord import FIELDS
+
+
+def _detailed_value(value):
+    # Lists are joined with pipes so every product stays on one CSV row
+    if isinstance(value, list):
+        return "|".join(str(item) for item in value)
+    return value
+
+
+class ResultSpool:
+    """Products of one scraping run, written to disk as they complete.
+
+    Each product is appended to a JSON Lines file right away, so a run's
+    results never have to be held in memory for export and survive a crash
+    mid-run. close() turns the spool into the download files (a JSON array,
+    a plain CSV and a detailed CSV with lists joined by "|") by streaming
+    over it one line at a time. Used as a context manager, the file is
+    closed even when the run is aborted.
+    """
+
+    def __init__(self, directory, prefix, export_names=None):
+        """
+        Start a spool.
+
+        Args:
+            directory (str or Path): Where the run's files are written
+            prefix (str): File name prefix, e.g. the platform
+            export_names (dict): Field name -> name used in the files (see
+                productrecord.EXPORT_NAMES)
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.base = directory / stem
+        self.jsonl_path = self.base.with_suffix(".jsonl")
+        self.paths = {}
+        self.count = 0
+        self.keys = {}  # Every key seen, in first-seen order
+        self.export_names = export_names or {}
+        self.file = open(self.jsonl_path, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # An aborted run only releases the JSONL file, remove_old_spools clears it later
+        if exc_type is not None:
+            self.file.close()
+        else:
+            self.close()
+
+    def __len__(self):
+        return self.count
+
+    def write(self, product_info):
+        """Append one product (a ProductRecord or a product dict)."""
+        product = {self.export_names.get(key, key): value for key, value in dict(product_info).items()}
+        self.file.write(json.dumps(product, ensure_ascii=False, default=str))
+        self.file.write("\n")
+        for key in product:
+            self.keys.setdefault(key, None)
+        self.count += 1
+
+    def extend(self, products):
+        for product_info in products:
+            self.write(product_info)
+
+    def columns(self):
+        """CSV columns: schema fields first, then any other keys as first seen."""
+        fields = [self.export_names.get(name, name) for name in FIELDS]
+        return [name for name in fields if name in self.keys] + [key for key in self.keys if key not in fields]
+
+    def _products(self):
+        with open(self.jsonl_path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        """Finish the spool and write the download files.
+
+        Returns:
+            dict: "jsonl", "json", "csv" and "detailed_csv" -> Path
+        """
+        if self.paths:
+            return self.paths
+        self.file.close()
+
+        json_path = self.base.with_suffix(".json")
+        with open(json_path, "w", encoding="utf-8") as out, open(self.jsonl_path, encoding="utf-8") as f:
+            out.write("[")
+            for i, line in enumerate(f):
+                out.write(",\n" if i else "\n")
+                out.write(line.rstrip("\n"))
+            out.write("\n]\n")
+
+        columns = self.columns()
+        csv_path = self.base.with_suffix(".csv")
+        detailed_path = self.base.parent / f"{self.base.name}_detailed.csv"
+        export_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(csv_path, "w", newline="", encoding="utf-8") as plain_file, \
+                open(detailed_path, "w", newline="", encoding="utf-8") as detailed_file:
+            plain = csv.writer(plain_file)
+            detailed = csv.writer(detailed_file)
+            plain.writerow(columns)
+            detailed.writerow(columns + ["export_date"])
+            for product in self._products():
+                row = [product.get(column) for column in columns]
+                plain.writerow(row)
+                detailed.writerow([_detailed_value(value) for value in row] + [export_date])
+
+        self.paths = {"jsonl": self.jsonl_path, "json": json_path, "csv": csv_path, "detailed_csv": detailed_path}
+        return self.paths
+
+
+def remove_old_spools(directory, max_age):
+    """Delete spool files older than max_age seconds.
+
+    Returns:
+        int: Number of files removed
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in directory.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
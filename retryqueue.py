@@ -0,0 +1,146 @@
+# retryqueue.py
+import heapq
+import itertools
+import random
+import threading
+import time
+
+
+class RetryableError(Exception):
+    """A fetch failed in a way that may succeed later (block page, 5xx, network error).
+
+    Raised by a scraper instead of sleeping and retrying in place, so the
+    caller can put the item back on a RetryQueue and move on.
+    """
+
+    def __init__(self, message, retry_after=None):
+        """
+        Args:
+            message (str): What went wrong
+            retry_after (float): Optional minimum delay asked for by the server
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryState:
+    """Retry bookkeeping for one item."""
+
+    __slots__ = ("key", "attempts", "last_error", "next_at", "gave_up")
+
+    def __init__(self, key):
+        self.key = key
+        self.attempts = 0  # Retries scheduled so far
+        self.last_error = None
+        self.next_at = None
+        self.gave_up = False
+
+
+class RetryQueue:
+    """Delay queue of failed items waiting for their backoff deadline.
+
+    Each item may be retried ``max_retries`` times, with exponential backoff
+    and jitter between attempts; across all items at most ``budget`` retries
+    are handed out, so a run where everything fails (e.g. the site is blocking
+    us) gives up quickly instead of retrying every product.
+    """
+
+    def __init__(self, max_retries=5, base_backoff=2, max_backoff=60, budget=None):
+        """
+        Create the queue.
+
+        Args:
+            max_retries (int): Retries allowed per item
+            base_backoff (float): Base of the exponential backoff, in seconds
+            max_backoff (float): Longest delay before a retry
+            budget (int): Total retries allowed across all items (None: unlimited)
+        """
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.states = {}
+        self.heap = []  # (deadline, seq, key)
+        self.seq = itertools.count()
+        self.scheduled = 0
+        self.recovered = 0
+        self.exhausted = 0
+        self.lock = threading.Lock()
+
+    def schedule(self, key, error=None, now=None):
+        """Put a failed item back in the queue if it has retries left.
+
+        Args:
+            key (hashable): The item (e.g. a product ID)
+            error (Exception): Why the attempt failed; a RetryableError's
+                retry_after is honoured as a minimum delay
+            now (float): Current time (defaults to now)
+
+        Returns:
+            float: Delay until the retry, or None if the item gave up
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(key)
+            if state is None:
+                state = self.states[key] = RetryState(key)
+            state.last_error = error
+
+            if state.attempts >= self.max_retries or (self.budget is not None and self.scheduled >= self.budget):
+                state.gave_up = True
+                state.next_at = None
+                self.exhausted += 1
+                return None
+
+            state.attempts += 1
+            delay = min(self.max_backoff, self.base_backoff ** state.attempts + random.uniform(0, 1))
+            retry_after = getattr(error, "retry_after", None)
+            if retry_after:
+                delay = max(delay, retry_after)
+            state.next_at = now + delay
+            self.scheduled += 1
+            heapq.heappush(self.heap, (state.next_at, next(self.seq), key))
+            return delay
+
+    def succeeded(self, key):
+        """Record that an item went through, counting it as recovered if it had been retried."""
+        with self.lock:
+            state = self.states.get(key)
+            if state is not None and state.attempts:
+                self.recovered += 1
+
+    def pop_ready(self, now=None):
+        """Remove and return the items whose deadline has passed, earliest first."""
+        now = time.time() if now is None else now
+        ready = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                ready.append(heapq.heappop(self.heap)[2])
+        return ready
+
+    def next_delay(self, now=None):
+        """Seconds until the earliest queued retry is due (0 if overdue), or None if the queue is empty."""
+        now = time.time() if now is None else now
+        with self.lock:
+            if not self.heap:
+                return None
+            return max(0.0, self.heap[0][0] - now)
+
+    def state(self, key):
+        with self.lock:
+            return self.states.get(key)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.heap)
+
+    def stats(self):
+        """Return {"scheduled", "pending", "recovered", "exhausted", "budget_left"}."""
+        with self.lock:
+            return {
+                "scheduled": self.scheduled,
+                "pending": len(self.heap),
+                "recovered": self.recovered,
+                "exhausted": self.exhausted,
+                "budget_left": None if self.budget is None else max(0, self.budget - self.scheduled),
+            }
@@ -0,0 +1,236 @@
+# scraperbase.py
+import copy
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import requests
+
+from fieldgroups import volatile_fields
+from parsepool import run_parse, submit_parse
+from ratelimiter import Unlimited
+from responsecache import mount_response_cache
+from retryqueue import RetryableError
+from sessionpool import SessionPool
+
+# Guards lazy creation of each scraper's session pool
+_pool_lock = threading.Lock()
+
+
+class ScraperBase:
+    """Batch scraping support shared by the platform scrapers.
+
+    Subclasses provide ``self.session`` (the warmed-up session built in their
+    constructor), ``get_product_details(product_id, session=None)`` and
+    ``extract_product_info(data)``.
+    """
+    
+    # HTML scrapers set this so extract_product_info (which must then be a
+    # classmethod) runs in the process pool instead of the fetching thread
+    parse_in_process = False
+    
+    # ResponseStore holding raw product responses, see enable_response_cache
+    response_store = None
+
+    def _new_session(self):
+        """Create a session for the pool, copying headers and cookies from the main session."""
+        session = requests.Session()
+        session.headers = self.session.headers.copy()
+        session.cookies.update(self.session.cookies)
+        if self.response_store is not None:
+            mount_response_cache(session, self.response_store, cacheable=self.is_cacheable_response)
+        return session
+
+    def is_cacheable_response(self, response):
+        """Whether a fetched response is worth keeping in the response store."""
+        return response.status_code == 200
+
+    def enable_response_cache(self, store):
+        """Keep raw responses in a ResponseStore and revalidate them on later fetches.
+
+        Call this before scraping; sessions already in the pool keep fetching
+        without the store.
+
+        Args:
+            store (ResponseStore): Store shared by every session of this scraper
+        """
+        if self.response_store is store:
+            return
+        self.response_store = store
+        mount_response_cache(self.session, store, cacheable=self.is_cacheable_response)
+
+    def _replay_copy(self):
+        """Shallow copy of the scraper used to re-read stored responses."""
+        replayer = copy.copy(self)
+        # Nothing goes over the network, so there is nothing to pace
+        replayer.rate_limiter = Unlimited()
+        return replayer
+
+    def replay_product(self, product_id):
+        """Re-run extraction on a product's stored response without touching the network.
+
+        Args:
+            product_id (str): The product ID
+
+        Returns:
+            ProductRecord: Extracted product information, or None if nothing is stored
+                for the product or nothing could be extracted
+        """
+        if self.response_store is None:
+            raise ValueError("Response cache is not enabled for this scraper")
+        session = self._new_session()
+        mount_response_cache(session, self.response_store, offline=True)
+        try:
+            data = self._replay_copy().get_product_details(str(product_id), session=session)
+        except RetryableError:
+            return None
+        if not data:
+            return None
+        return self.parse_product(data)
+
+    @property
+    def session_pool(self):
+        """Pool of sessions that worker threads borrow from, created on first use."""
+        pool = self.__dict__.get('_session_pool')
+        if pool is None:
+            with _pool_lock:
+                pool = self.__dict__.get('_session_pool')
+                if pool is None:
+                    pool = SessionPool(self._new_session)
+                    self._session_pool = pool
+        return pool
+
+    def fetch_product(self, product_id):
+        """Fetch the raw product data on a pooled session.
+
+        Args:
+            product_id (str): The product ID
+
+        Returns:
+            dict: Raw product data or None
+        """
+        with self.session_pool.session() as session:
+            return self.get_product_details(str(product_id), session=session)
+
+    def parse_product(self, data):
+        """Extract product information, in the parse pool for HTML scrapers.
+
+        Args:
+            data (dict): Raw product data from get_product_details
+
+        Returns:
+            ProductRecord: Extracted product information or None
+        """
+        if self.parse_in_process:
+            return run_parse(type(self).extract_product_info, data)
+        return self.extract_product_info(data)
+
+    def scrape_product(self, product_id):
+        """Fetch and extract a single product on a pooled session.
+
+        Args:
+            product_id (str): The product ID
+
+        Returns:
+            ProductRecord: Extracted product information or None
+        """
+        data = self.fetch_product(product_id)
+        if not data:
+            return None
+        return self.parse_product(data)
+
+    @classmethod
+    def extract_volatile_info(cls, data):
+        """Extract only the volatile fields (prices, discounts, stock) of a product.
+
+        Scrapers override this with something cheaper than a full
+        extraction; this default extracts everything and keeps the volatile
+        group.
+
+        Args:
+            data (dict): Raw product data from get_product_details
+
+        Returns:
+            dict: Volatile fields (see fieldgroups.volatile_fields) or None
+        """
+        product_info = cls.extract_product_info(data)
+        return volatile_fields(product_info) if product_info else None
+
+    def refresh_volatile(self, product_id):
+        """Fetch a product and extract only its volatile fields.
+
+        Args:
+            product_id (str): The product ID
+
+        Returns:
+            dict: Volatile fields, or None if the product could not be fetched
+        """
+        data = self.fetch_product(product_id)
+        if not data:
+            return None
+        if self.parse_in_process:
+            return run_parse(type(self).extract_volatile_info, data)
+        return self.extract_volatile_info(data)
+
+    def scrape_many(self, ids, workers=8):
+        """Scrape many products in a thread pool.
+
+        Each worker fetches on its own pooled session. Extraction runs inline
+        for JSON scrapers and in the process pool for HTML scrapers, so fetch
+        threads go straight back to the network while pages are parsed on other
+        cores. Results are yielded as they finish (not in input order).
+
+        Args:
+            ids (iterable): Product IDs to scrape
+            workers (int): Number of worker threads
+
+        Yields:
+            tuple: (product_id, product_info) where product_info is the
+                extracted dict, None if nothing could be extracted, or the
+                exception raised while scraping that product
+        """
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=type(self).__name__)
+        fetch_fn = self.fetch_product if self.parse_in_process else self.scrape_product
+        
+        # Maps each pending future to (stage, product_id, raw page for parses)
+        pending = {}
+        try:
+            for product_id in ids:
+                pending[executor.submit(fetch_fn, product_id)] = ("fetch", product_id, None)
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, product_id, page = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        # A parse worker died; the next submit_parse starts a fresh
+                        # pool, this page is parsed here
+                        try:
+                            yield product_id, type(self).extract_product_info(page)
+                        except Exception as e:
+                            yield product_id, e
+                        continue
+                    except Exception as e:
+                        yield product_id, e
+                        continue
+                    
+                    if stage == "fetch" and self.parse_in_process:
+                        if not result:
+                            yield product_id, None
+                            continue
+                        # Hand the raw page to the parse pool
+                        try:
+                            parse_future = submit_parse(type(self).extract_product_info, result)
+                        except Exception as e:
+                            yield product_id, e
+                            continue
+                        pending[parse_future] = ("parse", product_id, result)
+                    else:
+                        yield product_id, result
+        finally:
+            # Drop work that has not started if the caller stops early
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
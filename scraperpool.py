@@ -0,0 +1,171 @@
+# scraperpool.py
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from requests.cookies import RequestsCookieJar, create_cookie
+
+logger = logging.getLogger(__name__)
+
+# Cookies without an expiry date (browser-session cookies) are trusted this long
+SESSION_COOKIE_TTL = 12 * 60 * 60
+
+
+def jar_expires_at(jar, saved_at, session_cookie_ttl=SESSION_COOKIE_TTL):
+    """When a cookie jar stops being usable: the earliest expiry of any of its cookies.
+
+    Args:
+        jar (CookieJar): The cookies
+        saved_at (float): When the jar was last filled by the site
+        session_cookie_ttl (float): Lifetime assumed for cookies without an expiry
+
+    Returns:
+        float: Expiry timestamp
+    """
+    expires_at = saved_at + session_cookie_ttl
+    for cookie in jar:
+        if cookie.expires is not None:
+            expires_at = min(expires_at, cookie.expires)
+    return expires_at
+
+
+class CookieJarStore:
+    """Cookie jars saved to disk, one JSON file per platform.
+
+    A jar is handed back until its first cookie expires, so a new scraper
+    can skip the homepage visit that would otherwise set them.
+    """
+
+    def __init__(self, directory, session_cookie_ttl=SESSION_COOKIE_TTL):
+        """
+        Create the store.
+
+        Args:
+            directory (str or Path): Where the jars are kept (created if missing)
+            session_cookie_ttl (float): Lifetime assumed for cookies without an expiry
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.session_cookie_ttl = session_cookie_ttl
+
+    def _path(self, platform):
+        return self.directory / f"{platform}.json"
+
+    def load(self, platform):
+        """Return the platform's saved jar, or None if there is none or it has expired.
+
+        Returns:
+            tuple: (RequestsCookieJar, expires_at) or None
+        """
+        try:
+            with open(self._path(platform), "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cookie jar for {platform}: {e}")
+            return None
+
+        jar = RequestsCookieJar()
+        for cookie in saved["cookies"]:
+            jar.set_cookie(create_cookie(**cookie))
+        if not len(jar):
+            return None
+        expires_at = jar_expires_at(jar, saved["saved_at"], self.session_cookie_ttl)
+        if expires_at <= time.time():
+            return None
+        return jar, expires_at
+
+    def save(self, platform, jar, saved_at=None):
+        """Write a jar to disk, replacing the previous one atomically.
+
+        Returns:
+            float: When the saved jar expires
+        """
+        saved_at = time.time() if saved_at is None else saved_at
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure,
+                "rest": {"HttpOnly": None} if cookie.has_nonstandard_attr("HttpOnly") else {},
+            }
+            for cookie in jar
+        ]
+        path = self._path(platform)
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": saved_at, "cookies": cookies}, f)
+        os.replace(temp_path, path)
+        return jar_expires_at(jar, saved_at, self.session_cookie_ttl)
+
+    def discard(self, platform):
+        try:
+            self._path(platform).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ScraperPool:
+    """Process-wide warmed-up scrapers, one per platform.
+
+    Building a scraper visits the site's homepage for cookies. The pool
+    builds each platform's scraper once, seeds it with the cookies saved by
+    an earlier process when they are still valid, and hands the same
+    instance (with its pooled keep-alive sessions) to every run until the
+    cookies expire.
+    """
+
+    def __init__(self, factory, cookie_store):
+        """
+        Create the pool.
+
+        Args:
+            factory (callable): factory(platform, cookies) builds a scraper,
+                skipping the homepage visit when cookies is a jar; returns None
+                for platforms without a scraper
+            cookie_store (CookieJarStore): Where cookie jars persist
+        """
+        self.factory = factory
+        self.cookie_store = cookie_store
+        self.scrapers = {}  # platform -> (scraper, expires_at)
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def _platform_lock(self, platform):
+        with self.lock:
+            return self.locks.setdefault(platform, threading.Lock())
+
+    def get(self, platform):
+        """Return the platform's warm scraper, building it if missing or its cookies expired."""
+        with self._platform_lock(platform):
+            entry = self.scrapers.get(platform)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+
+            saved = self.cookie_store.load(platform)
+            scraper = self.factory(platform, saved[0] if saved else None)
+            if scraper is None:
+                return None
+            session = getattr(scraper, "session", None)
+            if saved:
+                expires_at = saved[1]
+            elif session is not None and len(session.cookies):
+                expires_at = self.cookie_store.save(platform, session.cookies)
+            else:
+                # The warm-up got no cookies, so build a fresh scraper next time
+                expires_at = 0
+            self.scrapers[platform] = (scraper, expires_at)
+            return scraper
+
+    def discard(self, platform):
+        """Drop a platform's scraper and saved cookies, e.g. after the site started blocking it."""
+        with self._platform_lock(platform):
+            self.scrapers.pop(platform, None)
+            self.cookie_store.discard(platform)
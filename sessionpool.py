@@ -0,0 +1,122 @@
+# sessionpool.py
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class SessionPool:
+    """A thread-safe pool of ``requests.Session`` objects.
+
+    A single ``requests.Session`` is not safe to share between threads (headers
+    and cookies are mutated per request), so concurrent workers each borrow a
+    session of their own and return it when the request is done. Sessions are
+    created on demand by ``factory`` and kept for reuse, which preserves their
+    keep-alive connections and cookies between products.
+
+    With ``max_failures`` set, borrowers report whether a session worked when
+    they return it; a session that fails that many times in a row is closed
+    and replaced by a fresh one from ``factory``.
+    """
+
+    def __init__(self, factory, max_size=None, max_failures=None):
+        """
+        Initialize the pool.
+
+        Args:
+            factory (callable): Creates a new configured session
+            max_size (int): Optional cap on sessions; borrowers block when reached
+            max_failures (int): Optional number of consecutive failures after
+                which a session is retired
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_failures = max_failures
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.retired = 0
+        self.failures = {}  # id(session) -> consecutive failures
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Borrow a session, creating one if none is idle."""
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self.lock:
+                can_create = self.max_size is None or self.created < self.max_size
+                if can_create:
+                    self.created += 1
+
+            if can_create:
+                try:
+                    return self.factory()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+
+            # Pool is full, wait for a session to come back (or be retired,
+            # which frees a slot for a new one)
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                pass
+
+    def release(self, session, healthy=True):
+        """Return a borrowed session to the pool.
+
+        Args:
+            session (requests.Session): The borrowed session
+            healthy (bool): Whether the session's last request worked
+        """
+        if self.max_failures is not None:
+            with self.lock:
+                if healthy:
+                    self.failures.pop(id(session), None)
+                    retire = False
+                else:
+                    failures = self.failures.get(id(session), 0) + 1
+                    retire = failures >= self.max_failures
+                    if retire:
+                        self.failures.pop(id(session), None)
+                        self.created -= 1
+                        self.retired += 1
+                    else:
+                        self.failures[id(session)] = failures
+            if retire:
+                session.close()
+                return
+        self.idle.put(session)
+
+    @contextmanager
+    def session(self):
+        """Context manager that borrows a session for the duration of the block.
+
+        An exception escaping the block counts as a failure of the session.
+        """
+        session = self.acquire()
+        healthy = False
+        try:
+            yield session
+            healthy = True
+        finally:
+            self.release(session, healthy)
+
+    def stats(self):
+        """Return {"created", "idle", "retired"} session counts."""
+        with self.lock:
+            return {"created": self.created, "idle": self.idle.qsize(), "retired": self.retired}
+
+    def close(self):
+        """Close all idle sessions."""
+        while True:
+            try:
+                session = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            session.close()
+            with self.lock:
+                self.created -= 1
@@ -0,0 +1,73 @@
+# test_blockdetect.py
+import io
+
+import pytest
+import requests
+
+import blockdetect
+from amazonscrapper import BLOCK_DETECTOR
+
+
+class CountingBody(io.BytesIO):
+    """Response body that records how much of it was read and whether it was closed."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def streamed(status, body):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = CountingBody(body)
+    return response
+
+
+PRODUCT_PAGE = b"<html><title>Widget</title>" + b"x" * 100000 + b"enter the captcha below</html>"
+CAPTCHA_PAGE = b"<form action=\"/errors/validateCaptcha\">" + b"y" * 100000
+ROBOT_PAGE = b"<html><head><title>Robot Check</title></head>" + b"z" * 100000
+
+
+@pytest.mark.parametrize("status, head, expected", [
+    (200, PRODUCT_PAGE[:1000], blockdetect.PRODUCT),
+    (503, CAPTCHA_PAGE[:1000], blockdetect.CAPTCHA),
+    (200, ROBOT_PAGE[:1000], blockdetect.ROBOT_CHECK),
+    (429, b"", blockdetect.BLOCKED),
+    (404, b"Not Found", blockdetect.OTHER),
+    # Markers are case-sensitive, a page mentioning CAPTCHA is still a product
+    (200, b"Solve the Captcha? Type The Characters You See In This Image", blockdetect.PRODUCT),
+])
+def test_classify(status, head, expected):
+    assert BLOCK_DETECTOR.classify(status, {}, head) == expected
+
+
+def test_product_pages_are_read_in_full():
+    response = streamed(200, PRODUCT_PAGE)
+    assert BLOCK_DETECTOR.read(response) == blockdetect.PRODUCT
+    assert response.content == PRODUCT_PAGE
+    assert response.raw.bytes_read == len(PRODUCT_PAGE)
+
+
+@pytest.mark.parametrize("page, expected", [
+    (CAPTCHA_PAGE, blockdetect.CAPTCHA),
+    (ROBOT_PAGE, blockdetect.ROBOT_CHECK),
+])
+def test_block_pages_stop_after_the_head(page, expected):
+    response = streamed(200, page)
+    assert BLOCK_DETECTOR.read(response) == expected
+    assert response.raw.bytes_read == blockdetect.HEAD_BYTES
+    assert response.raw.closed
+    assert response.content == page[:blockdetect.HEAD_BYTES]
+
+
+def test_already_read_responses_are_classified_from_their_content():
+    response = streamed(200, CAPTCHA_PAGE)
+    response.content
+    assert BLOCK_DETECTOR.read(response) == blockdetect.CAPTCHA
+    # Reading has no side effects on a consumed response
+    assert response.content == CAPTCHA_PAGE
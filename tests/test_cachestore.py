@@ -0,0 +1,160 @@
+# test_cachestore.py
+import hashlib
+import os
+import pickle
+import time
+
+import pytest
+
+from cachestore import CacheStore, MemoryCache, migrate_pickle_cache
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CacheStore(tmp_path / "cache.db", memory_bytes=1 << 20)
+    yield store
+    store.stop_maintenance()
+
+
+def test_memory_cache_evicts_least_recently_used_past_its_budget():
+    cache = MemoryCache(max_bytes=30)
+    cache.put("a", 1, 10, 0)
+    cache.put("b", 2, 10, 0)
+    cache.put("c", 3, 10, 0)
+    assert cache.get("a") is not None
+    cache.put("d", 4, 10, 0)
+    assert cache.get("b") is None
+    assert [key for key in cache.entries] == ["c", "a", "d"]
+    assert cache.stats()["bytes"] == 30
+
+
+def test_memory_cache_skips_oversized_entries_and_honours_cutoff():
+    cache = MemoryCache(max_bytes=10)
+    cache.put("big", 1, 11, 0)
+    assert cache.get("big") is None
+    cache.put("old", 1, 5, fetched_at=100)
+    assert cache.get("old", cutoff=200) is None
+    assert cache.get("old", cutoff=50) == (1, 100, 100)
+    assert cache.stats()["hits"] == 1
+
+
+def test_memory_tier_serves_repeat_reads_and_follows_writes(store):
+    store.put("myntra", "1", {"product_id": "1", "mrp": 100})
+    # Written through both tiers, so the next read never reaches SQLite
+    store._connect().execute("DELETE FROM products")
+    assert store.get("myntra", "1") == {"product_id": "1", "mrp": 100}
+    store.put("myntra", "1", {"product_id": "1", "mrp": 90})
+    assert store.get("myntra", "1")["mrp"] == 90
+    store.clear()
+    assert store.get("myntra", "1") is None
+
+
+def test_memory_tier_drops_expired_entries(store):
+    store.put("myntra", "old", {"product_id": "old"}, fetched_at=time.time() - 3600)
+    store.put("myntra", "new", {"product_id": "new"})
+    assert store.delete_expired(60) == 1
+    assert store.memory.stats()["items"] == 1
+    assert store.get("myntra", "old") is None
+    assert store.get("myntra", "new", max_age=60) is not None
+
+
+def product(product_id, size=2000):
+    return {"product_id": product_id, "payload": os.urandom(size).hex()}
+
+
+def scanned_stats(store):
+    conn = store._connect()
+    items, raw_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM products").fetchone()
+    stored = conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+    return {"items": items, "raw_bytes": raw_bytes, "bytes": stored}
+
+
+def set_usage(store, product_id, accessed_at, hits=0):
+    conn = store._connect()
+    with conn:
+        conn.execute("UPDATE products SET accessed_at = ?, hits = ? WHERE product_id = ?",
+                     (accessed_at, hits, product_id))
+
+
+def test_trigger_stats_match_a_full_scan(store):
+    store.put_many("myntra", [(str(i), product(str(i))) for i in range(5)])
+    store.put("myntra", "0", product("0", size=500))
+    store.update_volatile("myntra", {"1": {"mrp": 10}})
+    store.delete_expired(-1)
+    store.put_many("flipkart", [("a", product("a")), ("b", product("b"))])
+    store.evict(store.stats()["bytes"] - 1)
+    assert store.stats() == scanned_stats(store)
+
+
+def test_identical_records_share_one_blob(store):
+    record = product("same")
+    store.put_many("myntra", [("1", record), ("2", record)])
+    assert store.stats()["items"] == 2
+    assert store._connect().execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    store.put("myntra", "1", product("1"))
+    # Still referenced by product 2
+    assert store.get("myntra", "2") == record
+    store.put("myntra", "2", product("2"))
+    assert store._connect().execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 2
+    assert store.stats() == scanned_stats(store)
+
+
+@pytest.mark.parametrize("eviction, usage, survivor", [
+    ("lru", {"1": (100, 9), "2": (300, 0), "3": (200, 0)}, "2"),
+    ("lfu", {"1": (100, 9), "2": (300, 0), "3": (200, 1)}, "1"),
+])
+def test_eviction_order(tmp_path, eviction, usage, survivor):
+    store = CacheStore(tmp_path / "cache.db", eviction=eviction)
+    for product_id, (accessed_at, hits) in usage.items():
+        store.put("myntra", product_id, product(product_id))
+        set_usage(store, product_id, accessed_at, hits)
+    one_entry = store.stats()["bytes"] // 3 + 100
+    assert store.evict(one_entry) == 2
+    assert store.get_many("myntra", usage).keys() == {survivor}
+
+
+def test_reads_are_flushed_into_the_eviction_order(tmp_path):
+    store = CacheStore(tmp_path / "cache.db")
+    store.put("myntra", "old", product("old"))
+    store.put("myntra", "new", product("new"))
+    set_usage(store, "old", 100)
+    set_usage(store, "new", 200)
+    store.get("myntra", "old")
+    store.flush_accesses()
+    assert store.evict(store.stats()["bytes"] - 1) == 1
+    assert store.get_many("myntra", ["old", "new"]).keys() == {"old"}
+
+
+def test_maintain_keeps_the_budget_and_shrinks_the_file(tmp_path):
+    path = tmp_path / "cache.db"
+    store = CacheStore(path, max_bytes=50000)
+    assert store._connect().execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+    store.put_many("myntra", [(str(i), product(str(i), size=5000)) for i in range(40)])
+    store._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    before = path.stat().st_size
+    report = store.maintain()
+    store._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    assert report["evicted"] > 0
+    assert store.stats()["bytes"] <= 50000
+    assert store.stats() == scanned_stats(store)
+    assert path.stat().st_size < before
+    assert store.last_maintenance()["evicted"] == report["evicted"]
+
+
+def test_pickle_cache_is_migrated_once_and_left_in_place(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    for platform, product_id in (("myntra", "11"), ("flipkart", "FK1")):
+        name = hashlib.md5(f"{platform}_{product_id}".encode()).hexdigest()
+        with open(cache_dir / f"{name}.pkl", "wb") as f:
+            pickle.dump({"product_id": product_id, "name": platform}, f)
+    with open(cache_dir / f"{hashlib.md5(b'ajio_9').hexdigest()}.pkl", "wb") as f:
+        pickle.dump({"product_id": "9"}, f)
+    (cache_dir / "broken.pkl").write_bytes(b"not a pickle")
+
+    store = CacheStore(tmp_path / "cache.db")
+    assert migrate_pickle_cache(store, cache_dir, ["myntra", "flipkart"]) == (2, 2)
+    assert store.get("myntra", "11") == {"product_id": "11", "name": "myntra"}
+    assert store.get("flipkart", "FK1")["name"] == "flipkart"
+    assert len(list(cache_dir.glob("*.pkl"))) == 4
+    assert migrate_pickle_cache(store, cache_dir, ["myntra", "flipkart"]) == (0, 0)
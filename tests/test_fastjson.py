@@ -0,0 +1,59 @@
+# test_fastjson.py
+import json
+import os
+
+import pytest
+
+from fastjson import JSON_BACKENDS, is_available, loads, loads_fields
+from myntrascrapper import STYLE_FIELDS, MyntraScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+DOCUMENT = json.dumps({
+    "style": {"id": 11, "name": "Shirt", "sizes": [{"label": "M"}], "crossLinks": list(range(50))},
+    "pdpData": {"widgets": [1, 2, 3]},
+}).encode("utf-8")
+
+BACKENDS = [pytest.param(backend, marks=pytest.mark.skipif(not is_available(backend),
+                                                           reason=f"{backend} is not installed"))
+            for backend in JSON_BACKENDS]
+
+
+def load_style():
+    with open(os.path.join(FIXTURES, "myntra_style.json"), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_loads_matches_json(backend):
+    assert loads(DOCUMENT, backend) == json.loads(DOCUMENT)
+    assert loads(DOCUMENT.decode("utf-8"), backend) == json.loads(DOCUMENT)
+
+
+@pytest.mark.skipif(not is_available("simdjson"), reason="pysimdjson is not installed")
+def test_simdjson_decodes_only_the_selected_fields():
+    assert loads_fields(DOCUMENT, "style", ["id", "sizes", "missing"], "simdjson") == {
+        "style": {"id": 11, "sizes": [{"label": "M"}]}
+    }
+
+
+@pytest.mark.skipif(not is_available("simdjson"), reason="pysimdjson is not installed")
+def test_simdjson_without_root_decodes_the_whole_document():
+    assert loads_fields(DOCUMENT, "product", ["id"], "simdjson") == json.loads(DOCUMENT)
+    assert loads_fields(b'{"style": [1, 2]}', "style", ["id"], "simdjson") == {"style": [1, 2]}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_selected_fields_extract_the_same_product(backend):
+    # The selective decode must keep every field the Myntra extraction reads
+    payload = load_style()
+    scraper = MyntraScraper(cookies={"session": "test"})
+    expected = scraper.extract_product_info(json.loads(payload)).to_dict()
+    assert scraper.extract_product_info(loads_fields(payload, "style", STYLE_FIELDS, backend)).to_dict() == expected
+
+
+def test_invalid_document_raises_value_error():
+    for backend in JSON_BACKENDS:
+        if is_available(backend):
+            with pytest.raises(ValueError):
+                loads_fields(b'{"style": ', "style", ["id"], backend)
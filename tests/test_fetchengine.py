@@ -0,0 +1,94 @@
+# test_fetchengine.py
+import asyncio
+import threading
+import time
+
+import retryqueue
+from fetchengine import FetchEngine
+from retryqueue import RetryableError, RetryQueue
+
+
+def collect(engine, product_ids, scrape_fn, retry_queue=None, stop=None):
+    async def run():
+        return [item async for item in engine.scrape_async("myntra", product_ids, scrape_fn, retry_queue, stop)]
+    return asyncio.run(run())
+
+
+def test_ids_are_taken_only_as_slots_free_up():
+    pulled = []
+    in_flight = []
+    lock = threading.Lock()
+    peak = [0]
+
+    def ids():
+        for i in range(200):
+            pulled.append(i)
+            yield str(i)
+
+    def scrape(product_id):
+        with lock:
+            in_flight.append(product_id)
+            peak[0] = max(peak[0], len(in_flight))
+            # No more than the running scrapes plus the next one have been read
+            assert len(pulled) <= int(product_id) + 4
+        time.sleep(0.001)
+        with lock:
+            in_flight.remove(product_id)
+        return product_id
+
+    results = collect(FetchEngine(3), ids(), scrape)
+    assert all(error is None for _, _, error in results)
+    assert sorted(int(product_id) for product_id, _, _ in results) == list(range(200))
+    assert peak[0] <= 3
+
+
+def test_stop_ends_the_run_without_waiting_for_scrapes_in_flight():
+    stop = threading.Event()
+    started = []
+
+    def scrape(product_id):
+        started.append(product_id)
+        time.sleep(2)
+        return product_id
+
+    threading.Timer(0.1, stop.set).start()
+    began = time.monotonic()
+    results = collect(FetchEngine(2), [str(i) for i in range(10)], scrape, stop=stop)
+    assert time.monotonic() - began < 1
+    assert results == []
+    assert len(started) == 2
+
+
+def test_retryable_failures_are_retried_through_the_queue(monkeypatch):
+    monkeypatch.setattr(retryqueue.random, "uniform", lambda a, b: 0)
+    attempts = {}
+
+    def scrape(product_id):
+        attempts[product_id] = attempts.get(product_id, 0) + 1
+        if product_id == "flaky" and attempts[product_id] < 3:
+            raise RetryableError("blocked")
+        return {"product_id": product_id}
+
+    queue = RetryQueue(max_retries=5, base_backoff=0.01)
+    results = {product_id: (result, error) for product_id, result, error in
+               collect(FetchEngine(2), ["a", "flaky", "b"], scrape, queue)}
+    assert results["flaky"] == ({"product_id": "flaky"}, None)
+    assert attempts["flaky"] == 3
+    assert queue.stats()["recovered"] == 1
+
+
+def test_exhausted_retries_report_the_last_error(monkeypatch):
+    monkeypatch.setattr(retryqueue.random, "uniform", lambda a, b: 0)
+
+    def scrape(product_id):
+        raise RetryableError("always blocked")
+
+    results = collect(FetchEngine(2), ["a"], scrape, RetryQueue(max_retries=2, base_backoff=0.01))
+    assert len(results) == 1
+    product_id, result, error = results[0]
+    assert result is None and isinstance(error, RetryableError)
+
+
+def test_scrape_yields_every_result_from_a_background_loop():
+    results = list(FetchEngine(4).scrape("amazon", [str(i) for i in range(20)], lambda product_id: product_id))
+    assert sorted(result for _, result, _ in results) == sorted(str(i) for i in range(20))
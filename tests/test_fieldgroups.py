@@ -0,0 +1,70 @@
+# test_fieldgroups.py
+import time
+
+from cachestore import CacheStore
+from fieldgroups import merge_volatile, volatile_fields
+from productrecord import ProductRecord
+
+
+def record():
+    return ProductRecord(
+        product_id="7", name="Shirt", brand="Acme", mrp=999.0, selling_price=799.0,
+        sizes=[{"label": "M", "available": True, "sku_id": 1}, {"label": "L", "available": True, "sku_id": 2}],
+    )
+
+
+def test_volatile_fields_reduce_sizes_to_availability():
+    assert volatile_fields(record()) == {
+        "mrp": 999.0,
+        "selling_price": 799.0,
+        "sizes": [{"label": "M", "available": True}, {"label": "L", "available": True}],
+    }
+
+
+def test_merge_keeps_static_fields_and_size_details():
+    cached = record()
+    merged = merge_volatile(cached, {
+        "selling_price": 699.0,
+        "in_stock": False,
+        "name": "ignored",
+        "sizes": [{"label": "L", "available": False}, {"label": "XL", "available": True}],
+    })
+    assert merged["name"] == "Shirt"
+    assert (merged["mrp"], merged["selling_price"], merged["in_stock"]) == (999.0, 699.0, False)
+    assert merged["sizes"] == [
+        {"label": "M", "available": True, "sku_id": 1},
+        {"label": "L", "available": False, "sku_id": 2},
+        {"label": "XL", "available": True, "sku_id": None},
+    ]
+    # The cached record is shared with readers and stays untouched
+    assert cached["selling_price"] == 799.0
+    assert cached["sizes"][1]["available"] is True
+
+
+def test_merge_maps_old_dict_keys_onto_canonical_fields():
+    merged = merge_volatile({"product_id": "7", "discounted_price": 500}, {"selling_price": 450})
+    assert isinstance(merged, ProductRecord)
+    assert merged["selling_price"] == 450
+    assert "discounted_price" not in merged.to_dict()
+
+
+def test_price_refresh_restarts_only_the_volatile_ttl(tmp_path):
+    store = CacheStore(tmp_path / "cache.db", memory_bytes=1 << 20)
+    now = time.time()
+    store.put("myntra", "7", record(), fetched_at=now - 3000)
+    fresh, volatile_expired, stale = store.classify("myntra", ["7"], 86400, volatile_max_age=600)
+    assert list(volatile_expired) == ["7"] and not fresh and not stale
+
+    merged = store.update_volatile("myntra", {"7": {"selling_price": 599.0}, "missing": {"mrp": 1}})
+    assert list(merged) == ["7"]
+    store.memory.clear()
+    fresh, volatile_expired, _ = store.classify("myntra", ["7"], 86400, volatile_max_age=600)
+    assert fresh["7"]["selling_price"] == 599.0 and not volatile_expired
+    _, fetched_at, volatile_at = store.get_entries("myntra", ["7"])["7"]
+    assert abs(fetched_at - (now - 3000)) < 1
+    assert volatile_at > now - 1
+
+    # A full scrape resets both groups
+    store.put("myntra", "7", record(), fetched_at=now - 3000)
+    _, volatile_expired, _ = store.classify("myntra", ["7"], 86400, volatile_max_age=600)
+    assert list(volatile_expired) == ["7"]
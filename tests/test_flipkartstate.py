@@ -0,0 +1,63 @@
+# test_flipkartstate.py
+import json
+
+from flipkartscrapper import FlipkartScraper
+
+URL = "https://www.flipkart.com/test-phone/p/itm0123456789"
+
+
+def page(state):
+    return {"html": f"<html><script>window.__INITIAL_STATE__ = {json.dumps(state)};</script></html>", "url": URL}
+
+
+def product_state(context_rating=True):
+    # Seller and recommendation blocks come first, so a search of the whole
+    # state would find their rating and highlights before the product's
+    context = {"productId": "MOBTEST"}
+    if context_rating:
+        context["rating"] = {"average": 4.4, "count": "1,234"}
+    return {
+        "sellerInfo": {"sellerId": "S1", "rating": {"average": 3.1, "count": 99}},
+        "recommendations": [{
+            "productId": "MOBOTHER",
+            "rating": {"average": 2.0, "count": 7},
+            "highlights": ["Not this phone"],
+            "titleComponent": {"value": {"title": "Other Phone"}},
+            "finalPrice": {"value": 999},
+        }],
+        "pageDataV4": {"page": {"pageData": {"pageContext": context}, "data": [
+            {"titleComponent": {"value": {"title": "Test Phone", "superTitle": "Acme"}}},
+            {"mrp": {"value": "19,999"}, "finalPrice": {"value": 14999.5}, "totalDiscount": 25},
+            {"rating": {"average": 4.4, "count": "1,234"}},
+            {"highlights": ["6 GB RAM", "50MP Camera"]},
+        ]}},
+    }
+
+
+def test_state_fields_come_from_the_page_product():
+    info = FlipkartScraper._extract_from_state(page(product_state()))
+    assert info["name"] == "Test Phone"
+    assert info["brand"] == "Acme"
+    assert info["average_rating"] == 4.4
+    assert info["rating_count"] == 1234
+    assert info["highlights"] == ["6 GB RAM", "50MP Camera"]
+
+
+def test_rating_outside_the_page_context_skips_sellers_and_other_products():
+    info = FlipkartScraper._extract_from_state(page(product_state(context_rating=False)))
+    assert (info["average_rating"], info["rating_count"]) == (4.4, 1234)
+
+
+def test_state_prices_keep_fractions():
+    info = FlipkartScraper._extract_from_state(page(product_state()))
+    assert info["selling_price"] == 14999.5
+    assert info["mrp"] == 19999.0
+    assert FlipkartScraper.extract_volatile_info(page(product_state()))["selling_price"] == 14999.5
+
+
+def test_malformed_rating_count_is_dropped():
+    state = product_state()
+    state["pageDataV4"]["page"]["pageData"]["pageContext"]["rating"]["count"] = "many"
+    info = FlipkartScraper._extract_from_state(page(state))
+    assert info["rating_count"] is None
+    assert info["average_rating"] == 4.4
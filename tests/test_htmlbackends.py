@@ -0,0 +1,54 @@
+# test_htmlbackends.py
+import os
+
+import pytest
+
+from amazonscrapper import AmazonScraper
+from flipkartscrapper import FlipkartScraper
+from htmlbackends import PARSER_BACKENDS, is_available
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PAGES = [
+    (AmazonScraper, "amazon_product.html", "https://www.amazon.in/dp/B0TESTSHRT"),
+    (FlipkartScraper, "flipkart_product.html", "https://www.flipkart.com/test-phone/p/itm0123456789"),
+]
+
+
+def load_page(name, url):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return {"html": f.read(), "url": url}
+
+
+def extract(scraper, data, backend, monkeypatch):
+    monkeypatch.setattr(scraper, "parser_backend", backend)
+    return scraper.extract_product_info(data).to_dict()
+
+
+@pytest.mark.parametrize("backend", [b for b in PARSER_BACKENDS if b != "html.parser"])
+@pytest.mark.parametrize("scraper, name, url", PAGES)
+def test_backend_matches_html_parser(scraper, name, url, backend, monkeypatch):
+    if not is_available(backend):
+        pytest.skip(f"{backend} is not installed")
+    data = load_page(name, url)
+    expected = extract(scraper, data, "html.parser", monkeypatch)
+    assert extract(scraper, data, backend, monkeypatch) == expected
+
+
+@pytest.mark.parametrize("scraper, name, url", PAGES)
+def test_fixture_fields_are_extracted(scraper, name, url, monkeypatch):
+    # Guards against backends agreeing only because nothing was found
+    product = extract(scraper, load_page(name, url), "html.parser", monkeypatch)
+    for field in ("name", "brand", "selling_price", "mrp", "average_rating", "images"):
+        assert product.get(field), field
+
+
+def test_amazon_fixture_values(monkeypatch):
+    product = extract(AmazonScraper, load_page(*PAGES[0][1:]), "html.parser", monkeypatch)
+    assert product["name"] == "Test Brand Men's Regular Fit Shirt"
+    assert product["selling_price"] == 499.0
+    assert product["mrp"] == 1299.0
+    assert product["in_stock"] is True
+    assert product["features"] == ["100% cotton", "Machine wash"]
+    assert product["specifications"] == {"Material": "Cotton", "Fit": "Regular"}
+    assert product["categories"] == ["Clothing", "Men", "Shirts"]
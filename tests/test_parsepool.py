@@ -0,0 +1,57 @@
+# test_parsepool.py
+import multiprocessing
+import os
+
+import pytest
+
+import parsepool
+from scraperbase import ScraperBase
+
+PAGE = {"html": "<html></html>", "url": "https://example.com/p/1"}
+
+
+def crash_in_worker(page):
+    # Stands in for a worker killed mid-parse (e.g. by the OOM killer)
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return {"url": page["url"], "parsed_in": "caller"}
+
+
+def parse_in_worker(page):
+    return {"url": page["url"], "parsed_in": "worker" if multiprocessing.parent_process() else "caller"}
+
+
+class CrashingScraper(ScraperBase):
+    parse_in_process = True
+
+    @classmethod
+    def extract_product_info(cls, data):
+        return crash_in_worker(data)
+
+
+@pytest.fixture
+def parse_pool(monkeypatch):
+    monkeypatch.setenv("PARSE_PROCESSES", "1")
+    parsepool.shutdown_parse_pool()
+    yield
+    parsepool.shutdown_parse_pool()
+
+
+def test_pages_are_parsed_in_a_worker(parse_pool):
+    assert parsepool.run_parse(parse_in_worker, PAGE)["parsed_in"] == "worker"
+
+
+def test_crashed_worker_falls_back_to_the_caller_and_replaces_the_pool(parse_pool):
+    broken = parsepool.get_parse_pool()
+    assert CrashingScraper().parse_product(PAGE) == {"url": PAGE["url"], "parsed_in": "caller"}
+    # Later pages go to a fresh pool
+    assert parsepool.get_parse_pool() is not broken
+    assert parsepool.run_parse(parse_in_worker, PAGE)["parsed_in"] == "worker"
+
+
+def test_discard_keeps_a_pool_another_thread_already_replaced(parse_pool):
+    old = parsepool.get_parse_pool()
+    parsepool.discard_parse_pool(old)
+    fresh = parsepool.get_parse_pool()
+    parsepool.discard_parse_pool(old)
+    assert parsepool.get_parse_pool() is fresh
@@ -0,0 +1,50 @@
+# test_productrecord.py
+import pickle
+
+from productrecord import ProductRecord, SizeRecord, export_dict
+
+
+def test_aliases_read_and_write_the_canonical_field():
+    record = ProductRecord(product_id=123, discounted_price=499.0, rating=4.2)
+    assert record.selling_price == 499.0 and record.average_rating == 4.2
+    assert record["discounted_price"] == record["selling_price"] == 499.0
+    assert record["rating"] == 4.2
+    assert "discounted_price" not in dict(record)
+    assert record["product_id"] == "123"
+
+
+def test_reads_like_the_dict_it_was_built_from():
+    data = {
+        "product_id": "1",
+        "brand": "Acme",
+        "images": ["a.jpg", "b.jpg"],
+        "sizes": [{"label": "M", "available": True, "sku_id": 9}],
+        "used_fallback": True,
+    }
+    record = ProductRecord.from_dict(data)
+    assert dict(record) == data
+    assert record.images == ("a.jpg", "b.jpg")
+    assert record.sizes == (SizeRecord("M", True, 9),)
+    assert "mrp" not in record and record.get("mrp") is None
+    assert ProductRecord.from_dict(record) is record
+
+
+def test_categorical_strings_are_interned_across_pickling():
+    brand = "".join(["Ac", "me"])
+    record = pickle.loads(pickle.dumps(ProductRecord(brand=brand, name="".join(["Shi", "rt"]))))
+    assert record["brand"] is ProductRecord(brand="Acme").brand
+    assert dict(record) == {"brand": "Acme", "name": "Shirt"}
+
+
+def test_pickles_only_the_fields_that_are_set():
+    sparse = pickle.dumps(ProductRecord(product_id="1"))
+    full = pickle.dumps(ProductRecord(product_id="1", **{name: "x" * 10 for name in ("name", "brand", "color")}))
+    assert len(sparse) < len(full)
+    assert pickle.loads(sparse) == {"product_id": "1"}
+
+
+def test_exports_keep_each_platforms_original_names():
+    record = ProductRecord(product_id="1", selling_price=10.0, average_rating=4.0)
+    assert export_dict(record, "myntra") == {"product_id": "1", "discounted_price": 10.0, "average_rating": 4.0}
+    assert export_dict(record, "flipkart") == {"product_id": "1", "selling_price": 10.0, "rating": 4.0}
+    assert export_dict(record, "amazon") == dict(record)
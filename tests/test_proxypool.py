@@ -0,0 +1,72 @@
+# test_proxypool.py
+import threading
+import time
+
+import pytest
+
+import proxypool
+from proxypool import ProxyPool
+from retryqueue import RetryableError
+
+
+def fail(pool, proxy, times):
+    for _ in range(times):
+        assert pool.acquire() == proxy
+        pool.release(proxy, proxypool.ERROR)
+
+
+def test_consecutive_failures_open_the_breaker():
+    pool = ProxyPool(["p1"], failure_threshold=3, cooldown=60)
+    fail(pool, "p1", 2)
+    assert pool.report()["p1"]["state"] == proxypool.CLOSED
+    fail(pool, "p1", 1)
+    assert pool.report()["p1"]["state"] == proxypool.OPEN
+
+
+def test_no_healthy_proxy_fails_fast_with_the_probe_delay():
+    pool = ProxyPool(["p1"], failure_threshold=1, cooldown=60)
+    fail(pool, "p1", 1)
+    started = time.monotonic()
+    with pytest.raises(RetryableError) as raised:
+        pool.acquire(timeout=30)
+    assert time.monotonic() - started < 0.5
+    assert 55 < raised.value.retry_after <= 60
+
+
+def test_half_open_probe_closes_or_reopens_with_a_longer_cooldown():
+    pool = ProxyPool(["p1"], failure_threshold=1, cooldown=0.05, max_cooldown=10)
+    fail(pool, "p1", 1)
+    time.sleep(0.06)
+    # One probe at a time while half-open
+    assert pool.acquire() == "p1"
+    assert pool.report()["p1"]["state"] == proxypool.HALF_OPEN
+    with pytest.raises(RetryableError):
+        pool.acquire()
+    pool.release("p1", proxypool.ERROR)
+    assert pool.report()["p1"]["state"] == proxypool.OPEN
+    assert pool.stats["p1"].cooldown == pytest.approx(0.1)
+
+    time.sleep(0.11)
+    assert pool.acquire() == "p1"
+    pool.release("p1", proxypool.OK, latency=0.2)
+    assert pool.report()["p1"]["state"] == proxypool.CLOSED
+
+
+def test_busy_healthy_proxy_is_waited_for():
+    pool = ProxyPool(["p1"], max_concurrency=1)
+    assert pool.acquire() == "p1"
+    threading.Timer(0.05, pool.release, ("p1", proxypool.OK, 0.1)).start()
+    assert pool.acquire(timeout=5) == "p1"
+    with pytest.raises(RetryableError):
+        pool.acquire(timeout=0.05)
+
+
+def test_traffic_follows_the_scores():
+    pool = ProxyPool(["fast", "slow"], max_concurrency=1000)
+    for _ in range(20):
+        pool.stats["fast"].outcomes.append(proxypool.OK)
+        pool.stats["fast"].latencies.append(0.2)
+        pool.stats["slow"].outcomes.append(proxypool.OK)
+        pool.stats["slow"].latencies.append(4.0)
+    picks = [pool.acquire() for _ in range(500)]
+    assert picks.count("fast") > 400
@@ -0,0 +1,55 @@
+# test_ratelimiter.py
+import threading
+import time
+
+from ratelimiter import RateLimiter, TokenBucket
+
+
+def test_burst_is_free_then_requests_are_spaced_at_the_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # The third caller reserves the next token instead of waiting on top of others
+    assert abs(bucket.reserve() - 0.1) < 0.02
+    assert abs(bucket.reserve() - 0.2) < 0.02
+
+
+def test_tokens_refill_up_to_the_burst():
+    bucket = TokenBucket(rate=100, burst=1)
+    bucket.reserve()
+    time.sleep(0.05)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() > 0
+
+
+def test_concurrent_workers_share_one_host_budget():
+    limiter = RateLimiter(limits={"example.test": (20, 1)})
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=limiter.acquire, args=("https://example.test/p/%d" % i,))
+        for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One free token, then four more at 20 per second
+    assert time.monotonic() - started >= 0.18
+
+
+def test_hosts_and_proxies_get_separate_buckets():
+    limiter = RateLimiter(default_rate=1)
+    assert limiter.get_bucket("https://a.test/x") is limiter.get_bucket("https://a.test/y")
+    assert limiter.get_bucket("https://a.test/x") is not limiter.get_bucket("https://b.test/x")
+    assert limiter.get_bucket("https://a.test/x", "p1") is not limiter.get_bucket("https://a.test/x", "p2")
+    assert limiter.acquire("https://a.test/x", "p1") == 0.0
+    assert limiter.acquire("https://a.test/x", "p2") == 0.0
+
+
+def test_configure_updates_buckets_already_in_use():
+    limiter = RateLimiter()
+    bucket = limiter.get_bucket("https://www.myntra.com/item")
+    assert bucket.rate == 0.5
+    limiter.configure("https://www.myntra.com", 4, burst=3)
+    assert (bucket.rate, bucket.burst) == (4.0, 3)
+    assert limiter.get_bucket("https://www.myntra.com/other", "p1").rate == 4.0
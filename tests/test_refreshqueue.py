@@ -0,0 +1,67 @@
+# test_refreshqueue.py
+import threading
+import time
+
+from cachestore import CacheStore
+from refreshqueue import RefreshQueue
+
+
+def wait_idle(queue, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_one_refresh_per_product_at_a_time():
+    queue = RefreshQueue(workers=2)
+    release = threading.Event()
+    calls = []
+
+    def refresh(product_id):
+        calls.append(product_id)
+        release.wait(5)
+        return {"product_id": product_id}
+
+    assert queue.submit("myntra", "1", refresh)
+    assert not queue.submit("myntra", 1, refresh)
+    assert queue.submit("flipkart", "1", refresh)
+    release.set()
+    wait_idle(queue)
+    assert sorted(calls) == ["1", "1"]
+    assert queue.stats() == {"pending": 0, "refreshed": 2, "failed": 0}
+    # Done, so the product can be queued again
+    assert queue.submit("myntra", "1", refresh)
+    wait_idle(queue)
+
+
+def test_failures_are_counted_and_release_the_product():
+    queue = RefreshQueue(workers=1)
+
+    def broken(product_id):
+        raise RuntimeError("blocked")
+
+    queue.submit("amazon", "A1", broken)
+    wait_idle(queue)
+    queue.submit("amazon", "A2", lambda product_id: None)
+    wait_idle(queue)
+    assert queue.stats() == {"pending": 0, "refreshed": 0, "failed": 2}
+    assert queue.submit("amazon", "A1", broken)
+    wait_idle(queue)
+
+
+def test_expired_entries_are_returned_as_stale_within_the_window(tmp_path):
+    store = CacheStore(tmp_path / "cache.db", memory_bytes=1 << 20)
+    now = time.time()
+    store.put("myntra", "fresh", {"product_id": "fresh"}, fetched_at=now - 10)
+    store.put("myntra", "stale", {"product_id": "stale"}, fetched_at=now - 200)
+    store.put("myntra", "gone", {"product_id": "gone"}, fetched_at=now - 1000)
+    fresh, stale = store.get_with_stale("myntra", ["fresh", "stale", "gone", "missing"], 100, max_stale=500)
+    assert list(fresh) == ["fresh"]
+    assert list(stale) == ["stale"]
+    assert 199 < stale["stale"][1] < 210
+    # No window: any age is served
+    _, stale = store.get_with_stale("myntra", ["stale", "gone"], 100)
+    assert set(stale) == {"stale", "gone"}
+    # A zero window is a plain TTL lookup
+    fresh, stale = store.get_with_stale("myntra", ["fresh", "stale"], 100, max_stale=0)
+    assert (list(fresh), stale) == (["fresh"], {})
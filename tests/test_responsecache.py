@@ -0,0 +1,69 @@
+# test_responsecache.py
+import os
+
+import pytest
+
+from responsecache import ResponseStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResponseStore(tmp_path / "responses.db")
+
+
+def page(size=4000):
+    return os.urandom(size)
+
+
+def scanned_stats(store):
+    conn = store._connect()
+    items = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    raw_bytes, stored = conn.execute(
+        "SELECT COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+    ).fetchone()
+    return {"items": items, "raw_bytes": raw_bytes, "bytes": stored}
+
+
+def test_put_replaces_and_keeps_validators(store):
+    url = "https://www.amazon.in/dp/A1"
+    store.put(url, 200, {"ETag": '"v1"', "Content-Length": "4"}, b"old!")
+    store.put(url, 200, {"ETag": '"v2"', "Last-Modified": "Mon"}, b"new body")
+    assert store.validators(url) == ('"v2"', "Mon")
+    entry = store.get(url)
+    assert entry["body"] == b"new body"
+    assert "Content-Length" not in entry["headers"]
+    assert store.stats() == scanned_stats(store)
+    assert store.stats()["items"] == 1
+
+
+def test_evicts_least_recently_confirmed_first(store):
+    for name, fetched_at in (("a", 100), ("b", 300), ("c", 200)):
+        store.put(f"https://www.flipkart.com/{name}", 200, {}, page(), fetched_at=fetched_at)
+    store.touch("https://www.flipkart.com/a", fetched_at=400)
+    assert store.evict(store.stats()["bytes"] // 3 + 100) == 2
+    assert store.validators("https://www.flipkart.com/a") is not None
+    assert store.validators("https://www.flipkart.com/b") is None
+    assert store.stats() == scanned_stats(store)
+
+
+def test_maintain_applies_age_and_budget(tmp_path):
+    store = ResponseStore(tmp_path / "responses.db", max_bytes=20000, max_age=3600)
+    store.put("https://www.myntra.com/old", 200, {}, page(), fetched_at=0)
+    for i in range(10):
+        store.put(f"https://www.myntra.com/{i}", 200, {}, page())
+    report = store.maintain()
+    assert report["expired"] == 1
+    assert report["evicted"] > 0
+    assert store.stats()["bytes"] <= 20000
+    assert store.stats() == scanned_stats(store)
+
+
+def test_shared_bodies_are_stored_once(store):
+    body = page()
+    store.put("https://www.myntra.com/1", 200, {}, body)
+    store.put("https://www.myntra.com/2", 200, {}, body)
+    store.discard("https://www.myntra.com/1")
+    assert store.get("https://www.myntra.com/2")["body"] == body
+    assert store.stats() == scanned_stats(store)
+    assert store.clear() == 1
+    assert store.stats() == {"items": 0, "raw_bytes": 0, "bytes": 0}
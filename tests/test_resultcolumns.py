@@ -0,0 +1,87 @@
+# test_resultcolumns.py
+import math
+
+import pandas as pd
+import pytest
+
+from resultcolumns import HAS_PYARROW, ResultColumns
+
+
+PRODUCTS = [
+    {"product_id": "1", "mrp": 100.0, "rating_count": 5, "in_stock": True, "images": ["a", "b"],
+     "sizes": [{"label": "M", "available": True, "sku_id": 1}]},
+    {"product_id": "2", "brand": "Acme", "used_fallback": True},
+    {"product_id": "3", "mrp": 80.0, "images": [], "specifications": {"Fabric": "Cotton"}},
+]
+
+
+@pytest.fixture
+def results():
+    results = ResultColumns()
+    results.extend(PRODUCTS)
+    return results
+
+
+def test_rows_round_trip(results):
+    assert len(results) == 3
+    assert list(results.rows()) == PRODUCTS
+    assert results.names() == [
+        "product_id", "brand", "mrp", "rating_count", "in_stock", "images", "specifications", "sizes",
+        "used_fallback",
+    ]
+
+
+def test_dataframe_matches_one_built_from_dicts(results):
+    frame = results.to_dataframe()
+    expected = pd.DataFrame(PRODUCTS)
+    assert sorted(frame.columns) == sorted(expected.columns)
+    assert frame["mrp"].tolist()[0] == 100.0 and math.isnan(frame["mrp"].tolist()[1])
+    assert frame["rating_count"].tolist() == [5, pd.NA, pd.NA]
+    assert frame["images"].tolist() == [["a", "b"], None, []]
+    assert frame["brand"].tolist() == [None, "Acme", None]
+    assert results.to_dataframe(["mrp", "brand"]).columns.tolist() == ["mrp", "brand"]
+
+
+def test_numeric_series_view_the_columns_in_place(results):
+    series = results.series("mrp")
+    assert series.name == "mrp"
+    assert not series.values.flags.owndata
+
+
+def test_appending_after_an_export_leaves_the_export_intact(results):
+    frame = results.to_dataframe()
+    mrp = results.series("mrp")
+    pinned = results.columns["mrp"].values
+    # The exported views pin the buffers, so these appends have to move them
+    results.append({"product_id": "4", "mrp": 60.0, "rating_count": 7, "in_stock": False, "images": ["c"]})
+    results.append({"product_id": "5"})
+    assert len(results) == 5
+    assert results.columns["mrp"].values is not pinned
+    assert len(frame) == 3 and mrp.tolist()[:1] == [100.0]
+    assert results.series("mrp").tolist()[3] == 60.0
+    assert results.series("rating_count").tolist() == [5, pd.NA, pd.NA, 7, pd.NA]
+    assert results.row(3)["images"] == ["c"]
+    assert results.row(4) == {"product_id": "5"}
+
+
+def test_values_of_the_wrong_type_turn_the_column_into_objects():
+    results = ResultColumns()
+    results.extend([{"product_id": "1", "mrp": 100.0}, {"product_id": "2", "mrp": "₹1,299"}, {"product_id": "3"}])
+    assert results.series("mrp").tolist() == [100.0, "₹1,299", None]
+
+
+def test_series_of_a_column_nobody_has_raises_key_error(results):
+    with pytest.raises(KeyError):
+        results.series("manufacturer")
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow is not installed")
+def test_arrow_table_after_appends_and_with_mixed_types(results):
+    results.to_arrow()
+    results.append({"product_id": "4", "mrp": "n/a", "images": ["c"], "sizes": [{"label": "S"}]})
+    table = results.to_arrow()
+    assert table.num_rows == 4
+    assert table.column("mrp").to_pylist() == ["100.0", None, "80.0", "n/a"]
+    assert table.column("images").to_pylist() == [["a", "b"], None, [], ["c"]]
+    assert table.column("sizes").to_pylist()[3] == [{"label": "S", "available": None, "sku_id": None}]
+    assert table.column("specifications").to_pylist()[2] == [("Fabric", "Cotton")]
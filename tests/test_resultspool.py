@@ -0,0 +1,61 @@
+# test_resultspool.py
+import csv
+import json
+import os
+import time
+
+import pytest
+
+from productrecord import EXPORT_NAMES, ProductRecord
+from resultspool import ResultSpool, remove_old_spools
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_close_writes_every_download_file(tmp_path):
+    with ResultSpool(tmp_path, "myntra", EXPORT_NAMES["myntra"]) as spool:
+        spool.write(ProductRecord(product_id="1", name="Kurta ₹", selling_price=499.0, images=["a", "b"]))
+        spool.write({"product_id": "2", "used_fallback": True})
+    paths = spool.close()
+    assert len(spool) == 2
+
+    products = json.loads(paths["json"].read_text(encoding="utf-8"))
+    assert products == [
+        {"product_id": "1", "name": "Kurta ₹", "discounted_price": 499.0, "images": ["a", "b"]},
+        {"product_id": "2", "used_fallback": True},
+    ]
+    plain = read_csv(paths["csv"])
+    assert plain[0] == ["product_id", "name", "discounted_price", "images", "used_fallback"]
+    assert plain[1][:3] == ["1", "Kurta ₹", "499.0"]
+    detailed = read_csv(paths["detailed_csv"])
+    assert detailed[0][-1] == "export_date"
+    assert detailed[1][3] == "a|b"
+    assert detailed[2][:5] == ["2", "", "", "", "True"]
+
+
+def test_an_empty_run_still_produces_valid_files(tmp_path):
+    paths = ResultSpool(tmp_path, "amazon").close()
+    assert json.loads(paths["json"].read_text()) == []
+    assert read_csv(paths["csv"]) == [[]]
+
+
+def test_an_aborted_run_keeps_only_the_jsonl(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ResultSpool(tmp_path, "flipkart") as spool:
+            spool.write({"product_id": "1"})
+            raise RuntimeError("stopped")
+    assert spool.file.closed
+    assert [path.suffix for path in tmp_path.iterdir()] == [".jsonl"]
+    assert spool.jsonl_path.read_text().strip() == '{"product_id": "1"}'
+
+
+def test_remove_old_spools(tmp_path):
+    paths = ResultSpool(tmp_path, "myntra").close()
+    old = time.time() - 7200
+    os.utime(paths["csv"], (old, old))
+    assert remove_old_spools(tmp_path, 3600) == 1
+    assert not paths["csv"].exists() and paths["json"].exists()
+    assert remove_old_spools(tmp_path / "missing", 3600) == 0
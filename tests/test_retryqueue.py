@@ -0,0 +1,55 @@
+# test_retryqueue.py
+from retryqueue import RetryableError, RetryQueue
+
+
+def test_backoff_grows_and_is_capped():
+    queue = RetryQueue(max_retries=6, base_backoff=2, max_backoff=10)
+    delays = [queue.schedule("A1", now=0) for _ in range(5)]
+    for attempt, delay in enumerate(delays[:3], start=1):
+        assert 2 ** attempt <= delay <= 2 ** attempt + 1
+    assert delays[3:] == [10, 10]
+
+
+def test_retry_after_is_a_minimum_delay():
+    queue = RetryQueue(base_backoff=2)
+    assert queue.schedule("A1", RetryableError("503", retry_after=30), now=0) == 30
+    assert queue.state("A1").next_at == 30
+
+
+def test_items_come_back_in_deadline_order():
+    queue = RetryQueue(base_backoff=2)
+    queue.schedule("late", RetryableError("", retry_after=50), now=0)
+    queue.schedule("early", now=0)
+    queue.schedule("middle", RetryableError("", retry_after=20), now=0)
+    assert queue.pop_ready(now=5) == ["early"]
+    assert queue.next_delay(now=5) == 15
+    assert queue.pop_ready(now=100) == ["middle", "late"]
+    assert queue.next_delay() is None
+    assert len(queue) == 0
+
+
+def test_gives_up_after_max_retries():
+    queue = RetryQueue(max_retries=2)
+    error = RetryableError("blocked")
+    assert queue.schedule("A1", error, now=0) is not None
+    assert queue.schedule("A1", error, now=0) is not None
+    assert queue.schedule("A1", error, now=0) is None
+    state = queue.state("A1")
+    assert state.gave_up and state.attempts == 2 and state.last_error is error
+    assert queue.stats()["exhausted"] == 1
+
+
+def test_budget_is_shared_across_items():
+    queue = RetryQueue(max_retries=5, budget=3)
+    assert all(queue.schedule(key, now=0) is not None for key in ("A1", "A2", "A3"))
+    assert queue.schedule("A4", now=0) is None
+    assert queue.schedule("A1", now=0) is None
+    assert queue.stats() == {"scheduled": 3, "pending": 3, "recovered": 0, "exhausted": 2, "budget_left": 0}
+
+
+def test_only_retried_items_count_as_recovered():
+    queue = RetryQueue()
+    queue.schedule("A1", now=0)
+    queue.succeeded("A1")
+    queue.succeeded("A2")
+    assert queue.stats()["recovered"] == 1